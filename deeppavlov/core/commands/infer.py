@@ -62,7 +62,10 @@ def build_model(config: Union[str, Path, dict], mode: str = 'infer',
             c_out = component_config['out']
             in_y = component_config.get('in_y', None)
             main = component_config.get('main', False)
-            model.append(component, c_in, c_out, in_y, main)
+            cache = component_config.get('cache')
+            if cache is not None and 'id' in component_config:
+                cache = {'name': component_config['id'], **cache}
+            model.append(component, c_in, c_out, in_y, main, cache)
 
     return model
 
@@ -0,0 +1,328 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Union
+from weakref import WeakSet
+
+import numpy as np
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.errors import ConfigError
+
+log = getLogger(__name__)
+
+_MISSING = object()
+_caches = WeakSet()
+
+
+class BaseCache:
+    """Base class for thread-safe key-value caches with hit and miss counters.
+
+    Args:
+        name: cache name used in logs and metrics.
+
+    Attributes:
+        hits: number of successful lookups.
+        misses: number of unsuccessful lookups.
+
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        self.name = name or self.__class__.__name__
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        _caches.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for ``key`` or ``default`` if the key is not cached."""
+        with self._lock:
+            value = self._get(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Puts ``value`` to the cache."""
+        with self._lock:
+            self._set(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value for ``key``, computes and caches it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def _get(self, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+
+class LRUCache(BaseCache):
+    """In-memory cache with least recently used eviction policy and optional time to live of the entries.
+
+    Args:
+        size: max number of cached entries.
+        ttl: entry time to live in seconds. If ``None``, entries never expire.
+        name: cache name used in logs and metrics.
+
+    """
+
+    def __init__(self, size: int = 100000, ttl: Optional[float] = None, name: Optional[str] = None) -> None:
+        super().__init__(name)
+        self.size = size
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: Hashable) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            self._discard(key)
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        self._discard(key)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        self._data[key] = (value, expires)
+        self._evict()
+
+    def _discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def _evict(self) -> None:
+        while len(self._data) > self.size:
+            self._discard(next(iter(self._data)))
+
+
+class WeightedLRUCache(LRUCache):
+    """In-memory LRU cache bounded by the total weight of the entries, e.g. by the total number of cached items of
+    the collections stored as values.
+
+    Values heavier than ``max_weight`` are not cached.
+
+    Args:
+        max_weight: max total weight of cached entries.
+        weigher: function which returns weight of a value, ``len`` by default.
+        size: max number of cached entries.
+        ttl: entry time to live in seconds. If ``None``, entries never expire.
+        name: cache name used in logs and metrics.
+
+    """
+
+    def __init__(self, max_weight: float, weigher: Callable[[Any], float] = len, size: int = 100000,
+                 ttl: Optional[float] = None, name: Optional[str] = None) -> None:
+        super().__init__(size, ttl, name)
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self._weights = {}
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        weight = self.weigher(value)
+        if weight > self.max_weight:
+            self._discard(key)
+            return
+        super()._set(key, value)
+        self._weights[key] = weight
+        self.weight += weight
+        self._evict()
+
+    def _discard(self, key: Hashable) -> None:
+        super()._discard(key)
+        self.weight -= self._weights.pop(key, 0)
+
+    def _evict(self) -> None:
+        super()._evict()
+        while self.weight > self.max_weight:
+            self._discard(next(iter(self._data)))
+
+
+class SQLiteCache(BaseCache):
+    """On-disk cache stored in SQLite database, entries survive process restarts.
+
+    Keys and values are pickled, so only picklable objects could be cached. Expired entries are deleted on lookup
+    and on insertion, the oldest entries are evicted on insertion when the cache exceeds ``size``.
+
+    Args:
+        path: path to the database file.
+        size: max number of cached entries. If ``None``, the number of entries is not limited.
+        ttl: entry time to live in seconds. If ``None``, entries never expire.
+        name: cache name used in logs and metrics.
+
+    """
+
+    def __init__(self, path: Union[str, Path], size: Optional[int] = None, ttl: Optional[float] = None,
+                 name: Optional[str] = None) -> None:
+        super().__init__(name)
+        self.path = expand_path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.ttl = ttl
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value BLOB, created REAL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_created ON cache (created)')
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _get(self, key: Hashable) -> Any:
+        key = self._dumps(key)
+        row = self._conn.execute('SELECT value, created FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        value, created = row
+        if self.ttl is not None and created + self.ttl < time.time():
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self._conn.commit()
+            return _MISSING
+        return pickle.loads(value)
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        now = time.time()
+        self._conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (self._dumps(key), self._dumps(value), now))
+        if self.ttl is not None:
+            self._conn.execute('DELETE FROM cache WHERE created < ?', (now - self.ttl,))
+        if self.size is not None:
+            self._conn.execute('DELETE FROM cache WHERE key IN '
+                               '(SELECT key FROM cache ORDER BY created DESC LIMIT -1 OFFSET ?)', (self.size,))
+        self._conn.commit()
+
+    @staticmethod
+    def _dumps(obj: Any) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+CACHE_TYPES = {
+    'lru': LRUCache,
+    'sqlite': SQLiteCache
+}
+
+
+def get_cache(config: Dict) -> BaseCache:
+    """Builds cache from config, e.g. ``{"type": "lru", "size": 100000, "ttl": 3600}``."""
+    config = dict(config)
+    cache_type = config.pop('type', 'lru')
+    try:
+        cache_cls = CACHE_TYPES[cache_type]
+    except KeyError:
+        raise ConfigError(f'Unknown cache type "{cache_type}", available types: {", ".join(CACHE_TYPES)}')
+    return cache_cls(**config)
+
+
+def iter_caches() -> Iterator[BaseCache]:
+    """Iterates over all existing caches."""
+    return iter(list(_caches))
+
+
+class CachedComponent:
+    """Memoizes component outputs per batch item.
+
+    On call, outputs for cached items are taken from the cache and only the remaining items are passed to the
+    component as a smaller batch. Results are stitched back in the original order. All component inputs have to be
+    lists, tuples or arrays with the same number of items, and every component output has to be a batch of the same
+    size. Items of array outputs are cached as copies and the outputs are stacked back into arrays.
+
+    Args:
+        component: component to cache.
+        n_outputs: number of component outputs.
+        cache: cache backend.
+
+    """
+
+    def __init__(self, component: Callable, n_outputs: int, cache: BaseCache) -> None:
+        self.component = component
+        self.n_outputs = n_outputs
+        self.cache = cache
+
+    def __getattr__(self, item: str) -> Any:
+        if item == 'component':
+            raise AttributeError(item)
+        return getattr(self.component, item)
+
+    def __repr__(self) -> str:
+        return f'Cached[{self.component!r}]'
+
+    def __call__(self, *args, **kwargs) -> Any:
+        keys = list(kwargs)
+        batch = list(args) + list(kwargs.values())
+        if not all(isinstance(arg, (list, tuple, np.ndarray)) for arg in batch):
+            raise ConfigError(f'Inputs of cached component {self.component!r} have to be lists, tuples or arrays of '
+                              f'batch items, got {", ".join(type(arg).__name__ for arg in batch)}')
+        batch_size = len(batch[0])
+        if any(len(arg) != batch_size for arg in batch):
+            raise ConfigError(f'Inputs of cached component {self.component!r} have to be batches of the same size, '
+                              f'got sizes {", ".join(str(len(arg)) for arg in batch)}')
+
+        items_keys = [pickle.dumps((keys, [arg[i] for arg in batch]), protocol=pickle.HIGHEST_PROTOCOL)
+                      for i in range(batch_size)]
+        results: List[Any] = [self.cache.get(key, _MISSING) for key in items_keys]
+        missed = [i for i, result in enumerate(results) if result is _MISSING]
+
+        if missed:
+            missed_batch = [[arg[i] for i in missed] for arg in batch]
+            if keys:
+                missed_res = self.component(*missed_batch[:len(args)], **dict(zip(keys, missed_batch[len(args):])))
+            else:
+                missed_res = self.component(*missed_batch)
+            if self.n_outputs == 1:
+                missed_res = [missed_res]
+            array_outputs = tuple(isinstance(output, np.ndarray) for output in missed_res)
+            for j, i in enumerate(missed):
+                # array items are copied not to keep the whole batch array in the cache
+                results[i] = (tuple(output[j].copy() if is_array else output[j]
+                                    for output, is_array in zip(missed_res, array_outputs)), array_outputs)
+                self.cache.set(items_keys[i], results[i])
+
+        # types of outputs are stored with cached items, so batches of cache hits keep them too
+        array_outputs = results[0][1] if results else (False,) * self.n_outputs
+        outputs = []
+        for n, is_array in enumerate(array_outputs):
+            output = [items_outputs[n] for items_outputs, _ in results]
+            outputs.append(np.array(output) if is_array else output)
+        return outputs[0] if self.n_outputs == 1 else outputs
+
+
+def make_cached_component(component: Callable, n_outputs: int, cache_config: Dict) -> CachedComponent:
+    """Wraps component into :class:`CachedComponent` with cache built from ``cache_config``."""
+    cache_config = dict(cache_config)
+    cache_config.setdefault('name', getattr(component, '__name__', component.__class__.__name__))
+    return CachedComponent(component, n_outputs, get_cache(cache_config))
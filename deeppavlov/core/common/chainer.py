@@ -16,8 +16,9 @@ import pickle
 from itertools import islice
 from logging import getLogger
 from types import FunctionType
-from typing import Union, Tuple, List, Optional, Hashable, Reversible
+from typing import Union, Tuple, List, Optional, Hashable, Reversible, Dict
 
+from deeppavlov.core.common.cache import CachedComponent, make_cached_component
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.nn_model import NNModel
@@ -125,7 +126,8 @@ class Chainer(Component):
                     p.pretty(component)
 
     def append(self, component: Union[Component, FunctionType], in_x: [str, list, dict] = None,
-               out_params: [str, list] = None, in_y: [str, list, dict] = None, main: bool = False):
+               out_params: [str, list] = None, in_y: [str, list, dict] = None, main: bool = False,
+               cache: Optional[Dict] = None):
         if isinstance(in_x, str):
             in_x = [in_x]
         if isinstance(in_y, str):
@@ -173,7 +175,10 @@ class Chainer(Component):
         if main:
             self.main = component
         if self.forward_map.issuperset(in_x):
-            self.pipe.append(((x_keys, in_x), out_params, component))
+            infer_component = component
+            if cache is not None:
+                infer_component = make_cached_component(component, len(out_params), cache)
+            self.pipe.append(((x_keys, in_x), out_params, infer_component))
             self.forward_map = self.forward_map.union(out_params)
 
         if self.train_map.issuperset(in_x):
@@ -270,10 +275,13 @@ class Chainer(Component):
 
     def get_main_component(self) -> Optional[Serializable]:
         try:
-            return self.main or self.pipe[-1][-1]
+            component = self.main or self.pipe[-1][-1]
         except IndexError:
             log.warning('Cannot get a main component for an empty chainer')
             return None
+        if isinstance(component, CachedComponent):
+            component = component.component
+        return component
 
     def save(self) -> None:
         main_component = self.get_main_component()
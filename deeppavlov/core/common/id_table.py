@@ -0,0 +1,88 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+
+class DocIdTable:
+    """Memory-mapped table of string ids (e.g. document titles) ordered by their integer ids (e.g. columns of
+    a tfidf matrix).
+
+    Titles are stored as a single utf-8 encoded byte array with offsets, so the table is shared between processes
+    through the OS page cache.
+
+    Args:
+        load_path: a directory with the table files
+
+    """
+
+    def __init__(self, load_path: Union[str, Path]) -> None:
+        load_path = Path(load_path)
+        self.titles = np.load(load_path / 'doc_titles.npy', mmap_mode='r')
+        self.offsets = np.load(load_path / 'doc_offsets.npy', mmap_mode='r')
+        self.columns = np.load(load_path / 'doc_columns.npy', mmap_mode='r')
+        self.titles_order = np.load(load_path / 'doc_titles_order.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def title(self, i: int) -> str:
+        return self.titles[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+    def find_column(self, column: int) -> int:
+        i = int(np.searchsorted(self.columns, column))
+        if i < len(self.columns) and self.columns[i] == column:
+            return i
+        raise KeyError(column)
+
+    def find_title(self, title: str) -> int:
+        encoded = title.encode()
+        low, high = 0, len(self.titles_order)
+        while low < high:
+            middle = (low + high) // 2
+            i = self.titles_order[middle]
+            if self.titles[self.offsets[i]:self.offsets[i + 1]].tobytes() < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.titles_order) and self.title(self.titles_order[low]) == title:
+            return int(self.titles_order[low])
+        raise KeyError(title)
+
+    @staticmethod
+    def save(doc_index: Dict[str, int], save_path: Union[str, Path]) -> None:
+        """Save a dictionary of document titles and their column ids as a table.
+
+        Args:
+            doc_index: a dictionary of document titles and their column ids
+            save_path: a directory to save the table files to
+
+        """
+        save_path = Path(save_path)
+        items = sorted(doc_index.items(), key=lambda item: item[1])
+        non_str = [title for title, _ in items if not isinstance(title, str)]
+        if non_str:
+            raise TypeError(f'Only str titles could be saved to the table, got {type(non_str[0]).__name__} '
+                            f'title {non_str[0]!r}')
+        encoded = [title.encode() for title, _ in items]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(title) for title in encoded])
+        np.save(save_path / 'doc_titles.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        np.save(save_path / 'doc_offsets.npy', offsets)
+        np.save(save_path / 'doc_columns.npy', np.array([column for _, column in items], dtype=np.int64))
+        np.save(save_path / 'doc_titles_order.npy',
+                np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int64))
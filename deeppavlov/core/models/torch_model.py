@@ -15,8 +15,9 @@
 from abc import abstractmethod
 from logging import getLogger
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Dict, Optional, Union
 
+import numpy as np
 import torch
 
 from deeppavlov.core.common.errors import ConfigError
@@ -214,6 +215,40 @@ class TorchModel(NNModel):
     def train_on_batch(self, x: list, y: list):
         pass
 
+    @staticmethod
+    def _infer_by_length_buckets(features: Dict[str, torch.Tensor],
+                                 infer: Callable[[Dict[str, torch.Tensor]], np.ndarray],
+                                 bucket_size: Optional[int]) -> np.ndarray:
+        """Infers features in sub-batches of items with similar length.
+
+        Items are sorted by the number of tokens in ``attention_mask``, split into sub-batches of ``bucket_size`` items
+        and every sub-batch is trimmed to its longest item. Tokenizer padding is expected to be on the right side.
+
+        Args:
+            features: tokenized batch with ``attention_mask``, the last dimension of every tensor is sequence length
+            infer: function that returns numpy predictions for a batch of features
+            bucket_size: max number of items in a sub-batch, if not set the batch is inferred as a whole
+
+        Returns:
+            predictions for all items in the original order
+        """
+        if not bucket_size or 'attention_mask' not in features or len(features['attention_mask']) <= bucket_size:
+            return infer(features)
+
+        lengths = features['attention_mask'].sum(dim=-1)
+        if lengths.dim() > 1:
+            lengths = lengths.max(dim=-1).values
+        order = torch.argsort(lengths)
+        predictions = []
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start:start + bucket_size]
+            max_length = int(lengths[bucket].max())
+            predictions.append(infer({key: value[bucket][..., :max_length] for key, value in features.items()}))
+        predictions = np.concatenate(predictions)
+        result = np.empty_like(predictions)
+        result[order.numpy()] = predictions
+        return result
+
     def _make_step(self, loss: torch.Tensor) -> None:
         loss.backward()
         if self.clip_norm is not None:
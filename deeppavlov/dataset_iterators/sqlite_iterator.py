@@ -13,12 +13,14 @@
 # limitations under the License.
 
 import sqlite3
+import threading
 from logging import getLogger
 from pathlib import Path
 from random import Random
 from typing import List, Any, Dict, Optional, Union, Generator, Tuple
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.data_fitting_iterator import DataFittingIterator
 
@@ -36,9 +38,12 @@ class SQLiteDataIterator(DataFittingIterator):
         batch_size: a number of samples in a single batch
         shuffle: whether to shuffle data during batching
         seed: random seed for data shuffling
+        mmap_size: max number of bytes of the DB file to access using memory-mapped I/O
+        cache_size: SQLite page cache size of a connection in KiB
+        docs_cache_size: a number of documents to keep in LRU cache, documents aren't cached if 0
 
     Attributes:
-        connect: a DB connection
+        connect: a DB connection of the thread that created the iterator
         db_name: a DB name
         doc_ids: DB document ids
         doc2index: a dictionary of document indices and their titles
@@ -48,13 +53,21 @@ class SQLiteDataIterator(DataFittingIterator):
 
     """
 
-    def __init__(self, load_path: Union[str, Path], batch_size: Optional[int] = None,
-                 shuffle: Optional[bool] = None, seed: Optional[int] = None, **kwargs) -> None:
+    # max number of host parameters in a single SQLite statement for SQLite versions prior to 3.32.0
+    MAX_QUERY_PARAMS = 999
 
-        load_path = str(expand_path(load_path))
-        logger.info("Connecting to database, path: {}".format(load_path))
+    def __init__(self, load_path: Union[str, Path], batch_size: Optional[int] = None,
+                 shuffle: Optional[bool] = None, seed: Optional[int] = None, mmap_size: int = 2 ** 30,
+                 cache_size: int = 65536, docs_cache_size: int = 0, **kwargs) -> None:
+
+        self.load_path = expand_path(load_path)
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self.docs_cache = LRUCache(docs_cache_size, name='sqlite_docs') if docs_cache_size > 0 else None
+        logger.info("Connecting to database, path: {}".format(self.load_path))
         try:
-            self.connect = sqlite3.connect(load_path, check_same_thread=False)
+            self.connect = self.get_connection()
         except sqlite3.OperationalError as e:
             e.args = e.args + ("Check that DB path exists and is a valid DB file",)
             raise e
@@ -71,6 +84,20 @@ class SQLiteDataIterator(DataFittingIterator):
         self.shuffle = shuffle
         self.random = Random(seed)
 
+    def get_connection(self) -> sqlite3.Connection:
+        """Get a read-only DB connection of the current thread.
+
+        Returns:
+            a DB connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f'{self.load_path.as_uri()}?mode=ro', uri=True, check_same_thread=False)
+            connection.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            connection.execute(f'PRAGMA cache_size={-int(self.cache_size)}')
+            self._local.connection = connection
+        return connection
+
     def get_doc_ids(self) -> List[Any]:
         """Get document ids.
 
@@ -119,14 +146,39 @@ class SQLiteDataIterator(DataFittingIterator):
             document content if success, else raise Exception
 
         """
-        cursor = self.connect.cursor()
-        cursor.execute(
-            "SELECT text FROM {} WHERE id = ?".format(self.db_name),
-            (doc_id,)
-        )
-        result = cursor.fetchone()
+        return self.get_docs_content([doc_id])[0]
+
+    def get_docs_content(self, doc_ids: List[Any]) -> List[Optional[str]]:
+        """Get contents of several documents with batched queries.
+
+        Args:
+            doc_ids: a list of document ids
+
+        Returns:
+            a list of document contents in the order of ``doc_ids``, ``None`` for missing documents
+
+        """
+        contents = {}
+        if self.docs_cache is not None:
+            for doc_id in doc_ids:
+                content = self.docs_cache.get(doc_id)
+                if content is not None:
+                    contents[doc_id] = content
+        missing_ids = list({doc_id for doc_id in doc_ids if doc_id not in contents})
+
+        cursor = self.get_connection().cursor()
+        for i in range(0, len(missing_ids), self.MAX_QUERY_PARAMS):
+            ids_chunk = missing_ids[i:i + self.MAX_QUERY_PARAMS]
+            cursor.execute(
+                "SELECT id, text FROM {} WHERE id IN ({})".format(self.db_name, ', '.join('?' * len(ids_chunk))),
+                ids_chunk
+            )
+            for doc_id, content in cursor.fetchall():
+                contents[doc_id] = content
+                if self.docs_cache is not None:
+                    self.docs_cache.set(doc_id, content)
         cursor.close()
-        return result if result is None else result[0]
+        return [contents.get(doc_id) for doc_id in doc_ids]
 
     def gen_batches(self, batch_size: int, shuffle: bool = None) \
             -> Generator[Tuple[List[str], List[int]], Any, None]:
@@ -155,13 +207,13 @@ class SQLiteDataIterator(DataFittingIterator):
             batches = [_doc_ids]
 
         for i, doc_ids in enumerate(batches):
-            docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+            docs = self.get_docs_content(doc_ids)
             doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
             yield docs, zip(doc_ids, doc_nums)
 
     def get_instances(self):
         """Get all data"""
         doc_ids = list(self.doc_ids)
-        docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+        docs = self.get_docs_content(doc_ids)
         doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
         return docs, zip(doc_ids, doc_nums)
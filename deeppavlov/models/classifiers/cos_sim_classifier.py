@@ -14,11 +14,11 @@
 
 
 from logging import getLogger
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
-from scipy.sparse import vstack, csr_matrix
-from scipy.sparse.linalg import norm as sparse_norm
+from scipy.sparse import csr_matrix, issparse, vstack
+from sklearn.preprocessing import normalize
 
 from deeppavlov.core.common.file import load_pickle
 from deeppavlov.core.common.file import save_pickle
@@ -35,19 +35,76 @@ class CosineSimilarityClassifier(Estimator, Serializable):
     Classifier based on cosine similarity between vectorized sentences
 
     Parameters:
+        top_n: number of top answers to return
         save_path: path to save the model
         load_path: path to load the model
+        ann_index: optional faiss index factory string (e.g. ``"Flat"`` or ``"IVF1024,Flat"``) to search the most
+            similar train vectors with instead of computing similarities to all of them, dense vectors only.
+            Labels of train vectors not found by the index get zero score.
+        ann_top_k: number of the most similar train vectors to search with the index
+        ann_nprobe: number of inverted lists to visit for IVF indexes
     """
 
-    def __init__(self, top_n: int = 1, save_path: str = None, load_path: str = None, **kwargs) -> None:
+    def __init__(self, top_n: int = 1, save_path: str = None, load_path: str = None,
+                 ann_index: Optional[str] = None, ann_top_k: int = 100, ann_nprobe: int = 16, **kwargs) -> None:
         super().__init__(save_path=save_path, load_path=load_path, **kwargs)
         self.top_n = top_n
+        self.ann_index = ann_index
+        self.ann_top_k = ann_top_k
+        self.ann_nprobe = ann_nprobe
 
         self.x_train_features = self.y_train = None
+        self.x_train_normalized = self.y_labels = self.label_ids = self.label_order = self.label_starts = None
+        self.index = None
 
         if kwargs['mode'] != 'train':
             self.load()
 
+    def _prepare(self) -> None:
+        """Cache L2-normalized train vectors, train labels encoding and the nearest neighbours index"""
+        if issparse(self.x_train_features):
+            self.x_train_normalized = normalize(self.x_train_features).T.tocsr()
+        else:
+            self.x_train_features = np.asarray(self.x_train_features)
+            self.x_train_normalized = normalize(self.x_train_features)
+        # train vectors sorted by label form contiguous segments, label scores are maximums over the segments
+        self.y_labels, self.label_ids = np.unique(self.y_train, return_inverse=True)
+        self.label_order = np.argsort(self.label_ids, kind='stable')
+        self.label_starts = np.searchsorted(self.label_ids[self.label_order], np.arange(len(self.y_labels)))
+        self.index = None
+        if self.ann_index is not None:
+            if isinstance(self.x_train_normalized, np.ndarray):
+                self.index = self._build_index(self.x_train_normalized)
+            else:
+                logger.warning('Nearest neighbours index is supported only for dense vectors, '
+                               'similarities to all train vectors are used')
+
+    def _build_index(self, vectors: np.ndarray):
+        import faiss
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        index = faiss.index_factory(vectors.shape[1], self.ann_index, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        if 'IVF' in self.ann_index:
+            faiss.ParameterSpace().set_index_parameter(index, 'nprobe', self.ann_nprobe)
+        return index
+
+    def _labels_scores(self, q_vects: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        """Returns max cosine similarity of every question to train vectors of every label"""
+        q_vects = normalize(q_vects)
+        if self.index is not None:
+            similarities, ids = self.index.search(np.ascontiguousarray(q_vects, dtype=np.float32),
+                                                  min(self.ann_top_k, self.index.ntotal))
+            found = ids >= 0
+            labels_scores = np.zeros((len(q_vects), len(self.y_labels)))
+            np.maximum.at(labels_scores, (np.nonzero(found)[0], self.label_ids[ids[found]]), similarities[found])
+            return labels_scores
+        cos_similarities = q_vects @ self.x_train_normalized.T if isinstance(q_vects, np.ndarray) \
+            else (q_vects @ self.x_train_normalized).toarray()
+        return np.maximum.reduceat(cos_similarities[:, self.label_order], self.label_starts, axis=1)
+
     def __call__(self, q_vects: Union[csr_matrix, List]) -> Tuple[List[str], List[int]]:
         """Found most similar answer for input vectorized question
 
@@ -59,30 +116,16 @@ class CosineSimilarityClassifier(Estimator, Serializable):
         """
 
         if isinstance(q_vects[0], csr_matrix):
-            q_norm = sparse_norm(q_vects)
-            if q_norm == 0.0:
-                cos_similarities = np.zeros((q_vects.shape[0], self.x_train_features.shape[0]))
-            else:
-                norm = q_norm * sparse_norm(self.x_train_features, axis=1)
-                cos_similarities = np.array(q_vects.dot(self.x_train_features.T).todense())
-                cos_similarities = cos_similarities / norm
+            if not isinstance(q_vects, csr_matrix):
+                q_vects = vstack(list(q_vects))
+            labels_scores = self._labels_scores(q_vects.tocsr())
         elif isinstance(q_vects[0], np.ndarray):
-            q_vects = np.array(q_vects)
-            self.x_train_features = np.array(self.x_train_features)
-            norm = np.linalg.norm(q_vects) * np.linalg.norm(self.x_train_features, axis=1)
-            cos_similarities = q_vects.dot(self.x_train_features.T) / norm
+            labels_scores = self._labels_scores(np.array(q_vects))
         elif q_vects[0] is None:
-            cos_similarities = np.zeros(len(self.x_train_features))
+            labels_scores = np.zeros((len(q_vects), len(self.y_labels)))
         else:
             raise NotImplementedError('Not implemented this type of vectors')
 
-        # get cosine similarity for each class
-        y_labels = np.unique(self.y_train)
-        labels_scores = np.zeros((len(cos_similarities), len(y_labels)))
-        for i, label in enumerate(y_labels):
-            labels_scores[:, i] = np.max([cos_similarities[:, i]
-                                          for i, value in enumerate(self.y_train) if value == label], axis=0)
-
         labels_scores_sum = labels_scores.sum(axis=1, keepdims=True)
         labels_scores = np.divide(labels_scores, labels_scores_sum,
                                   out=np.zeros_like(labels_scores), where=(labels_scores_sum != 0))
@@ -93,7 +136,7 @@ class CosineSimilarityClassifier(Estimator, Serializable):
         answers = []
         scores = []
         for i in range(len(answer_ids)):
-            answers.extend([y_labels[id] for id in answer_ids[i, ::-1]])
+            answers.extend([self.y_labels[id] for id in answer_ids[i, ::-1]])
             scores.extend([np.round(labels_scores[i, id], 2) for id in answer_ids[i, ::-1]])
 
         return answers, scores
@@ -122,6 +165,7 @@ class CosineSimilarityClassifier(Estimator, Serializable):
             self.x_train_features = x_train_vects
 
         self.y_train = list(y_train)
+        self._prepare()
 
     def save(self) -> None:
         """Save classifier parameters"""
@@ -132,3 +176,4 @@ class CosineSimilarityClassifier(Estimator, Serializable):
         """Load classifier parameters"""
         logger.debug("Loading faq_model from {}".format(self.load_path))
         self.x_train_features, self.y_train = load_pickle(self.load_path)
+        self._prepare()
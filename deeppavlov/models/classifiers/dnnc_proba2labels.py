@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from logging import getLogger
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
 
@@ -50,41 +50,70 @@ class Proba2Labels(Component):
                  x: List[str],
                  x_populated: List[str],
                  x_support: List[str],
-                 y_support: List[str]
+                 y_support: List[str],
+                 pair_text_ids: Optional[List[int]] = None
                 ) -> List[str]:
-
-        y_pred = []
-
+        """
+        Args:
+            simmilarity_scores: similarity scores of pairs
+            x: classified texts
+            x_populated: first texts of pairs
+            x_support: second texts of pairs
+            y_support: labels of support examples of pairs
+            pair_text_ids: indices of texts in ``x`` of every pair, found by comparison of texts if not set
+
+        Returns:
+            predicted labels
+        """
         simmilarity_scores = np.array(simmilarity_scores)
-        x_populated = np.array(x_populated)
-        x_support = np.array(x_support)
-        y_support = np.array(y_support)
-        unique_labels = np.unique(y_support)
+        unique_labels, label_ids = np.unique(np.array(y_support), return_inverse=True)
 
         # Transform probits vector into a simmilarity score
         if not self.is_binary:
             simmilarity_scores = simmilarity_scores[:, 1]
 
-        for example in x:
-            example_mask = np.where(np.logical_xor(x_populated == example, x_support == example))
-            example_simmilarity_scores = simmilarity_scores[example_mask]
-            example_y_support = y_support[example_mask]
-
-            probability_by_label = []
-            for label in unique_labels:
-                label_mask = np.where(example_y_support == label)
-                label_simmilarity_scores = example_simmilarity_scores[label_mask]
-                if self.pooling == 'avg':
-                    label_probability = np.mean(label_simmilarity_scores)
-                elif self.pooling == 'max':
-                    label_probability = np.max(label_simmilarity_scores)
-                probability_by_label.append(label_probability)
-
-            probability_by_label = np.array(probability_by_label)
-            max_probability = max(probability_by_label)
-            max_probability_label = unique_labels[np.argmax(probability_by_label)]
-            prediction = "oos" if max_probability < self.confidence_threshold else max_probability_label
+        # rows of texts in the scores matrix, duplicate texts share the row if pairs are found by comparison
+        text_rows = np.arange(len(x))
+        if pair_text_ids is None:
+            pair_text_ids, text_rows = self.find_pair_text_ids(x, x_populated, x_support)
+        pair_text_ids = np.asarray(pair_text_ids, dtype=int)
+        pairs_mask = pair_text_ids >= 0
+        pair_text_ids, label_ids = pair_text_ids[pairs_mask], label_ids[pairs_mask]
+        simmilarity_scores = simmilarity_scores[pairs_mask]
+
+        shape = (len(text_rows), len(unique_labels))
+        if self.pooling == 'avg':
+            scores_sum, counts = np.zeros(shape), np.zeros(shape)
+            np.add.at(scores_sum, (pair_text_ids, label_ids), simmilarity_scores)
+            np.add.at(counts, (pair_text_ids, label_ids), 1)
+            probability_by_label = np.divide(scores_sum, counts, out=np.full(shape, -np.inf), where=counts > 0)
+        else:
+            probability_by_label = np.full(shape, -np.inf)
+            np.maximum.at(probability_by_label, (pair_text_ids, label_ids), simmilarity_scores)
 
+        y_pred = []
+        for example_probability_by_label in probability_by_label[text_rows]:
+            max_label_id = np.argmax(example_probability_by_label)
+            max_probability = example_probability_by_label[max_label_id]
+            prediction = "oos" if max_probability < self.confidence_threshold else unique_labels[max_label_id]
             y_pred.append(prediction)
 
         return y_pred
+
+    @staticmethod
+    def find_pair_text_ids(x: List[str], x_populated: List[str], x_support: List[str]) -> Tuple[np.ndarray,
+                                                                                                 np.ndarray]:
+        """Finds indices of texts in ``x`` of pairs by comparison of texts.
+
+        Returns:
+            indices of first occurrences of texts in ``x`` of pairs (of the first text if both texts of a pair are
+            in ``x``) and ``-1`` for pairs of two equal texts or without texts from ``x``, indices of first
+            occurrences of every text in ``x``
+        """
+        text_ids = {}
+        text_rows = np.array([text_ids.setdefault(text, i) for i, text in enumerate(x)])
+        pair_text_ids = []
+        for populated, support in zip(x_populated, x_support):
+            populated_id, support_id = text_ids.get(populated, -1), text_ids.get(support, -1)
+            pair_text_ids.append(-1 if populated == support else populated_id if populated_id >= 0 else support_id)
+        return np.array(pair_text_ids, dtype=int), text_rows
@@ -12,12 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Tuple
+from typing import Optional, Tuple
 
 import faiss
 import numpy as np
 import torch
-from tqdm import trange
 from transformers import AutoTokenizer, BertModel
 
 from deeppavlov.core.common.registry import register
@@ -26,30 +25,70 @@ from deeppavlov.core.models.serializable import Serializable
 
 
 class FaissBinaryIndex:
-    def __init__(self, index: faiss.Index):
+    """Binary passage index with reranking of candidates found by hamming distance with real-valued query embeddings.
+
+    Args:
+        index: faiss binary index with ids mapping of passages
+        num_threads: number of OpenMP threads of faiss search, faiss default is used if not set
+
+    """
+
+    # bits of every byte value in the order of np.packbits
+    BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32)
+
+    def __init__(self, index: faiss.Index, num_threads: Optional[int] = None):
         self.index = index
+        if num_threads is not None:
+            faiss.omp_set_num_threads(num_threads)
+        self.raw_index = faiss.downcast_IndexBinary(index.index)
+        # packed bits of all passages and ids mapping are read once to rerank candidates with array indexing
+        self.codes = self.get_codes(self.raw_index)
+        self.id_map = faiss.vector_to_array(index.id_map)
+
+    @staticmethod
+    def get_codes(raw_index: faiss.IndexBinary) -> np.ndarray:
+        """Returns packed bits of all passages of shape ``(ntotal, code_size)``.
+
+        Codes of indexes with flat storage are a view of the index memory, other indexes are reconstructed.
+        """
+        shape = (raw_index.ntotal, raw_index.code_size)
+        if isinstance(raw_index, faiss.IndexBinaryFlat):
+            return faiss.rev_swig_ptr(raw_index.xb.data(), shape[0] * shape[1]).reshape(shape)
+        return raw_index.reconstruct_n(0, raw_index.ntotal)
+
+    def rerank(self, query_embs: np.ndarray, candidate_codes: np.ndarray) -> np.ndarray:
+        """Returns inner products of query embeddings and candidate passages embeddings with ``-1`` and ``1`` values.
+
+        Args:
+            query_embs: query embeddings of shape ``(num_queries, dim)``
+            candidate_codes: packed bits of candidate passages of shape ``(num_queries, num_candidates, dim // 8)``
+
+        Returns:
+            scores of shape ``(num_queries, num_candidates)``
+        """
+        num_queries, num_candidates, code_size = candidate_codes.shape
+        query_embs = query_embs.astype(np.float32)
+        # sums of query embedding values over set bits of every byte value at every byte position
+        byte_scores = np.einsum('ijb,vb->ijv', query_embs.reshape(num_queries, code_size, 8), self.BYTE_BITS)
+        ones_scores = byte_scores[np.arange(num_queries)[:, None, None], np.arange(code_size), candidate_codes]
+        return 2 * ones_scores.sum(axis=2) - query_embs.sum(axis=1, keepdims=True)
 
     def search(self, query_embs: np.ndarray, k: int, binary_k=1000, rerank=True) -> Tuple[np.ndarray, np.ndarray]:
-        faiss.omp_set_num_threads(12)
         num_queries = query_embs.shape[0]
-        bin_query_embs = np.packbits(np.where(query_embs > 0, 1, 0)).reshape(num_queries, -1)
-
-        raw_index = self.index.index
-        _, ids_arr = raw_index.search(bin_query_embs, binary_k)
-        psg_embs = np.vstack([np.unpackbits(raw_index.reconstruct(int(id_))) for id_ in ids_arr.reshape(-1)])
-        psg_embs = psg_embs.reshape(query_embs.shape[0], binary_k, query_embs.shape[1])
-        psg_embs = psg_embs.astype(np.float32)
+        binary_k = min(binary_k, self.raw_index.ntotal)
+        k = min(k, binary_k)
+        bin_query_embs = np.packbits(query_embs > 0, axis=1)
 
-        psg_embs = psg_embs * 2 - 1
-        scores_arr = np.einsum("ijk,ik->ij", psg_embs, query_embs)
-        sorted_indices = np.argsort(-scores_arr, axis=1)
+        _, ids_arr = self.raw_index.search(bin_query_embs, binary_k)
+        scores_arr = self.rerank(query_embs, self.codes[ids_arr])
+        top_indices = np.argpartition(-scores_arr, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores_arr, top_indices, axis=1)
+        sorted_indices = np.take_along_axis(top_indices, np.argsort(-top_scores, axis=1), axis=1)
 
-        ids_arr = ids_arr[np.arange(num_queries)[:, None], sorted_indices]
-        ids_arr = np.array([self.index.id_map.at(int(id_)) for id_ in ids_arr.reshape(-1)], dtype=np.int)
-        ids_arr = ids_arr.reshape(num_queries, -1)
-        scores_arr = scores_arr[np.arange(num_queries)[:, None], sorted_indices]
+        ids_arr = self.id_map[np.take_along_axis(ids_arr, sorted_indices, axis=1)]
+        scores_arr = np.take_along_axis(scores_arr, sorted_indices, axis=1)
 
-        return scores_arr[:, :k], ids_arr[:, :k]
+        return scores_arr, ids_arr
 
 
 @register('bpr')
@@ -60,6 +99,9 @@ class BPR(Component, Serializable):
                  query_encoder_file: str,
                  max_query_length: int = 256,
                  top_n: int = 100,
+                 binary_k: int = 1000,
+                 batch_size: int = 256,
+                 num_threads: Optional[int] = None,
                  device: str = "gpu",
                  *args, **kwargs
                  ):
@@ -67,12 +109,14 @@ class BPR(Component, Serializable):
         self.device = torch.device("cuda" if torch.cuda.is_available() and device == "gpu" else "cpu")
         self.bpr_index = bpr_index
         self.top_n = top_n
+        self.binary_k = binary_k
+        self.batch_size = batch_size
         self.max_query_length = max_query_length
         self.query_encoder_file = query_encoder_file
         self.tokenizer = AutoTokenizer.from_pretrained(pretrained_model, use_fast=True)
         self.q_encoder = BertModel.from_pretrained(pretrained_model).to(self.device)
         self.load()
-        self.index = FaissBinaryIndex(self.base_index)
+        self.index = FaissBinaryIndex(self.base_index, num_threads)
 
     def load(self):
         checkpoint = torch.load(str(self.load_path / self.query_encoder_file), map_location=self.device)
@@ -82,15 +126,17 @@ class BPR(Component, Serializable):
     def save(self) -> None:
         pass
 
-    def encode_queries(self, queries, batch_size: int = 256) -> np.ndarray:
+    def encode_queries(self, queries, batch_size: Optional[int] = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
         embeddings = []
         with torch.no_grad():
-            for start in trange(0, len(queries), batch_size):
+            for start in range(0, len(queries), batch_size):
                 model_inputs = self.tokenizer.batch_encode_plus(
                     queries[start: start + batch_size],
                     return_tensors="pt",
                     max_length=self.max_query_length,
-                    padding="max_length",
+                    padding=True,
+                    truncation=True,
                 )
                 model_inputs = {k: v.to(self.device) for k, v in model_inputs.items()}
                 sequence_output = self.q_encoder(**model_inputs)[0]
@@ -102,6 +148,6 @@ class BPR(Component, Serializable):
     def __call__(self, queries):
         queries = [query.lower() for query in queries]
         query_embeddings = self.encode_queries(queries)
-        scores_batch, ids_batch = self.index.search(query_embeddings, self.top_n)
+        scores_batch, ids_batch = self.index.search(query_embeddings, self.top_n, self.binary_k)
         ids_batch = ids_batch.tolist()
         return ids_batch
@@ -13,7 +13,6 @@
 # limitations under the License.
 
 from logging import getLogger
-from operator import itemgetter
 from typing import List, Union, Tuple, Optional
 
 from deeppavlov.core.common.chainer import Chainer
@@ -34,6 +33,9 @@ class LogitRanker(Component):
         batch_size: batch size to use with squad model
         sort_noans: whether to downgrade noans tokens in the most possible answers
         top_n: number of answers to return
+        return_answer_sentence: whether to return sentences containing the answers
+        flatten_batch: whether to join contexts of all questions of the batch and split them into squad model batches
+            of ``batch_size`` contexts, otherwise contexts of every question are sent to the squad model separately
 
      Attributes:
         squad_model: a loaded squad model
@@ -43,12 +45,36 @@ class LogitRanker(Component):
     """
 
     def __init__(self, squad_model: Union[Chainer, Component], batch_size: int = 50,
-                 sort_noans: bool = False, top_n: int = 1, return_answer_sentence: bool = False, **kwargs):
+                 sort_noans: bool = False, top_n: int = 1, return_answer_sentence: bool = False,
+                 flatten_batch: bool = True, **kwargs):
         self.squad_model = squad_model
         self.batch_size = batch_size
         self.sort_noans = sort_noans
         self.top_n = top_n
         self.return_answer_sentence = return_answer_sentence
+        self.flatten_batch = flatten_batch
+
+    def _infer_squad(self, contexts: List[str], questions: List[str]) -> List[Tuple]:
+        results = []
+        for i in range(0, len(contexts), self.batch_size):
+            c_batch = contexts[i: i + self.batch_size]
+            q_batch = questions[i: i + self.batch_size]
+            results += list(zip(*self.squad_model(c_batch, q_batch), c_batch))
+        return results
+
+    def _get_results(self, contexts_batch: List[List[str]], questions_batch: List[List[str]]) -> List[List[Tuple]]:
+        if not self.flatten_batch:
+            return [self._infer_squad(contexts, questions)
+                    for contexts, questions in zip(contexts_batch, questions_batch)]
+
+        flat_results = self._infer_squad([context for contexts in contexts_batch for context in contexts],
+                                         [question for questions in questions_batch for question in questions])
+        results_batch = []
+        start = 0
+        for contexts in contexts_batch:
+            results_batch.append(flat_results[start: start + len(contexts)])
+            start += len(contexts)
+        return results_batch
 
     def __call__(self, contexts_batch: List[List[str]], questions_batch: List[List[str]],
                  doc_ids_batch: Optional[List[List[str]]] = None) -> \
@@ -79,34 +105,24 @@ class LogitRanker(Component):
         batch_best_answers_place = []
         batch_best_answers_doc_ids = []
         batch_best_answers_sentences = []
-        for quest_ind, [contexts, questions] in enumerate(zip(contexts_batch, questions_batch)):
-            results = []
-            for i in range(0, len(contexts), self.batch_size):
-                c_batch = contexts[i: i + self.batch_size]
-                q_batch = questions[i: i + self.batch_size]
-                batch_predict = list(zip(*self.squad_model(c_batch, q_batch), c_batch))
-                results += batch_predict
+        for quest_ind, results in enumerate(self._get_results(contexts_batch, questions_batch)):
             if self.sort_noans:
-                results_sort = sorted(results, key=lambda x: (x[0] != '', x[2]), reverse=True)
+                sort_key = lambda i: (results[i][0] != '', results[i][2])
             else:
-                results_sort = sorted(results, key=itemgetter(2), reverse=True)
-            best_answers = [x[0] for x in results_sort[:self.top_n]]
-            best_answers_place = [x[1] for x in results_sort[:self.top_n]]
-            best_answers_score = [x[2] for x in results_sort[:self.top_n]]
-            best_answers_contexts = [x[3] for x in results_sort[:self.top_n]]
+                sort_key = lambda i: results[i][2]
+            best_inds = sorted(range(len(results)), key=sort_key, reverse=True)[:self.top_n]
+            best_answers = [results[i][0] for i in best_inds]
+            best_answers_place = [results[i][1] for i in best_inds]
+            best_answers_score = [results[i][2] for i in best_inds]
             batch_best_answers.append(best_answers)
             batch_best_answers_place.append(best_answers_place)
             batch_best_answers_score.append(best_answers_score)
-            best_answers_sentences = []
-            for answer, place, context in zip(best_answers, best_answers_place, best_answers_contexts):
-                sentence = find_answer_sentence(place, context)
-                best_answers_sentences.append(sentence)
-            batch_best_answers_sentences.append(best_answers_sentences)
+            if self.return_answer_sentence:
+                batch_best_answers_sentences.append([find_answer_sentence(results[i][1], results[i][3])
+                                                     for i in best_inds])
 
             if doc_ids_batch is not None:
-                doc_ind = [results.index(x) for x in results_sort]
-                batch_best_answers_doc_ids.append(
-                    [doc_ids_batch[quest_ind][i] for i in doc_ind][:len(batch_best_answers[-1])])
+                batch_best_answers_doc_ids.append([doc_ids_batch[quest_ind][i] for i in best_inds])
 
         if self.top_n == 1:
             batch_best_answers = [x[0] for x in batch_best_answers]
@@ -13,16 +13,18 @@
 # limitations under the License.
 
 from logging import getLogger
-from operator import itemgetter
-from typing import List, Any, Tuple
+from pathlib import Path
+from typing import List, Any, Tuple, Optional, Union
 
 import numpy as np
 import joblib
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.file import read_json
+from deeppavlov.core.common.id_table import DocIdTable
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Component
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
 
 logger = getLogger(__name__)
 
@@ -39,65 +41,130 @@ class PopRanker(Component):
     * multiplication of the two features above
 
     Args:
-        pop_dict_path: a path to json file with article title to article popularity map
+        pop_dict_path: a path to json file with article title to article popularity map or a path to
+         a directory with memory-mapped popularity table made by :func:`convert_pop_dict`
         load_path: a path to saved logistic regression classifier
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` (``True``) or all ids
          (``False``)
+        vectorizer: a vectorizer of TF-IDF Ranker, if set, popularities are looked up by column indices of its
+         tfidf matrix returned by TF-IDF Ranker with ``return_doc_indices``
 
     Attributes:
-        pop_dict: a map of article titles to their popularity
+        pop_dict: a map of article titles to their popularity, ``None`` if popularity table is used
+        pop_table: a memory-mapped table of article titles, ``None`` if popularity dictionary is used
+        popularities: popularities of articles from :attr:`pop_table` in the order of the table rows
         mean_pop: mean popularity of all popularities in :attr:`pop_dict`, use it when popularity is not found
         clf: a loaded logistic regression classifier
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` or all ids
+        vectorizer: a vectorizer of TF-IDF Ranker
+        doc_popularities: popularities of documents in the order of columns of :attr:`vectorizer` tfidf matrix,
+         ``None`` until the first call with doc indices
 
     """
 
     def __init__(self, pop_dict_path: str, load_path: str, top_n: int = 3, active: bool = True,
-                 **kwargs) -> None:
+                 vectorizer: Optional[HashingTfIdfVectorizer] = None, **kwargs) -> None:
         pop_dict_path = expand_path(pop_dict_path)
-        logger.debug(f"Reading popularity dictionary from {pop_dict_path}")
-        self.pop_dict = read_json(pop_dict_path)
-        self.mean_pop = np.mean(list(self.pop_dict.values()))
+        if pop_dict_path.is_dir():
+            logger.debug(f"Loading popularity table from {pop_dict_path}")
+            self.pop_dict = None
+            self.pop_table = DocIdTable(pop_dict_path)
+            self.popularities = np.load(pop_dict_path / 'popularities.npy', mmap_mode='r')
+            self.mean_pop = np.mean(self.popularities)
+        else:
+            logger.debug(f"Reading popularity dictionary from {pop_dict_path}")
+            self.pop_dict = read_json(pop_dict_path)
+            self.pop_table = None
+            self.popularities = None
+            self.mean_pop = np.mean(list(self.pop_dict.values()))
         load_path = expand_path(load_path)
         logger.debug(f"Loading popularity ranker from {load_path}")
         self.clf = joblib.load(load_path)
         self.top_n = top_n
         self.active = active
-
-    def __call__(self, input_doc_ids: List[List[Any]], input_doc_scores: List[List[float]]) -> \
-            Tuple[List[List], List[List]]:
+        self.vectorizer = vectorizer
+        self.doc_popularities = None
+
+    def get_popularity(self, idx: Any) -> float:
+        """Get popularity of the article, :attr:`mean_pop` if the article popularity is unknown."""
+        if self.pop_table is None:
+            return self.pop_dict.get(idx, self.mean_pop)
+        if not isinstance(idx, str):
+            return self.mean_pop
+        try:
+            return self.popularities[self.pop_table.find_title(idx)]
+        except KeyError:
+            return self.mean_pop
+
+    def get_doc_popularities(self) -> np.ndarray:
+        """Get popularities of documents aligned to columns of the :attr:`vectorizer` tfidf matrix,
+        build them on the first call."""
+        if self.doc_popularities is None:
+            doc_popularities = np.full(self.vectorizer.tfidf_matrix.shape[1], self.mean_pop, dtype=np.float64)
+            for column, idx in self.vectorizer.index2doc.items():
+                doc_popularities[column] = self.get_popularity(idx)
+            self.doc_popularities = doc_popularities
+        return self.doc_popularities
+
+    def __call__(self, input_doc_ids: List[List[Any]], input_doc_scores: List[List[float]],
+                 input_doc_indices: Optional[List[List[int]]] = None) -> Tuple[List[List], List[List]]:
         """Get tfidf scores and tfidf ids, re-rank them by applying logistic regression classifier,
         output pop ranker ids and pop ranker scores.
 
          Args:
             input_doc_ids: top input doc ids of tfidf ranker
             input_doc_scores: top input doc scores of tfidf ranker corresponding to doc ids
+            input_doc_indices: column indices of doc ids in the tfidf matrix of :attr:`vectorizer`
 
         Returns:
             top doc ids of pop ranker and their corresponding scores
 
         """
+        scores = np.array([score for instance_scores in input_doc_scores for score in instance_scores],
+                          dtype=np.float64)
+        if input_doc_indices is not None and self.vectorizer is not None:
+            indices = np.array([i for instance_indices in input_doc_indices for i in instance_indices],
+                               dtype=np.int64)
+            pops = self.get_doc_popularities()[indices]
+        else:
+            pops = np.array([self.get_popularity(idx) for instance_ids in input_doc_ids for idx in instance_ids],
+                            dtype=np.float64)
+        if len(scores):
+            probas = self.clf.predict_proba(np.stack([scores, pops, scores * pops], axis=1))[:, 1]
+        else:
+            probas = scores
+
         batch_ids = []
         batch_scores = []
-        for instance_ids, instance_scores in zip(input_doc_ids, input_doc_scores):
-            instance_probas = []
-            for idx, score in zip(instance_ids, instance_scores):
-                pop = self.pop_dict.get(idx, self.mean_pop)
-                features = [score, pop, score * pop]
-                prob = self.clf.predict_proba([features])
-                instance_probas.append(prob[0][1])
-
-            sort = sorted(enumerate(instance_probas), key=itemgetter(1), reverse=True)
-            sorted_probas = [item[1] for item in sort]
-            sorted_ids = [instance_ids[item[0]] for item in sort]
-
+        start = 0
+        for instance_ids in input_doc_ids:
+            instance_probas = probas[start:start + len(instance_ids)]
+            start += len(instance_ids)
+            order = np.argsort(-instance_probas, kind='stable')
             if self.active:
-                sorted_ids = sorted_ids[:self.top_n]
-                sorted_probas = sorted_probas[:self.top_n]
-
-            batch_ids.append(sorted_ids)
-            batch_scores.append(sorted_probas)
+                order = order[:self.top_n]
+            batch_ids.append([instance_ids[i] for i in order])
+            batch_scores.append(instance_probas[order].tolist())
 
         return batch_ids, batch_scores
+
+
+def convert_pop_dict(pop_dict_path: Union[str, Path], save_path: Union[str, Path]) -> None:
+    """Convert json file with article title to article popularity map to a memory-mapped popularity table.
+
+    Run from the command line as ``python -m deeppavlov.utils.mmap_indexes.mmap_indexes popularity <pop_dict_path>
+    <save_path>``.
+
+    Args:
+        pop_dict_path: a path to json file
+        save_path: a directory to save the table to
+
+    """
+    pop_dict = read_json(expand_path(pop_dict_path))
+    save_path = expand_path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+    DocIdTable.save({title: i for i, title in enumerate(pop_dict)}, save_path)
+    np.save(save_path / 'popularities.npy', np.array(list(pop_dict.values()), dtype=np.float64))
+
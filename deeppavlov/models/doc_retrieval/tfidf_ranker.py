@@ -12,10 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import List, Any, Tuple
+from typing import List, Any, Tuple, Optional
 
 import numpy as np
+from scipy.sparse import csr_matrix
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Component
@@ -24,6 +26,42 @@ from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfV
 logger = getLogger(__name__)
 
 
+def csr_top_k(scores: csr_matrix, k: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Select top k columns with the highest scores in every row of a csr matrix.
+
+    Columns with equal scores are ordered by their indices, so the result does not depend on the order of elements
+    in the rows. If a row has less than k nonzero elements, it is padded with zero-scored columns with the lowest
+    indices.
+
+    Args:
+        scores: csr matrix with scores of shape [n_rows X n_columns]
+        k: a number of columns to select
+
+    Returns:
+        a tuple of lists with column indices and scores sorted by score in descending order for every row
+
+    """
+    k = min(k, scores.shape[1])
+    batch_indices, batch_scores = [], []
+    for start, end in zip(scores.indptr[:-1], scores.indptr[1:]):
+        row_indices = scores.indices[start:end]
+        row_data = scores.data[start:end]
+        if len(row_data) > k:
+            top = np.flatnonzero(row_data >= -np.partition(-row_data, k - 1)[k - 1])
+        else:
+            top = np.arange(len(row_data))
+        top = top[np.lexsort((row_indices[top], -row_data[top]))][:k]
+        row_indices, row_data = row_indices[top], row_data[top]
+        if len(row_indices) < k:
+            padding = np.setdiff1d(np.arange(k + len(row_indices)), row_indices, assume_unique=True)
+            padding = padding[:k - len(row_indices)]
+            row_indices = np.concatenate([row_indices, padding])
+            row_data = np.concatenate([row_data, np.zeros(len(padding), dtype=row_data.dtype)])
+        batch_indices.append(row_indices)
+        batch_scores.append(row_data)
+    return batch_indices, batch_scores
+
+
 @register("tfidf_ranker")
 class TfidfRanker(Component):
     """Rank documents according to input strings.
@@ -33,6 +71,9 @@ class TfidfRanker(Component):
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` (``True``) or all ids
          (``False``)
+        num_workers: a number of threads to compute scores with, the tfidf matrix is split between threads by terms
+        return_doc_indices: whether to return column indices of the selected documents in the tfidf matrix
+         as the third output
 
     Attributes:
         top_n: a number of doc ids to return
@@ -43,44 +84,89 @@ class TfidfRanker(Component):
 
     """
 
-    def __init__(self, vectorizer: HashingTfIdfVectorizer, top_n=5, active: bool = True, **kwargs):
+    def __init__(self, vectorizer: HashingTfIdfVectorizer, top_n=5, active: bool = True, num_workers: int = 1,
+                 return_doc_indices: bool = False, **kwargs):
 
         self.top_n = top_n
         self.vectorizer = vectorizer
         self.active = active
+        self.num_workers = num_workers
+        self.return_doc_indices = return_doc_indices
+        self._shards: Optional[List[Tuple[int, int, csr_matrix]]] = None
+        self._executor = ThreadPoolExecutor(num_workers) if num_workers > 1 else None
 
-    def __call__(self, questions: List[str]) -> Tuple[List[Any], List[float]]:
+    def __call__(self, questions: List[str]) -> Tuple[List[Any], ...]:
         """Rank documents and return top n document titles with scores.
 
         Args:
             questions: list of queries used in ranking
 
         Returns:
-            a tuple of selected doc ids and their scores
+            a tuple of selected doc ids and their scores, and their column indices if :attr:`return_doc_indices`
         """
 
-        batch_doc_ids, batch_docs_scores = [], []
         q_tfidfs = self.vectorizer(questions)
+        if not self.active:
+            return self._rank_all(q_tfidfs)
+
+        batch_indices, batch_scores = csr_top_k(self._get_scores(q_tfidfs), self.top_n)
+        batch_doc_ids = [[self.vectorizer.index2doc[i] for i in indices] for indices in batch_indices]
+        batch_docs_scores = [scores + 0.0001 for scores in batch_scores]  # add a small value to eliminate zero scores
+        if self.return_doc_indices:
+            return batch_doc_ids, batch_docs_scores, batch_indices
+        return batch_doc_ids, batch_docs_scores
+
+    def destroy(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+        super().destroy()
+
+    def _get_scores(self, q_tfidfs: csr_matrix) -> csr_matrix:
+        """Computes sparse scores of all documents for a batch of queries with a single sparse product."""
+        if self._executor is None:
+            return csr_matrix(q_tfidfs * self.vectorizer.tfidf_matrix)
+        if self._shards is None:
+            self._shards = self._split_by_terms(self.vectorizer.tfidf_matrix, self.num_workers)
+        partial_scores = self._executor.map(lambda shard: q_tfidfs[:, shard[0]:shard[1]] * shard[2], self._shards)
+        return csr_matrix(sum(partial_scores))
+
+    @staticmethod
+    def _split_by_terms(tfidf_matrix: csr_matrix, n_shards: int) -> List[Tuple[int, int, csr_matrix]]:
+        """Splits the tfidf matrix into row shards with similar number of nonzero elements without data copying."""
+        indptr = tfidf_matrix.indptr
+        bounds = np.searchsorted(indptr, np.linspace(0, tfidf_matrix.nnz, n_shards + 1)[1:-1])
+        bounds = np.unique(np.concatenate([[0], bounds, [tfidf_matrix.shape[0]]]))
+        shards = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            data_start, data_end = indptr[start], indptr[end]
+            shard = csr_matrix((tfidf_matrix.data[data_start:data_end], tfidf_matrix.indices[data_start:data_end],
+                                indptr[start:end + 1] - data_start),
+                               shape=(end - start, tfidf_matrix.shape[1]), copy=False)
+            shards.append((start, end, shard))
+        return shards
+
+    def _rank_all(self, q_tfidfs: csr_matrix) -> Tuple[List[Any], ...]:
+        batch_doc_ids, batch_docs_scores, batch_indices = [], [], []
 
         for q_tfidf in q_tfidfs:
             scores = q_tfidf * self.vectorizer.tfidf_matrix
             scores = np.squeeze(
                 scores.toarray() + 0.0001)  # add a small value to eliminate zero scores
 
-            if self.active:
-                thresh = self.top_n
-            else:
-                thresh = len(self.vectorizer.doc_index)
+            thresh = len(self.vectorizer.doc_index)
 
             if thresh >= len(scores):
                 o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
             else:
                 o = np.argpartition(-scores, thresh)[0:thresh]
-            o_sort = o[np.argsort(-scores[o])]
+            o_sort = o[np.lexsort((o, -scores[o]))]
 
             doc_scores = scores[o_sort]
-            doc_ids = [self.vectorizer.index2doc.get(i, int(i)) for i in o_sort]
+            doc_ids = [self.vectorizer.index2doc[i] for i in o_sort]
             batch_doc_ids.append(doc_ids)
             batch_docs_scores.append(doc_scores)
+            batch_indices.append(o_sort)
 
+        if self.return_doc_indices:
+            return batch_doc_ids, batch_docs_scores, batch_indices
         return batch_doc_ids, batch_docs_scores
@@ -28,18 +28,12 @@ def concat_lists(list_a: List[List[Any]], list_b: List[List[Any]]):
 
 
 def find_answer_sentence(answer_pos: int, context: str) -> str:
-    answer_sentence = ""
-    context_sentences = nltk.sent_tokenize(context)
     start = 0
-    context_sentences_offsets = []
-    for sentence in context_sentences:
+    for sentence in nltk.sent_tokenize(context):
         end = start + len(sentence)
-        context_sentences_offsets.append((start, end))
-        start = end + 1
-
-    for sentence, (start_offset, end_offset) in zip(context_sentences, context_sentences_offsets):
-        if start_offset < answer_pos < end_offset:
-            answer_sentence = sentence
+        if start < answer_pos < end:
+            return sentence
+        if end >= answer_pos:
             break
-
-    return answer_sentence
+        start = end + 1
+    return ""
@@ -0,0 +1,157 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+from array import array
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from hdt import HDTDocument
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.id_table import DocIdTable
+
+log = getLogger(__name__)
+
+
+def find_connected_entities(kb: HDTDocument, entity_id: str, prefixes: Dict[str, Any]) -> Set[str]:
+    """Finds entities connected with the entity in the knowledge base.
+
+    Entities are connected by direct relations (except ``P31`` and ``P279``) and by statement and qualifier relations
+    of the statements of the entity.
+
+    Args:
+        kb: knowledge base in HDT format
+        entity_id: entity id
+        prefixes: entity and relations prefixes
+
+    Returns:
+        ids of connected entities
+    """
+    objects = set()
+    for prefix in prefixes["entity"]:
+        tr, _ = kb.search_triples(f"{prefix}/{entity_id}", "", "")
+        for subj, rel, obj in tr:
+            if rel.split("/")[-1] not in {"P31", "P279"}:
+                if any([obj.startswith(pr) for pr in prefixes["entity"]]):
+                    objects.add(obj.split("/")[-1])
+                if rel.startswith(prefixes["rels"]["no_type"]):
+                    tr2, _ = kb.search_triples(obj, "", "")
+                    for _, rel2, obj2 in tr2:
+                        if rel2.startswith(prefixes["rels"]["statement"]) \
+                                or rel2.startswith(prefixes["rels"]["qualifier"]):
+                            if any([obj2.startswith(pr) for pr in prefixes["entity"]]):
+                                objects.add(obj2.split("/")[-1])
+    return objects
+
+
+class ConnectionsIndex:
+    """Memory-mapped adjacency lists of entities in the knowledge base.
+
+    Entity ids are encoded with a table of entities (:class:`DocIdTable`), sorted ids of connected entities of every
+    entity are stored in CSR format: ``neighbors[neighbors_offsets[i]:neighbors_offsets[i + 1]]`` are the neighbors
+    of the entity ``i``.
+
+    Args:
+        load_path: a directory with the index files made by :func:`build_connections_index`
+
+    """
+
+    def __init__(self, load_path: Union[str, Path]) -> None:
+        load_path = Path(load_path)
+        self.entities = DocIdTable(load_path)
+        self.offsets = np.load(load_path / 'neighbors_offsets.npy', mmap_mode='r')
+        self.neighbors = np.load(load_path / 'neighbors.npy', mmap_mode='r')
+
+    def find_entity(self, entity_id: str) -> Optional[int]:
+        try:
+            return self.entities.find_title(entity_id)
+        except KeyError:
+            return None
+
+    def get_neighbors(self, entity_num: int) -> np.ndarray:
+        """Returns sorted numbers of the neighbors of the entity with ``entity_num``."""
+        start, end = self.offsets[entity_num:entity_num + 2]
+        return self.neighbors[start:end]
+
+    def find_connected_pairs(self, entity_ids: List[str]) -> List[Tuple[str, str]]:
+        """Finds pairs of connected entities among the distinct entity ids.
+
+        Returns:
+            pairs ``(entity_id1, entity_id2)`` where ``entity_id1`` is a neighbor of ``entity_id2``
+        """
+        found_ids, nums = [], []
+        for entity_id in entity_ids:
+            entity_num = self.find_entity(entity_id)
+            if entity_num is not None:
+                found_ids.append(entity_id)
+                nums.append(entity_num)
+        if not nums:
+            return []
+        nums = np.array(nums)
+        order = np.argsort(nums)
+        sorted_nums = nums[order]
+        neighbors = [self.get_neighbors(entity_num) for entity_num in nums]
+        all_neighbors = np.concatenate(neighbors)
+        owners = np.repeat(np.arange(len(nums)), [len(entity_neighbors) for entity_neighbors in neighbors])
+        positions = np.minimum(np.searchsorted(sorted_nums, all_neighbors), len(nums) - 1)
+        hits = sorted_nums[positions] == all_neighbors
+        return [(found_ids[order[pos]], found_ids[owner])
+                for pos, owner in zip(positions[hits].tolist(), owners[hits].tolist())]
+
+
+def build_connections_index(kb_filename: Union[str, Path], entities_database_filename: Union[str, Path],
+                            save_path: Union[str, Path], prefixes: Dict[str, Any]) -> None:
+    """Build :class:`ConnectionsIndex` of entities of the inverted index of
+    :class:`~deeppavlov.models.entity_extraction.entity_linking.EntityLinker`.
+
+    Run from the command line as ``python -m deeppavlov.utils.mmap_indexes.mmap_indexes connections <kb_filename>
+    <entities_database_filename> <save_path>``, see ``--help`` for the prefixes options.
+
+    Args:
+        kb_filename: a path to the knowledge base in HDT format
+        entities_database_filename: a path to the database with the inverted index of entities
+        save_path: a directory to save the index files to
+        prefixes: entity and relations prefixes
+
+    """
+    kb = HDTDocument(str(expand_path(kb_filename)))
+    conn = sqlite3.connect(str(expand_path(entities_database_filename)))
+    entity_ids = [row[0] for row in conn.execute("SELECT DISTINCT entity_id FROM inverted_index;")]
+    conn.close()
+    save_path = expand_path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+
+    entity2num = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+    counts = np.zeros(len(entity_ids) + 1, dtype=np.int64)
+    neighbors = array('q')
+    for i, entity_id in enumerate(entity_ids):
+        entity_neighbors = sorted({entity2num.setdefault(obj, len(entity2num))
+                                   for obj in find_connected_entities(kb, entity_id, prefixes)})
+        neighbors.extend(entity_neighbors)
+        counts[i + 1] = len(entity_neighbors)
+        if (i + 1) % 100000 == 0:
+            log.info(f"Found neighbors of {i + 1} entities of {len(entity_ids)}")
+    log.info(f"Index has {len(entity2num)} entities and {len(neighbors)} connections")
+
+    offsets = np.cumsum(counts)
+    # entities which are not in the inverted index have no neighbors
+    offsets = np.concatenate([offsets, np.full(len(entity2num) - len(entity_ids), offsets[-1])])
+    dtype = np.int32 if len(entity2num) < np.iinfo(np.int32).max else np.int64
+    np.save(save_path / 'neighbors_offsets.npy', offsets)
+    np.save(save_path / 'neighbors.npy', np.frombuffer(neighbors, dtype=np.int64).astype(dtype))
+    DocIdTable.save(entity2num, save_path)
+
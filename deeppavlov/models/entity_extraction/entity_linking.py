@@ -14,8 +14,9 @@
 
 import re
 import sqlite3
+import threading
 from logging import getLogger
-from typing import List, Dict, Tuple, Any, Union
+from typing import List, Dict, Tuple, Any, Union, Iterable
 from collections import defaultdict
 
 import nltk
@@ -28,7 +29,9 @@ from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.serializable import Serializable
+from deeppavlov.models.entity_extraction.connections_index import ConnectionsIndex, find_connected_entities
 from deeppavlov.models.entity_extraction.find_word import WordSearcher
+from deeppavlov.models.morpho_syntax_parser.spacy_lemmatizer import WordLemmatizer
 
 log = getLogger(__name__)
 nltk.download("stopwords")
@@ -40,6 +43,9 @@ class EntityLinker(Component, Serializable):
     Class for linking of entity substrings in the document to entities in Wikidata
     """
 
+    # max number of SELECT statements joined into a single query to the inverted index
+    MAX_QUERY_TERMS = 400
+
     def __init__(
             self,
             load_path: str,
@@ -61,6 +67,8 @@ class EntityLinker(Component, Serializable):
             use_connections: bool = False,
             kb_filename: str = None,
             prefixes: Dict[str, Any] = None,
+            lemmas_cache_size: int = 100000,
+            connections_index_path: str = None,
             **kwargs,
     ) -> None:
         """
@@ -87,6 +95,10 @@ class EntityLinker(Component, Serializable):
             use_connections: whether to rank entities by connections in the knowledge graph
             kb_filename: filename with the knowledge base in HDT format
             prefixes: entity and title prefixes
+            lemmas_cache_size: max number of cached lemmas of substring words, lemmas are not cached if 0
+            connections_index_path: path to the directory with the index of connections between entities made by
+                :func:`~deeppavlov.models.entity_extraction.connections_index.build_connections_index`, if set,
+                it is used instead of the knowledge base for ranking by connections
             **kwargs:
         """
         super().__init__(save_path=None, load_path=load_path)
@@ -105,6 +117,7 @@ class EntityLinker(Component, Serializable):
         elif self.lang == "@ru":
             self.stopwords = set(stopwords.words("russian"))
             self.nlp = spacy.load("ru_core_news_sm")
+        self.lemmatizer = WordLemmatizer(self.nlp, lemmas_cache_size)
         self.alias_coef = alias_coef
         self.use_descriptions = use_descriptions
         self.use_connections = use_connections
@@ -125,18 +138,101 @@ class EntityLinker(Component, Serializable):
             self.word_searcher = WordSearcher(words_dict_filename, ngrams_matrix_filename, self.lang)
         self.kb_filename = kb_filename
         self.prefixes = prefixes
+        self.connections_index_path = connections_index_path
         self.load()
 
     def load(self) -> None:
-        self.conn = sqlite3.connect(str(self.load_path / self.entities_database_filename))
+        self._local = threading.local()
+        self.conn = sqlite3.connect(str(self.load_path / self.entities_database_filename), check_same_thread=False)
         self.cur = self.conn.cursor()
+        self._local.cursor = self.cur
         self.kb = None
         if self.kb_filename:
             self.kb = HDTDocument(str(expand_path(self.kb_filename)))
+        self.connections_index = None
+        if self.connections_index_path:
+            self.connections_index = ConnectionsIndex(expand_path(self.connections_index_path))
 
     def save(self) -> None:
         pass
 
+    def get_cursor(self) -> sqlite3.Cursor:
+        """Returns a cursor of the entities database connection of the current thread."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            conn = sqlite3.connect(str(self.load_path / self.entities_database_filename), check_same_thread=False)
+            cursor = self._local.cursor = conn.cursor()
+        return cursor
+
+    def fetch_entities(self, terms: Iterable[str]) -> Dict[str, List[Tuple]]:
+        """Finds entities with titles matching the terms in the inverted index.
+
+        Distinct terms are looked up with ``UNION ALL`` queries of up to ``MAX_QUERY_TERMS`` terms. Found entities are
+        kept until the end of the batch processed by :meth:`__call__`, so every term is looked up once per batch.
+
+        Args:
+            terms: full-text search terms
+
+        Returns:
+            a dictionary of terms and rows of the inverted index matching them
+        """
+        found = getattr(self._local, "found_entities", None)
+        if found is None:
+            found = {}
+        missing = list(dict.fromkeys(term for term in terms if term not in found))
+        cursor = self.get_cursor()
+        for i in range(0, len(missing), self.MAX_QUERY_TERMS):
+            terms_chunk = missing[i:i + self.MAX_QUERY_TERMS]
+            for term in terms_chunk:
+                found[term] = []
+            query = " UNION ALL ".join(f"SELECT {n}, * FROM inverted_index WHERE title MATCH ?"
+                                       for n in range(len(terms_chunk)))
+            try:
+                rows = cursor.execute(query, terms_chunk).fetchall()
+            except sqlite3.Error:
+                # some terms are not valid full-text search queries, look them up one by one
+                rows = []
+                for n, term in enumerate(terms_chunk):
+                    try:
+                        rows += [(n, *row) for row in cursor.execute(
+                            "SELECT * FROM inverted_index WHERE title MATCH ?;", (term,)).fetchall()]
+                    except sqlite3.Error as e:
+                        log.info(f"error in inverted index search of {term!r}: {e}")
+            for n, *row in rows:
+                found[terms_chunk[n]].append(tuple(row))
+        return found
+
+    def clean_substr(self, substr: str) -> str:
+        for old_symb, new_symb in [("'s", ""), ("@", ""), ("  ", " "), (".", ""), (",", ""), ("-", " "),
+                                   ("'", " "), ("!", ""), (":", ""), ("&", ""), ("/", " "), ('"', ""),
+                                   ("  ", " ")]:
+            substr = substr.replace(old_symb, new_symb)
+        return substr.strip()
+
+    def get_query_terms(self, substr_batch: List[List[str]]) -> List[str]:
+        """Returns terms which are looked up in the inverted index at the first steps of entity substrings linking."""
+        terms, words_lists = [], []
+        for substr_list in substr_batch:
+            for substr in substr_list:
+                substr = self.clean_substr(substr)
+                if len(substr) <= 1:
+                    continue
+                new_substr = re.sub(r"\b([a-z]{1}) ([a-z]{1})\b", r"\1\2", substr)
+                terms += [substr.lower(), self.sanitize_substr(substr.lower(), "person"), new_substr.lower()]
+                words = [word for word in substr.lower().split(" ") if len(word) > 0]
+                words_lists += [words, [word for word in words if word not in self.stopwords]]
+        if self.lemmatizer.cache is not None:
+            # lemmas are cached for linking, so lemmatized terms are also looked up in advance
+            lemmas = iter(self.lemmatizer([word for words in words_lists for word in words]))
+            words_lemm_lists = [[next(lemmas) for _ in words] for words in words_lists]
+            terms += [" ".join(words_lemm) for words_lemm in words_lemm_lists]
+            words_lists += words_lemm_lists
+        for words_list in words_lists:
+            if len(words_list) > 3:
+                words_list = [" ".join(words_list[i:i + 2]) for i in range(len(words_list) - 1)]
+            terms += [word for word in words_list if len(word) > 1 and word not in self.stopwords]
+        return terms
+
     def __call__(
             self,
             substr_batch: List[List[str]],
@@ -177,6 +273,8 @@ class EntityLinker(Component, Serializable):
                     end_offset = st_offset + len(substr)
                     offsets_list.append([st_offset, end_offset])
                 offsets_batch.append(offsets_list)
+        self._local.found_entities = {}
+        self.fetch_entities(self.get_query_terms(substr_batch))
         ids_batch, conf_batch, pages_batch, labels_batch = [], [], [], []
         for substr_list, offsets_list, tags_list, probas_list, sentences_list, sentences_offsets_list, \
             entities_to_link in zip(substr_batch, offsets_batch, tags_batch, probas_batch, sentences_batch,
@@ -193,6 +291,7 @@ class EntityLinker(Component, Serializable):
             conf_batch.append(conf_list)
             pages_batch.append(pages_list)
             labels_batch.append(labels_list)
+        self._local.found_entities = None
         return ids_batch, conf_batch, pages_batch, labels_batch
 
     def link_entities(
@@ -211,11 +310,7 @@ class EntityLinker(Component, Serializable):
             entities_scores_list = []
             cand_ent_scores_list = []
             for substr, tags, proba in zip(substr_list, tags_list, probas_list):
-                for old_symb, new_symb in [("'s", ""), ("@", ""), ("  ", " "), (".", ""), (",", ""), ("-", " "),
-                                           ("'", " "), ("!", ""), (":", ""), ("&", ""), ("/", " "), ('"', ""),
-                                           ("  ", " ")]:
-                    substr = substr.replace(old_symb, new_symb)
-                substr = substr.strip()
+                substr = self.clean_substr(substr)
                 cand_ent_init = defaultdict(set)
                 if len(substr) > 1:
                     if isinstance(tags, str):
@@ -240,7 +335,7 @@ class EntityLinker(Component, Serializable):
                         substr_split = [word for word in substr.lower().split(" ")
                                         if word not in self.stopwords and len(word) > 0]
 
-                    substr_split_lemm = [self.nlp(tok)[0].lemma_ for tok in substr_split]
+                    substr_split_lemm = self.lemmatizer(substr_split)
                     substr_lemm = " ".join(substr_split_lemm)
                     if substr_split != substr_split_lemm \
                             or (tags[0][0] == "work_of_art"
@@ -312,7 +407,7 @@ class EntityLinker(Component, Serializable):
                 descr_list.append([elem[6] for elem in cand_ent_scores])
 
             scores_dict = {}
-            if self.use_connections and self.kb:
+            if self.use_connections and (self.kb or self.connections_index):
                 scores_dict = self.rank_by_connections(ids_list)
 
             substr_lens = [len(entity_substr.split()) for entity_substr in substr_list]
@@ -385,15 +480,13 @@ class EntityLinker(Component, Serializable):
         entity_substr = entity_substr.lower()
         entity_substr_split = entity_substr.split()
         cand_ent_init = defaultdict(set)
+        tags_substrs = []
         for tag, tag_conf in tags:
             entity_substr = self.sanitize_substr(entity_substr, tag)
-            query = "SELECT * FROM inverted_index WHERE title MATCH ?;"
-            entities_and_ids = []
-            try:
-                res = self.cur.execute(query, (entity_substr,))
-                entities_and_ids = res.fetchall()
-            except:
-                log.info(f"error in query execute {query}")
+            tags_substrs.append((tag, tag_conf, entity_substr))
+        found_entities = self.fetch_entities([tag_substr for _, _, tag_substr in tags_substrs])
+        for tag, tag_conf, tag_substr in tags_substrs:
+            entities_and_ids = found_entities[tag_substr]
             if entities_and_ids:
                 cand_ent_init = self.process_cand_ent(
                     cand_ent_init, entities_and_ids, entity_substr_split, tag, tag_conf, use_tags)
@@ -401,22 +494,20 @@ class EntityLinker(Component, Serializable):
 
     def find_fuzzy_match(self, entity_substr_split, tags, use_tags=True):
         cand_ent_init = defaultdict(set)
+        tags_words = []
         for tag, tag_conf in tags:
             if len(entity_substr_split) > 3:
                 entity_substr_split = [" ".join(entity_substr_split[i:i + 2])
                                        for i in range(len(entity_substr_split) - 1)]
-            for word in entity_substr_split:
-                if len(word) > 1 and word not in self.stopwords:
-                    query = "SELECT * FROM inverted_index WHERE title MATCH ?;"
-                    part_entities_and_ids = []
-                    try:
-                        res = self.cur.execute(query, (word,))
-                        part_entities_and_ids = res.fetchall()
-                    except:
-                        log.info(f"error in query execute {query}")
-                    if part_entities_and_ids:
-                        cand_ent_init = self.process_cand_ent(
-                            cand_ent_init, part_entities_and_ids, entity_substr_split, tag, tag_conf, use_tags)
+            words = [word for word in entity_substr_split if len(word) > 1 and word not in self.stopwords]
+            tags_words.append((tag, tag_conf, entity_substr_split, words))
+        found_entities = self.fetch_entities([word for *_, words in tags_words for word in words])
+        for tag, tag_conf, tag_substr_split, words in tags_words:
+            for word in words:
+                part_entities_and_ids = found_entities[word]
+                if part_entities_and_ids:
+                    cand_ent_init = self.process_cand_ent(
+                        cand_ent_init, part_entities_and_ids, tag_substr_split, tag, tag_conf, use_tags)
         return cand_ent_init
 
     def match_tokens(self, entity_substr_split, label_tokens):
@@ -681,41 +772,24 @@ class EntityLinker(Component, Serializable):
         return top_entities, top_conf
 
     def rank_by_connections(self, ids_list):
-        objects_sets_dict, scores_dict, conn_dict = {}, {}, {}
-        for ids in ids_list:
-            for entity_id in ids:
-                scores_dict[entity_id] = 0
-                conn_dict[entity_id] = set()
-        for ids in ids_list:
+        scores_dict = {entity_id: 0 for ids in ids_list for entity_id in ids}
+        entity_substr_nums = defaultdict(set)
+        for i, ids in enumerate(ids_list):
             for entity_id in ids[:self.num_entities_for_conn_ranking]:
-                objects = set()
-                for prefix in self.prefixes["entity"]:
-                    tr, _ = self.kb.search_triples(f"{prefix}/{entity_id}", "", "")
-                    for subj, rel, obj in tr:
-                        if rel.split("/")[-1] not in {"P31", "P279"}:
-                            if any([obj.startswith(pr) for pr in self.prefixes["entity"]]):
-                                objects.add(obj.split("/")[-1])
-                            if rel.startswith(self.prefixes["rels"]["no_type"]):
-                                tr2, _ = self.kb.search_triples(obj, "", "")
-                                for _, rel2, obj2 in tr2:
-                                    if rel2.startswith(self.prefixes["rels"]["statement"]) \
-                                            or rel2.startswith(self.prefixes["rels"]["qualifier"]):
-                                        if any([obj2.startswith(pr) for pr in self.prefixes["entity"]]):
-                                            objects.add(obj2.split("/")[-1])
-                objects_sets_dict[entity_id] = objects
-                for obj in objects:
-                    if obj not in objects_sets_dict:
-                        objects_sets_dict[obj] = set()
-                    objects_sets_dict[obj].add(entity_id)
-
-        for i in range(len(ids_list)):
-            for j in range(len(ids_list)):
-                if i != j:
-                    for entity_id1 in ids_list[i][:self.num_entities_for_conn_ranking]:
-                        for entity_id2 in ids_list[j][:self.num_entities_for_conn_ranking]:
-                            if entity_id1 in objects_sets_dict[entity_id2]:
-                                conn_dict[entity_id1].add(entity_id2)
-                                conn_dict[entity_id2].add(entity_id1)
+                entity_substr_nums[entity_id].add(i)
+        if self.connections_index is not None:
+            pairs = self.connections_index.find_connected_pairs(list(entity_substr_nums))
+        else:
+            pairs = [(entity_id1, entity_id2) for entity_id2 in entity_substr_nums
+                     for entity_id1 in find_connected_entities(self.kb, entity_id2, self.prefixes)
+                     if entity_id1 in entity_substr_nums]
+
+        conn_dict = defaultdict(set)
+        for entity_id1, entity_id2 in pairs:
+            # only candidate entities of different substrings are counted as connected
+            if len(entity_substr_nums[entity_id1] | entity_substr_nums[entity_id2]) > 1:
+                conn_dict[entity_id1].add(entity_id2)
+                conn_dict[entity_id2].add(entity_id1)
         for entity_id in conn_dict:
             scores_dict[entity_id] = len(conn_dict[entity_id])
         return scores_dict
@@ -13,10 +13,12 @@
 # limitations under the License.
 
 import re
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 from string import punctuation
-from typing import List, Tuple, Union, Any
+from typing import List, Tuple, Union, Any, Optional
 
+import numpy as np
 from nltk import sent_tokenize
 from transformers import AutoTokenizer
 
@@ -35,13 +37,17 @@ class NerChunker(Component):
         maximal sequence length to feed into BERT
     """
 
-    def __init__(self, vocab_file: str, max_seq_len: int = 400, lowercase: bool = False, batch_size: int = 2, **kwargs):
+    def __init__(self, vocab_file: str, max_seq_len: int = 400, lowercase: bool = False, batch_size: int = 2,
+                 use_offsets: bool = False, **kwargs):
         """
         Args:
             vocab_file: vocab file of pretrained transformer model
             max_seq_len: maximal length of chunks into which the document is split
             lowercase: whether to lowercase text
             batch_size: how many chunks are in batch
+            use_offsets: whether to tokenize all documents of the batch with a single call of the fast tokenizer and
+                find lengths of sentences in subwords with offsets of subwords, otherwise every word of the sentence
+                is tokenized separately
         """
         self.max_seq_len = max_seq_len
         self.batch_size = batch_size
@@ -51,6 +57,57 @@ class NerChunker(Component):
         self.punct_ext = punctuation + " " + "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
         self.russian_letters = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
         self.lowercase = lowercase
+        self.use_offsets = use_offsets
+        if self.use_offsets and not self.tokenizer.is_fast:
+            log.warning(f"Tokenizer of {vocab_file} doesn't return offsets, words of sentences are tokenized separately")
+            self.use_offsets = False
+
+    def count_subwords(self, text: str, subword_starts: Optional[np.ndarray] = None, start: int = 0) -> int:
+        """Counts subwords of the text.
+
+        Args:
+            text: text
+            subword_starts: sorted start offsets of subwords of the document piece containing the text, if not given,
+                every word of the text is tokenized separately
+            start: start offset of the text in the document piece
+
+        Returns:
+            number of subwords of the text
+        """
+        if subword_starts is None:
+            return sum([len(self.tokenizer.encode_plus(token, add_special_tokens=False)["input_ids"])
+                        for token in re.findall(self.re_tokenizer, text)])
+        return int(np.searchsorted(subword_starts, start + len(text)) - np.searchsorted(subword_starts, start))
+
+    def split_sentences(self, doc_pieces_batch: List[List[str]]) -> List[List[Tuple[str, Optional[np.ndarray], int]]]:
+        """Splits document pieces into sentences.
+
+        Returns:
+            batch of lists of sentences, start offsets of subwords of their document pieces (``None`` if offsets
+            are not used) and start offsets of sentences in the document pieces
+        """
+        if self.use_offsets:
+            pieces = [doc_piece for doc_pieces in doc_pieces_batch for doc_piece in doc_pieces]
+            offsets = self.tokenizer(pieces, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"] \
+                if pieces else []
+            subword_starts = iter([np.array([start for start, _ in piece_offsets], dtype=int)
+                                   for piece_offsets in offsets])
+        sentences_batch = []
+        for doc_pieces in doc_pieces_batch:
+            sentences = []
+            for doc_piece in doc_pieces:
+                piece_subword_starts = next(subword_starts) if self.use_offsets else None
+                start = 0
+                for sentence in sent_tokenize(doc_piece):
+                    sentence_start = doc_piece.find(sentence, start) if piece_subword_starts is not None else -1
+                    if sentence_start == -1:
+                        # subwords of every word of the sentence are counted separately
+                        sentences.append((sentence, None, 0))
+                    else:
+                        sentences.append((sentence, piece_subword_starts, sentence_start))
+                        start = sentence_start + len(sentence)
+            sentences_batch.append(sentences)
+        return sentences_batch
 
     def __call__(self, docs_batch: List[str]) -> Tuple[List[List[str]], List[List[int]], List[List[Union[
         List[Union[Tuple[int, int], Tuple[Union[int, Any], Union[int, Any]]]], List[
@@ -67,7 +124,15 @@ class NerChunker(Component):
         """
         text_batch_list, nums_batch_list, sentences_offsets_batch_list, sentences_batch_list = [], [], [], []
         text_batch, nums_batch, sentences_offsets_batch, sentences_batch = [], [], [], []
-        for n, doc in enumerate(docs_batch):
+        doc_pieces_batch = []
+        for doc in docs_batch:
+            if self.lowercase:
+                doc = doc.lower()
+            doc_pieces = doc.split("\n")
+            doc_pieces = [self.sanitize(doc_piece) for doc_piece in doc_pieces]
+            doc_pieces_batch.append([doc_piece for doc_piece in doc_pieces if len(doc_piece) > 1])
+        doc_sentences_batch = self.split_sentences(doc_pieces_batch)
+        for n, (doc, doc_pieces, sentences) in enumerate(zip(docs_batch, doc_pieces_batch, doc_sentences_batch)):
             if self.lowercase:
                 doc = doc.lower()
             start = 0
@@ -75,17 +140,9 @@ class NerChunker(Component):
             sentences_list = []
             sentences_offsets_list = []
             cur_len = 0
-            doc_pieces = doc.split("\n")
-            doc_pieces = [self.sanitize(doc_piece) for doc_piece in doc_pieces]
-            doc_pieces = [doc_piece for doc_piece in doc_pieces if len(doc_piece) > 1]
             if doc_pieces:
-                sentences = []
-                for doc_piece in doc_pieces:
-                    sentences += sent_tokenize(doc_piece)
-                for sentence in sentences:
-                    sentence_tokens = re.findall(self.re_tokenizer, sentence)
-                    sentence_len = sum([len(self.tokenizer.encode_plus(token, add_special_tokens=False)["input_ids"])
-                                        for token in sentence_tokens])
+                for sentence, subword_starts, sentence_start in sentences:
+                    sentence_len = self.count_subwords(sentence, subword_starts, sentence_start)
                     if cur_len + sentence_len < self.max_seq_len:
                         text += f"{sentence} "
                         cur_len += sentence_len
@@ -112,11 +169,10 @@ class NerChunker(Component):
                         else:
                             text = ""
                             sentence_chunks = sentence.split(" ")
+                            chunk_start = sentence_start
                             for chunk in sentence_chunks:
-                                chunk_tokens = re.findall(self.re_tokenizer, chunk)
-                                chunk_len = sum([len(self.tokenizer.encode_plus(token,
-                                                                                add_special_tokens=False)["input_ids"])
-                                                 for token in chunk_tokens])
+                                chunk_len = self.count_subwords(chunk, subword_starts, chunk_start)
+                                chunk_start += len(chunk) + 1
                                 if cur_len + chunk_len < self.max_seq_len:
                                     text += f"{chunk} "
                                     cur_len += chunk_len + 1
@@ -189,6 +245,8 @@ class NerChunkModel(Component):
                  ner_parser: EntityDetectionParser,
                  ner2: Chainer = None,
                  ner_parser2: EntityDetectionParser = None,
+                 batch_size: Optional[int] = None,
+                 parallel_ensemble: bool = False,
                  **kwargs) -> None:
         """
         Args:
@@ -197,12 +255,17 @@ class NerChunkModel(Component):
             ner2: config of additional entity detection model (ensemble of ner and ner2 models gives better
                 entity detection quality than single ner model)
             ner_parser2: component deeppavlov.models.entity_extraction.entity_detection_parser
+            batch_size: if set, chunks of all documents are packed into batches of ``batch_size`` chunks,
+                otherwise batches of chunks made by the chunker are used
+            parallel_ensemble: whether to run ner and ner2 models concurrently in separate threads
             **kwargs:
         """
         self.ner = ner
         self.ner_parser = ner_parser
         self.ner2 = ner2
         self.ner_parser2 = ner_parser2
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=1) if self.ner2 and parallel_ensemble else None
 
     def __call__(self, text_batch_list: List[List[str]],
                  nums_batch_list: List[List[int]],
@@ -222,133 +285,120 @@ class NerChunkModel(Component):
             doc_sentences_offsets_batch: indices of start and end symbols of sentences in text
             doc_sentences_batch: list of sentences from texts
         """
-        entity_substr_batch_list, entity_offsets_batch_list, entity_positions_batch_list, tags_batch_list, \
-        entity_probas_batch_list, text_len_batch_list, text_tokens_len_batch_list = [], [], [], [], [], [], []
-        for text_batch, sentences_offsets_batch, sentences_batch in \
-                zip(text_batch_list, sentences_offsets_batch_list, sentences_batch_list):
-            text_batch = [text.replace("\xad", " ") for text in text_batch]
+        text_batch = [text.replace("\xad", " ") for text_batch in text_batch_list for text in text_batch]
+        nums_batch = [num for nums_batch in nums_batch_list for num in nums_batch]
+        sentences_offsets_batch = [sentences_offsets for sentences_offsets_batch in sentences_offsets_batch_list
+                                   for sentences_offsets in sentences_offsets_batch]
+        sentences_batch = [sentences for sentences_batch in sentences_batch_list for sentences in sentences_batch]
+        if self.batch_size:
+            batch_sizes = [self.batch_size] * (-(-len(text_batch) // self.batch_size))
+        else:
+            batch_sizes = [len(text_batch) for text_batch in text_batch_list]
 
-            ner_tokens_batch, ner_tokens_offsets_batch, ner_probas_batch, probas_batch = self.ner(text_batch)
-            entity_substr_batch, entity_positions_batch, entity_probas_batch = \
-                self.ner_parser(ner_tokens_batch, ner_probas_batch, probas_batch)
-            if self.ner2:
-                ner_tokens_batch2, ner_tokens_offsets_batch2, ner_probas_batch2, probas_batch2 = self.ner2(text_batch)
-                entity_substr_batch2, entity_positions_batch2, entity_probas_batch2 = \
-                    self.ner_parser2(ner_tokens_batch2, ner_probas_batch2, probas_batch2)
-                entity_substr_batch, entity_positions_batch, entity_probas_batch = \
-                    self.merge_annotations(entity_substr_batch, entity_positions_batch, entity_probas_batch,
-                                           entity_substr_batch2, entity_positions_batch2, entity_probas_batch2)
-
-            entity_pos_tags_probas_batch = [[(entity_substr.lower(), entity_substr_positions, tag, entity_proba)
-                                             for tag, entity_substr_list in entity_substr_dict.items()
-                                             for entity_substr, entity_substr_positions, entity_proba in
-                                             zip(entity_substr_list, entity_positions_dict[tag],
-                                                 entity_probas_dict[tag])]
-                                            for entity_substr_dict, entity_positions_dict, entity_probas_dict in
-                                            zip(entity_substr_batch, entity_positions_batch, entity_probas_batch)]
-
-            entity_substr_batch, entity_offsets_batch, entity_positions_batch, tags_batch, \
-            probas_batch = [], [], [], [], []
-            for entity_pos_tags_probas, ner_tokens_offsets_list in \
-                    zip(entity_pos_tags_probas_batch, ner_tokens_offsets_batch):
-                if entity_pos_tags_probas:
-                    entity_offsets_list = []
-                    entity_substr_list, entity_positions_list, tags_list, probas_list = zip(*entity_pos_tags_probas)
-                    for entity_positions in entity_positions_list:
-                        start_offset = ner_tokens_offsets_list[entity_positions[0]][0]
-                        end_offset = ner_tokens_offsets_list[entity_positions[-1]][1]
-                        entity_offsets_list.append((start_offset, end_offset))
-                else:
-                    entity_substr_list, entity_offsets_list, entity_positions_list = [], [], []
-                    tags_list, probas_list = [], []
-                entity_substr_batch.append(list(entity_substr_list))
-                entity_offsets_batch.append(list(entity_offsets_list))
-                entity_positions_batch.append(list(entity_positions_list))
-                tags_batch.append(list(tags_list))
-                probas_batch.append(list(probas_list))
-
-            entity_substr_batch_list.append(entity_substr_batch)
-            tags_batch_list.append(tags_batch)
-            entity_offsets_batch_list.append(entity_offsets_batch)
-            entity_positions_batch_list.append(entity_positions_batch)
-            entity_probas_batch_list.append(probas_batch)
-            text_len_batch_list.append([len(text) for text in text_batch])
-            text_tokens_len_batch_list.append([len(ner_tokens) for ner_tokens in ner_tokens_batch])
+        chunks = []
+        start = 0
+        for batch_size in batch_sizes:
+            chunks += self.process_chunks(text_batch[start:start + batch_size])
+            start += batch_size
+        if not chunks:
+            return tuple([[]] for _ in range(7))
 
         doc_entity_substr_batch, doc_tags_batch, doc_entity_offsets_batch, doc_probas_batch = [], [], [], []
         doc_entity_positions_batch, doc_sentences_offsets_batch, doc_sentences_batch = [], [], []
-        doc_entity_substr, doc_tags, doc_probas, doc_entity_offsets, doc_entity_positions = [], [], [], [], []
-        doc_sentences_offsets, doc_sentences = [], []
-        cur_doc_num = 0
-        text_len_sum = 0
-        text_tokens_len_sum = 0
-        for entity_substr_batch, tags_batch, probas_batch, entity_offsets_batch, entity_positions_batch, \
-            sentences_offsets_batch, sentences_batch, text_len_batch, text_tokens_len_batch, nums_batch in \
-                zip(entity_substr_batch_list, tags_batch_list, entity_probas_batch_list, entity_offsets_batch_list,
-                    entity_positions_batch_list, sentences_offsets_batch_list, sentences_batch_list,
-                    text_len_batch_list, text_tokens_len_batch_list, nums_batch_list):
-            for entity_substr_list, tag_list, probas_list, entity_offsets_list, entity_positions_list, \
-                sentences_offsets_list, sentences_list, text_len, text_tokens_len, doc_num in \
-                    zip(entity_substr_batch, tags_batch, probas_batch, entity_offsets_batch, entity_positions_batch,
-                        sentences_offsets_batch, sentences_batch, text_len_batch, text_tokens_len_batch, nums_batch):
-                if doc_num == cur_doc_num:
-                    doc_entity_substr += entity_substr_list
-                    doc_tags += tag_list
-                    doc_probas += probas_list
-                    doc_entity_offsets += [(start_offset + text_len_sum, end_offset + text_len_sum)
-                                           for start_offset, end_offset in entity_offsets_list]
-                    doc_sentences_offsets += [(start_offset + text_len_sum, end_offset + text_len_sum)
-                                              for start_offset, end_offset in sentences_offsets_list]
-                    doc_entity_positions += [[pos + text_tokens_len_sum for pos in positions]
-                                             for positions in entity_positions_list]
-                    doc_sentences += sentences_list
-                    text_len_sum += text_len + 1
-                    text_tokens_len_sum += text_tokens_len
-                else:
-                    doc_entity_substr_batch.append(doc_entity_substr)
-                    doc_tags_batch.append(doc_tags)
-                    doc_probas_batch.append(doc_probas)
-                    doc_entity_offsets_batch.append(doc_entity_offsets)
-                    doc_entity_positions_batch.append(doc_entity_positions)
-                    doc_sentences_offsets_batch.append(doc_sentences_offsets)
-                    doc_sentences_batch.append(doc_sentences)
-                    doc_entity_substr = entity_substr_list
-                    doc_tags = tag_list
-                    doc_probas = probas_list
-                    doc_entity_offsets = entity_offsets_list
-                    doc_sentences_offsets = sentences_offsets_list
-                    doc_sentences = sentences_list
-                    cur_doc_num = doc_num
-                    text_len_sum = text_len + 1
-                    text_tokens_len_sum = text_tokens_len
-
-        doc_entity_substr_batch.append(doc_entity_substr)
-        doc_tags_batch.append(doc_tags)
-        doc_probas_batch.append(doc_probas)
-        doc_entity_offsets_batch.append(doc_entity_offsets)
-        doc_entity_positions_batch.append(doc_entity_positions)
-        doc_sentences_offsets_batch.append(doc_sentences_offsets)
-        doc_sentences_batch.append(doc_sentences)
+        start = 0
+        while start < len(chunks):
+            # chunks of the same document are consecutive
+            end = start + 1
+            while end < len(chunks) and nums_batch[end] == nums_batch[start]:
+                end += 1
+            doc_chunks = chunks[start:end]
+            text_shifts = np.cumsum([0] + [len(text) + 1 for text in text_batch[start:end - 1]])
+            tokens_shifts = np.cumsum([0] + [tokens_len for *_, tokens_len in doc_chunks[:-1]])
+            doc_entity_substr_batch.append([substr for chunk in doc_chunks for substr in chunk[0]])
+            doc_entity_offsets_batch.append(self.shift_offsets([chunk[1] for chunk in doc_chunks], text_shifts))
+            doc_entity_positions_batch.append([[pos + shift for pos in positions]
+                                               for chunk, shift in zip(doc_chunks, tokens_shifts.tolist())
+                                               for positions in chunk[2]])
+            doc_tags_batch.append([tag for chunk in doc_chunks for tag in chunk[3]])
+            doc_probas_batch.append([proba for chunk in doc_chunks for proba in chunk[4]])
+            doc_sentences_offsets_batch.append(self.shift_offsets(sentences_offsets_batch[start:end], text_shifts))
+            doc_sentences_batch.append([sentence for sentences in sentences_batch[start:end] for sentence in sentences])
+            start = end
 
         return doc_entity_substr_batch, doc_entity_offsets_batch, doc_entity_positions_batch, doc_tags_batch, \
                doc_sentences_offsets_batch, doc_sentences_batch, doc_probas_batch
 
+    def destroy(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+        super().destroy()
+
+    @staticmethod
+    def shift_offsets(offsets_list: List[List[Tuple[int, int]]], shifts: np.ndarray) -> List[Tuple[int, int]]:
+        """Shifts start and end offsets of every list by the corresponding shift and joins them."""
+        offsets = np.array([offset for offsets in offsets_list for offset in offsets], dtype=int).reshape(-1, 2)
+        offsets += np.repeat(shifts, [len(offsets) for offsets in offsets_list])[:, None]
+        return [tuple(offset) for offset in offsets.tolist()]
+
+    def process_chunks(self, text_batch: List[str]) -> List[Tuple[List[str], List[Tuple[int, int]], List[List[int]],
+                                                                  List[str], List[float], int]]:
+        """Finds entities in the chunks.
+
+        Returns:
+            entity substrings, entity offsets, entity tokens positions, tags, probabilities and number of tokens
+            of every chunk
+        """
+        if not text_batch:
+            return []
+        ner2_future = self.executor.submit(self.ner2, text_batch) if self.executor is not None else None
+        ner_tokens_batch, ner_tokens_offsets_batch, ner_probas_batch, probas_batch = self.ner(text_batch)
+        entity_substr_batch, entity_positions_batch, entity_probas_batch = \
+            self.ner_parser(ner_tokens_batch, ner_probas_batch, probas_batch)
+        if self.ner2:
+            if ner2_future is not None:
+                ner_tokens_batch2, ner_tokens_offsets_batch2, ner_probas_batch2, probas_batch2 = ner2_future.result()
+            else:
+                ner_tokens_batch2, ner_tokens_offsets_batch2, ner_probas_batch2, probas_batch2 = self.ner2(text_batch)
+            entity_substr_batch2, entity_positions_batch2, entity_probas_batch2 = \
+                self.ner_parser2(ner_tokens_batch2, ner_probas_batch2, probas_batch2)
+            entity_substr_batch, entity_positions_batch, entity_probas_batch = \
+                self.merge_annotations(entity_substr_batch, entity_positions_batch, entity_probas_batch,
+                                       entity_substr_batch2, entity_positions_batch2, entity_probas_batch2)
+
+        chunks = []
+        for entity_substr_dict, entity_positions_dict, entity_probas_dict, ner_tokens, ner_tokens_offsets_list in \
+                zip(entity_substr_batch, entity_positions_batch, entity_probas_batch, ner_tokens_batch,
+                    ner_tokens_offsets_batch):
+            entity_pos_tags_probas = [(entity_substr.lower(), list(entity_substr_positions), tag, entity_proba)
+                                      for tag, entity_substr_list in entity_substr_dict.items()
+                                      for entity_substr, entity_substr_positions, entity_proba in
+                                      zip(entity_substr_list, entity_positions_dict[tag], entity_probas_dict[tag])]
+            entity_substr_list, entity_positions_list, tags_list, probas_list = \
+                map(list, zip(*entity_pos_tags_probas)) if entity_pos_tags_probas else ([], [], [], [])
+            entity_offsets_list = []
+            if entity_positions_list:
+                ner_tokens_offsets = np.array(ner_tokens_offsets_list, dtype=int).reshape(-1, 2)
+                start_offsets = ner_tokens_offsets[[positions[0] for positions in entity_positions_list], 0]
+                end_offsets = ner_tokens_offsets[[positions[-1] for positions in entity_positions_list], 1]
+                entity_offsets_list = list(zip(start_offsets.tolist(), end_offsets.tolist()))
+            chunks.append((entity_substr_list, entity_offsets_list, entity_positions_list, tags_list, probas_list,
+                           len(ner_tokens)))
+        return chunks
+
     def merge_annotations(self, substr_batch, pos_batch, probas_batch, substr_batch2, pos_batch2, probas_batch2):
         log.debug(f"ner_chunker, substr2: {substr_batch2} --- pos2: {pos_batch2} --- probas2: {probas_batch2} --- "
                   f"substr: {substr_batch} --- pos: {pos_batch} --- probas: {probas_batch}")
         for i in range(len(substr_batch)):
+            # bounds of entities of the first model and of the added entities of the second model
+            bounds = [(pos[0], pos[-1]) for pos_list in pos_batch[i].values() for pos in pos_list]
+            n_bounds = len(bounds)
+            bounds += [(0, -1)] * sum(len(pos_list2) for pos_list2 in pos_batch2[i].values())
+            bounds = np.array(bounds, dtype=int).reshape(-1, 2)
             for key2 in substr_batch2[i]:
-                substr_list2 = substr_batch2[i][key2]
-                pos_list2 = pos_batch2[i][key2]
-                probas_list2 = probas_batch2[i][key2]
-                for substr2, pos2, probas2 in zip(substr_list2, pos_list2, probas_list2):
-                    found = False
-                    for key in substr_batch[i]:
-                        pos_list = pos_batch[i][key]
-                        for pos in pos_list:
-                            if pos[0] <= pos2[0] <= pos[-1] or pos[0] <= pos2[-1] <= pos[-1]:
-                                found = True
-                    if not found:
+                for substr2, pos2, probas2 in zip(substr_batch2[i][key2], pos_batch2[i][key2], probas_batch2[i][key2]):
+                    starts, ends = bounds[:n_bounds, 0], bounds[:n_bounds, 1]
+                    overlaps = ((starts <= pos2[0]) & (pos2[0] <= ends)) | ((starts <= pos2[-1]) & (pos2[-1] <= ends))
+                    if not overlaps.any():
                         if key2 not in substr_batch[i]:
                             substr_batch[i][key2] = []
                             pos_batch[i][key2] = []
@@ -356,6 +406,8 @@ class NerChunkModel(Component):
                         substr_batch[i][key2].append(substr2)
                         pos_batch[i][key2].append(pos2)
                         probas_batch[i][key2].append(probas2)
+                        bounds[n_bounds] = pos2[0], pos2[-1]
+                        n_bounds += 1
         for i in range(len(substr_batch)):
             for key2 in substr_batch2[i]:
                 substr_list2 = substr_batch2[i][key2]
@@ -0,0 +1,153 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from collections.abc import Mapping
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.file import load_pickle
+from deeppavlov.core.common.id_table import DocIdTable
+
+log = getLogger(__name__)
+
+DIRECTIONS = ("forw", "backw")
+
+
+def uncompress_triplets(triplets: Union[str, List[List[str]]]) -> List[List[str]]:
+    """Splits triplets of the pickled knowledge base stored as a string to lists ``[rel, obj_1, ..., obj_n]``."""
+    if isinstance(triplets, str):
+        triplets = triplets.split('\t')
+        triplets = [triplet.strip().split("  ") for triplet in triplets]
+    return triplets
+
+
+class ColumnarKB(Mapping):
+    """Read-only knowledge base with integer-encoded entities and relations stored in memory-mapped NumPy arrays.
+
+    Entity ids, relation ids and literals are encoded with a table of terms (:class:`DocIdTable`). Triples of
+    every direction are stored as pairs of relation and object ids sorted by the subject id (SPO for ``forw`` and
+    OSP for ``backw``), with offsets of the subjects.
+
+    The knowledge base maps entity ids to triples in the format of the pickled knowledge base:
+    ``{"forw": [[rel, obj_1, ..., obj_n], ...], "backw": [[rel, subj_1, ..., subj_n], ...]}``.
+
+    Args:
+        load_path: a directory with the knowledge base files made by :func:`convert_pickle_kb`
+
+    """
+
+    def __init__(self, load_path: Union[str, Path]) -> None:
+        load_path = Path(load_path)
+        self.terms = DocIdTable(load_path)
+        self.offsets, self.rels, self.objects = {}, {}, {}
+        for direction in DIRECTIONS:
+            self.offsets[direction] = np.load(load_path / f'{direction}_offsets.npy', mmap_mode='r')
+            self.rels[direction] = np.load(load_path / f'{direction}_rels.npy', mmap_mode='r')
+            self.objects[direction] = np.load(load_path / f'{direction}_objects.npy', mmap_mode='r')
+        self.labels = np.load(load_path / 'labels.npy', mmap_mode='r')
+
+    def find_term(self, term: str) -> Optional[int]:
+        try:
+            return self.terms.find_title(term)
+        except KeyError:
+            return None
+
+    def get_triplets(self, term_id: int, direction: str) -> List[List[str]]:
+        """Returns triplets ``[rel, obj_1, ..., obj_n]`` of the term with ``term_id`` in the given direction."""
+        start, end = self.offsets[direction][term_id:term_id + 2]
+        triplets, prev_rel = [], None
+        for rel, obj in zip(self.rels[direction][start:end].tolist(), self.objects[direction][start:end].tolist()):
+            if rel != prev_rel:
+                triplets.append([self.terms.title(rel)])
+                prev_rel = rel
+            triplets[-1].append(self.terms.title(obj))
+        return triplets
+
+    def get_label(self, entity: str) -> Optional[str]:
+        """Returns the label of the entity or ``None`` if the entity has no label."""
+        term_id = self.find_term(entity)
+        if term_id is None or self.labels[term_id] < 0:
+            return None
+        return self.terms.title(self.labels[term_id])
+
+    def __getitem__(self, entity: str) -> Dict[str, List[List[str]]]:
+        term_id = self.find_term(entity)
+        if term_id is None:
+            raise KeyError(entity)
+        triplets = {direction: self.get_triplets(term_id, direction) for direction in DIRECTIONS
+                    if self.offsets[direction][term_id] < self.offsets[direction][term_id + 1]}
+        if not triplets:
+            raise KeyError(entity)
+        return triplets
+
+    def _has_triplets(self) -> np.ndarray:
+        return (np.diff(self.offsets["forw"]) > 0) | (np.diff(self.offsets["backw"]) > 0)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._has_triplets()))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.terms.title(term_id) for term_id in np.flatnonzero(self._has_triplets()))
+
+
+def convert_pickle_kb(pickle_path: Union[str, Path], save_path: Union[str, Path], label_rel: str = "name_en") -> None:
+    """Convert knowledge base pickled for :class:`~deeppavlov.models.kbqa.wiki_parser.WikiParser` to
+    :class:`ColumnarKB` files.
+
+    Run from the command line as ``python -m deeppavlov.utils.mmap_indexes.mmap_indexes kb <pickle_path> <save_path>
+    [--label-rel <label_rel>]``.
+
+    Args:
+        pickle_path: a path to the pickled knowledge base
+        save_path: a directory to save the knowledge base files to
+        label_rel: a relation of entities with their labels
+
+    """
+    document = load_pickle(expand_path(pickle_path))
+    save_path = expand_path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+
+    term2id = {}
+    for entity, entity_triplets in document.items():
+        term2id.setdefault(entity, len(term2id))
+        for direction in DIRECTIONS:
+            for triplet in uncompress_triplets(entity_triplets.get(direction, [])):
+                for term in triplet:
+                    term2id.setdefault(term, len(term2id))
+    log.info(f"Knowledge base has {len(document)} entities and {len(term2id)} terms")
+
+    dtype = np.int32 if len(term2id) < np.iinfo(np.int32).max else np.int64
+    labels = np.full(len(term2id), -1, dtype=dtype)
+    for direction in DIRECTIONS:
+        counts = np.zeros(len(term2id) + 1, dtype=np.int64)
+        rels, objects = array('q'), array('q')
+        for entity, term_id in term2id.items():
+            entity_triplets = document.get(entity, {})
+            for rel, *triplet_objects in uncompress_triplets(entity_triplets.get(direction, [])):
+                if direction == "forw" and rel == label_rel and triplet_objects and labels[term_id] < 0:
+                    labels[term_id] = term2id[triplet_objects[0]]
+                rels.extend([term2id[rel]] * len(triplet_objects))
+                objects.extend(term2id[obj] for obj in triplet_objects)
+                counts[term_id + 1] += len(triplet_objects)
+        np.save(save_path / f'{direction}_offsets.npy', np.cumsum(counts))
+        np.save(save_path / f'{direction}_rels.npy', np.frombuffer(rels, dtype=np.int64).astype(dtype))
+        np.save(save_path / f'{direction}_objects.npy', np.frombuffer(objects, dtype=np.int64).astype(dtype))
+    np.save(save_path / 'labels.npy', labels)
+    DocIdTable.save(term2id, save_path)
+
@@ -95,16 +95,19 @@ class QueryGenerator(QueryGeneratorBase):
                   f"entities_from_ner: {entities_from_ner_batch} --- types_from_ner: {types_from_ner_batch} --- "
                   f"entity_tags_batch: {entity_tags_batch} --- answer_types_batch: "
                   f"{[list(elem)[:3] for elem in answer_types_batch]}")
+        template_match_batch = self.template_matcher.match_batch(question_san_batch, entities_from_ner_batch)
         for question, question_sanitized, template_type, entities_from_ner, types_from_ner, entity_tags_list, \
-            probas, entities_to_link, answer_types in zip(question_batch, question_san_batch, template_type_batch,
-                                                          entities_from_ner_batch, types_from_ner_batch,
-                                                          entity_tags_batch, probas_batch, entities_to_link_batch,
-                                                          answer_types_batch):
+            probas, entities_to_link, answer_types, template_match in zip(question_batch, question_san_batch,
+                                                                          template_type_batch, entities_from_ner_batch,
+                                                                          types_from_ner_batch, entity_tags_batch,
+                                                                          probas_batch, entities_to_link_batch,
+                                                                          answer_types_batch, template_match_batch):
             if template_type == "-1":
                 template_type = "7"
             candidate_outputs, template_answer = \
                 self.find_candidate_answers(question, question_sanitized, template_type, entities_from_ner,
-                                            types_from_ner, entity_tags_list, probas, entities_to_link, answer_types)
+                                            types_from_ner, entity_tags_list, probas, entities_to_link, answer_types,
+                                            template_match)
             candidate_outputs_batch.append(candidate_outputs)
             template_answers_batch.append(template_answer)
 
@@ -111,7 +111,8 @@ class QueryGeneratorBase(Component, Serializable):
                                entity_tags: List[str],
                                probas: List[float],
                                entities_to_link: List[int],
-                               answer_types: Set[str]) -> Tuple[Union[List[Dict[str, Any]], list], str]:
+                               answer_types: Set[str],
+                               template_match: Optional[Tuple] = None) -> Tuple[Union[List[Dict[str, Any]], list], str]:
         candidate_outputs = []
         self.template_nums = [template_types]
 
@@ -120,9 +121,10 @@ class QueryGeneratorBase(Component, Serializable):
         for old, new in replace_tokens:
             question = question.replace(old, new)
 
+        if template_match is None:
+            template_match = self.template_matcher(question_sanitized, entities_from_ner)
         entities_from_template, types_from_template, rels_from_template, rel_dirs_from_template, query_type_template, \
-        entity_types, template_answer, template_answer_types, template_found = self.template_matcher(
-            question_sanitized, entities_from_ner)
+        entity_types, template_answer, template_answer_types, template_found = template_match
         if query_type_template:
             self.template_nums = [query_type_template]
 
@@ -12,29 +12,59 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import functools
 import json
-import multiprocessing as mp
 import re
+from collections import defaultdict
 from logging import getLogger
-from typing import Any, Tuple, List, Union
+from typing import Any, Dict, Tuple, List, Union
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.serializable import Serializable
 
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
 log = getLogger(__name__)
 
 
-class RegexpMatcher:
-    def __init__(self, question):
-        self.question = question
+def find_required_literals(pattern: str) -> List[str]:
+    """Finds substrings which are present in every string matching the regular expression.
+
+    Args:
+        pattern: regular expression
 
-    def __call__(self, template):
-        res = re.findall(template["template_regexp"], self.question)
-        found_template = []
-        if res:
-            found_template.append((res[0], template))
-        return found_template
+    Returns:
+        required substrings, empty list for case-insensitive expressions
+    """
+    literals, chars = [], []
+
+    def flush():
+        if chars:
+            literals.append(''.join(chars))
+            chars.clear()
+
+    def visit(items):
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                chars.append(chr(av))
+            elif op is sre_parse.AT:
+                continue
+            elif op is sre_parse.SUBPATTERN and not (av[1] & re.IGNORECASE):
+                visit(av[-1])
+            else:
+                flush()
+                if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                    visit(av[2])
+                    flush()
+
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+    visit(parsed)
+    flush()
+    return literals
 
 
 @register('template_matcher')
@@ -45,8 +75,7 @@ class TemplateMatcher(Serializable):
         corresponds to the question
     """
 
-    def __init__(self, load_path: str, templates_filename: str,
-                 num_processors: int = None, **kwargs) -> None:
+    def __init__(self, load_path: str, templates_filename: str, **kwargs) -> None:
         """
 
         Args:
@@ -56,14 +85,38 @@ class TemplateMatcher(Serializable):
         """
         super().__init__(save_path=None, load_path=load_path)
         self.templates_filename = templates_filename
-        self.num_processors = mp.cpu_count() if num_processors == None else num_processors
-        self.pool = mp.Pool(self.num_processors)
         self.load()
 
     def load(self) -> None:
         log.debug(f"(load)self.load_path / self.templates_filename: {self.load_path / self.templates_filename}")
         with open(self.load_path / self.templates_filename) as fl:
             self.templates = json.load(fl)
+        self.template_regexps = [re.compile(template["template_regexp"]) for template in self.templates]
+        # templates are indexed by their longest required substring, so regular expressions of templates which
+        # can not match the question are not run
+        self.literal_templates: Dict[str, List[int]] = defaultdict(list)
+        self.unindexed_templates = []
+        for i, template in enumerate(self.templates):
+            literals = find_required_literals(template["template_regexp"])
+            if literals:
+                self.literal_templates[max(literals, key=len)].append(i)
+            else:
+                self.unindexed_templates.append(i)
+        log.debug(f"{len(self.templates)} templates are indexed by {len(self.literal_templates)} substrings")
+
+    def find_templates(self, question: str) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Returns the first match of every template matching the question and the template in the order of templates.
+        """
+        template_nums = list(self.unindexed_templates)
+        for literal, literal_template_nums in self.literal_templates.items():
+            if literal in question:
+                template_nums += literal_template_nums
+        results = []
+        for i in sorted(template_nums):
+            res = self.template_regexps[i].findall(question)
+            if res:
+                results.append((res[0], self.templates[i]))
+        return results
 
     def save(self) -> None:
         raise NotImplementedError
@@ -80,8 +133,7 @@ class TemplateMatcher(Serializable):
         entity_types = []
         template_answer = ""
         answer_types = []
-        results = self.pool.map(RegexpMatcher(question), self.templates)
-        results = functools.reduce(lambda x, y: x + y, results)
+        results = self.find_templates(question)
         replace_tokens = [("the uk", "united kingdom"), ("the us", "united states")]
         if results:
             min_length = 100
@@ -121,6 +173,16 @@ class TemplateMatcher(Serializable):
         return entities, types, relations, relation_dirs, query_type, entity_types, template_answer, answer_types, \
             template_found
 
+    def match_batch(self, questions: List[str], entities_from_ner_batch: List[List[str]]) -> List[Tuple]:
+        """Matches a batch of questions with templates, see :meth:`__call__`."""
+        results = {}
+        for question, entities_from_ner in zip(questions, entities_from_ner_batch):
+            key = (question, tuple(entities_from_ner))
+            if key not in results:
+                results[key] = self(question, entities_from_ner)
+        return [results[(question, tuple(entities_from_ner))]
+                for question, entities_from_ner in zip(questions, entities_from_ner_batch)]
+
     def sanitize(self, question: str) -> str:
         question = re.sub(r"^(a |the )", '', question)
         date_interval = re.findall("([\d]{4}-[\d]{4})", question)
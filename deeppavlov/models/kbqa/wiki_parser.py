@@ -14,15 +14,17 @@
 
 import datetime
 import re
-from collections import namedtuple
+from collections import namedtuple, defaultdict
 from logging import getLogger
-from typing import List, Tuple, Dict, Any, Union
+from typing import List, Tuple, Dict, Any, Union, Set, Iterable, Callable, Optional
 
 from hdt import HDTDocument
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache, WeightedLRUCache
 from deeppavlov.core.common.file import load_pickle, read_json
 from deeppavlov.core.common.registry import register
+from deeppavlov.models.kbqa.columnar_kb import ColumnarKB, uncompress_triplets
 
 log = getLogger(__name__)
 
@@ -31,18 +33,39 @@ log = getLogger(__name__)
 class WikiParser:
     """This class extract relations, objects or triplets from Wikidata HDT file."""
 
+    # a triple pattern is joined by a single scan if it has at most HASH_JOIN_RATIO triples per join key,
+    # otherwise it is searched for every join key separately
+    HASH_JOIN_RATIO = 10
+
     def __init__(self, wiki_filename: str,
                  file_format: str = "hdt",
                  prefixes: Dict[str, Union[str, Dict[str, str]]] = None,
                  rel_q2name_filename: str = None,
                  max_comb_num: int = 1e6,
-                 lang: str = "@en", **kwargs) -> None:
+                 lang: str = "@en",
+                 plan_queries: bool = True,
+                 cache_size: int = 0,
+                 max_cached_triplets: int = 1000,
+                 max_cached_total_triplets: int = 1000000,
+                 warmup_path: Optional[str] = None,
+                 warmup_top_n: int = 10000, **kwargs) -> None:
         """
 
         Args:
             wiki_filename: file with Wikidata
-            file_format: format of Wikidata file
+            file_format: format of Wikidata file: "hdt", "pickle" or "columnar" (a directory made from the pickle by
+                :func:`~deeppavlov.models.kbqa.columnar_kb.convert_pickle_kb`)
             lang: Russian or English language
+            plan_queries: whether to join triple patterns of the query in the order of their cardinalities
+            cache_size: max number of entries in each of LRU caches of triple patterns, labels, types and relations,
+                caching is disabled if 0
+            max_cached_triplets: max number of triples of a cached triple pattern, patterns with more triples are
+                searched on every call
+            max_cached_total_triplets: max total number of triples in the cache of triple patterns, the least
+                recently used patterns are evicted when it is exceeded
+            warmup_path: file with entity ids sorted by frequency, one id per line, labels of the first
+                ``warmup_top_n`` entities are loaded to the cache on start
+            warmup_top_n: number of entities to load labels for from ``warmup_path``
             **kwargs:
         """
 
@@ -69,6 +92,9 @@ class WikiParser:
         elif self.file_format == "pickle":
             self.document = load_pickle(self.wiki_filename)
             self.parsed_document = {}
+        elif self.file_format == "columnar":
+            self.document = ColumnarKB(self.wiki_filename)
+            self.parsed_document = {}
         else:
             raise ValueError("Unsupported file format")
         self.used_rels = set()
@@ -82,9 +108,61 @@ class WikiParser:
                 raise ValueError(f"Unsupported file format: {rel_q2name_filename}")
 
         self.max_comb_num = max_comb_num
+        self.max_cached_triplets = max_cached_triplets
+        self.plan_queries = plan_queries
         self.lang = lang
         self.replace_tokens = [('"', ''), (self.lang, " "), ('$', ' '), ('  ', ' ')]
 
+        self.caches = {}
+        if cache_size > 0:
+            self.caches = {name: LRUCache(cache_size, name=f'wiki_parser_{name}')
+                           for name in ["labels", "types", "rels"]}
+            # every cached pattern is counted as one more triple, so patterns without triples are bounded too
+            self.caches["triplets"] = WeightedLRUCache(max_cached_total_triplets,
+                                                       weigher=lambda found: len(found[0]) + 1, size=cache_size,
+                                                       name='wiki_parser_triplets')
+            if warmup_path:
+                self.warmup_labels(warmup_path, min(warmup_top_n, cache_size))
+
+    def warmup_labels(self, warmup_path: str, top_n: int) -> None:
+        """Loads labels of the first ``top_n`` entities from the file with entity ids to the cache."""
+        with open(expand_path(warmup_path), encoding="utf8") as fin:
+            for n, line in enumerate(fin):
+                if n >= top_n:
+                    break
+                if line.strip():
+                    self.find_label(line.strip())
+        log.info(f"Labels of {len(self.caches['labels'])} entities are loaded to the cache")
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns number of hits, misses and hit rate of every cache."""
+        return {name: {"hits": cache.hits, "misses": cache.misses, "hit_rate": cache.hit_rate}
+                for name, cache in self.caches.items()}
+
+    def cached(self, cache_name: str, key: Any, compute: Callable[[], Any]) -> Any:
+        """Returns the value for ``key`` from the cache, computes it on a miss or if caching is disabled."""
+        if cache_name not in self.caches:
+            return compute()
+        return self.caches[cache_name].get_or_compute(key, compute)
+
+    def search_triples(self, subj: str, rel: str, obj: str) -> Tuple[Iterable[Tuple[str, str, str]], int]:
+        """Searches triples matching the pattern in HDT document, empty strings match any element.
+
+        Results of patterns with at most ``max_cached_triplets`` triples are cached.
+        """
+        if "triplets" not in self.caches:
+            return self.document.search_triples(subj, rel, obj)
+        key = (subj, rel, obj)
+        found = self.caches["triplets"].get(key)
+        if found is None:
+            triplets, cnt = self.document.search_triples(subj, rel, obj)
+            if cnt > self.max_cached_triplets:
+                return triplets, cnt
+            found = (tuple(triplets), cnt)
+            if len(found[0]) <= self.max_cached_triplets:
+                self.caches["triplets"].set(key, found)
+        return found
+
     def __call__(self, parser_info_list: List[str], queries_list: List[Any]) -> List[Any]:
         wiki_parser_output = self.execute_queries_list(parser_info_list, queries_list)
         return wiki_parser_output
@@ -159,10 +237,10 @@ class WikiParser:
                 if self.file_format == "hdt":
                     triplets = []
                     try:
-                        triplets_forw, c = self.document.search_triples(f"{self.prefixes['entity']}/{query}", "", "")
+                        triplets_forw, c = self.search_triples(f"{self.prefixes['entity']}/{query}", "", "")
                         triplets.extend([triplet for triplet in triplets_forw
                                          if not triplet[2].startswith(self.prefixes["statement"])])
-                        triplets_backw, c = self.document.search_triples("", "", f"{self.prefixes['entity']}/{query}")
+                        triplets_backw, c = self.search_triples("", "", f"{self.prefixes['entity']}/{query}")
                         triplets.extend([triplet for triplet in triplets_backw
                                          if not triplet[0].startswith(self.prefixes["statement"])])
                     except:
@@ -185,11 +263,11 @@ class WikiParser:
                 found_triplets = []
                 try:
                     found_triplets, c = \
-                        self.document.search_triples("", f"{self.prefixes['rels']['direct']}/{query}", "")
+                        self.search_triples("", f"{self.prefixes['rels']['direct']}/{query}", "")
                 except:
                     log.warning("Wrong arguments are passed to wiki_parser")
                 wiki_parser_output.append(list(found_triplets))
-            elif parser_info == "parse_triplets" and self.file_format == "pickle":
+            elif parser_info == "parse_triplets" and self.file_format != "hdt":
                 for entity in query:
                     self.parse_triplets(entity)
                 wiki_parser_output.append("ok")
@@ -218,60 +296,11 @@ class WikiParser:
                 filter_info: []
                 order_info: order_info(variable='?obj', sorting_order='asc')
         """
-        extended_combs = []
         answers, found_rels, found_combs = [], [], []
-
-        for n, (query, rel_type) in enumerate(zip(query_seq, rel_types)):
-            unknown_elem_positions = [(pos, elem) for pos, elem in enumerate(query) if elem.startswith('?')]
-            """
-                n = 0, query = ["?ent", "http://www.wikidata.org/prop/direct/P17",
-                                "http://www.wikidata.org/entity/Q159"]
-                       unknown_elem_positions = ["?ent"]
-                n = 1, query = ["?ent", "http://www.wikidata.org/prop/direct/P31",
-                                "http://www.wikidata.org/entity/Q23397"]
-                       unknown_elem_positions = [(0, "?ent")]
-                n = 2, query = ["?ent", "http://www.wikidata.org/prop/direct/P4511", "?obj"]
-                       unknown_elem_positions = [(0, "?ent"), (2, "?obj")]
-            """
-            if n == 0:
-                combs, triplets = self.search(query, unknown_elem_positions, rel_type)
-                # combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
-            else:
-                if combs:
-                    known_elements = []
-                    extended_combs = []
-                    if query[0].startswith("?"):
-                        for elem in query:
-                            if elem in combs[0].keys():
-                                known_elements.append(elem)
-                        for comb in combs:
-                            """
-                                n = 1
-                                query = ["?ent", "http://www.wikidata.org/prop/direct/P31",
-                                                                            "http://www.wikidata.org/entity/Q23397"]
-                                comb = {"?ent": "http://www.wikidata.org/entity/Q5513"}
-                                known_elements = ["?ent"], known_values = ["http://www.wikidata.org/entity/Q5513"]
-                                filled_query = ["http://www.wikidata.org/entity/Q5513", 
-                                                "http://www.wikidata.org/prop/direct/P31", 
-                                                "http://www.wikidata.org/entity/Q23397"]
-                                new_combs = [["http://www.wikidata.org/entity/Q5513", 
-                                              "http://www.wikidata.org/prop/direct/P31", 
-                                              "http://www.wikidata.org/entity/Q23397"], ...]
-                                extended_combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
-                            """
-                            if comb:
-                                known_values = [comb[known_elem] for known_elem in known_elements]
-                                for known_elem, known_value in zip(known_elements, known_values):
-                                    filled_query = [elem.replace(known_elem, known_value) for elem in query]
-                                    new_combs, triplets = self.search(filled_query, unknown_elem_positions, rel_type)
-                                    for new_comb in new_combs:
-                                        extended_combs.append(self.merge_combs(comb, new_comb))
-                    else:
-                        new_combs, triplets = self.search(query, unknown_elem_positions, rel_type)
-                        for comb in combs:
-                            for new_comb in new_combs:
-                                extended_combs.append(self.merge_combs(comb, new_comb))
-                combs = extended_combs
+        if self.plan_queries and self.is_plain_join(query_seq):
+            combs, triplets = self.join_planned(query_seq, rel_types), []
+        else:
+            combs, triplets = self.join_nested_loop(query_seq, rel_types)
 
         is_boolean = self.define_is_boolean(query_seq)
         if combs or is_boolean:
@@ -338,6 +367,135 @@ class WikiParser:
 
         return answers, found_rels, found_combs
 
+    def join_nested_loop(self, query_seq: List[List[str]], rel_types: List[str]) -> \
+            Tuple[List[Dict[str, str]], List[List[str]]]:
+        """Joins triple patterns in the given order, every next pattern is searched for every found combination."""
+        extended_combs = []
+
+        for n, (query, rel_type) in enumerate(zip(query_seq, rel_types)):
+            unknown_elem_positions = [(pos, elem) for pos, elem in enumerate(query) if elem.startswith('?')]
+            """
+                n = 0, query = ["?ent", "http://www.wikidata.org/prop/direct/P17",
+                                "http://www.wikidata.org/entity/Q159"]
+                       unknown_elem_positions = ["?ent"]
+                n = 1, query = ["?ent", "http://www.wikidata.org/prop/direct/P31",
+                                "http://www.wikidata.org/entity/Q23397"]
+                       unknown_elem_positions = [(0, "?ent")]
+                n = 2, query = ["?ent", "http://www.wikidata.org/prop/direct/P4511", "?obj"]
+                       unknown_elem_positions = [(0, "?ent"), (2, "?obj")]
+            """
+            if n == 0:
+                combs, triplets = self.search(query, unknown_elem_positions, rel_type)
+                # combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
+            else:
+                if combs:
+                    known_elements = []
+                    extended_combs = []
+                    if query[0].startswith("?"):
+                        for elem in query:
+                            if elem in combs[0].keys():
+                                known_elements.append(elem)
+                        for comb in combs:
+                            """
+                                n = 1
+                                query = ["?ent", "http://www.wikidata.org/prop/direct/P31",
+                                                                            "http://www.wikidata.org/entity/Q23397"]
+                                comb = {"?ent": "http://www.wikidata.org/entity/Q5513"}
+                                known_elements = ["?ent"], known_values = ["http://www.wikidata.org/entity/Q5513"]
+                                filled_query = ["http://www.wikidata.org/entity/Q5513", 
+                                                "http://www.wikidata.org/prop/direct/P31", 
+                                                "http://www.wikidata.org/entity/Q23397"]
+                                new_combs = [["http://www.wikidata.org/entity/Q5513", 
+                                              "http://www.wikidata.org/prop/direct/P31", 
+                                              "http://www.wikidata.org/entity/Q23397"], ...]
+                                extended_combs = [{"?ent": "http://www.wikidata.org/entity/Q5513"}, ...]
+                            """
+                            if comb:
+                                known_values = [comb[known_elem] for known_elem in known_elements]
+                                for known_elem, known_value in zip(known_elements, known_values):
+                                    filled_query = [elem.replace(known_elem, known_value) for elem in query]
+                                    new_combs, triplets = self.search(filled_query, unknown_elem_positions, rel_type)
+                                    for new_comb in new_combs:
+                                        extended_combs.append(self.merge_combs(comb, new_comb))
+                    else:
+                        new_combs, triplets = self.search(query, unknown_elem_positions, rel_type)
+                        for comb in combs:
+                            for new_comb in new_combs:
+                                extended_combs.append(self.merge_combs(comb, new_comb))
+                combs = extended_combs
+        return combs, triplets
+
+    def is_plain_join(self, query_seq: List[List[str]]) -> bool:
+        """Checks if every triple pattern after the first one has a variable subject and shares exactly one
+        variable with the previous patterns, so it could be joined in any order."""
+        if self.file_format != "hdt" or len(query_seq) < 2:
+            return False
+        bound = {elem for elem in query_seq[0] if elem.startswith('?')}
+        for query in query_seq[1:]:
+            query_vars = {elem for elem in query if elem.startswith('?')}
+            if not query[0].startswith('?') or len(query_vars & bound) != 1:
+                return False
+            bound |= query_vars
+        return True
+
+    def count_triples(self, query: List[str]) -> int:
+        """Returns HDT estimate of the number of triples matching the pattern."""
+        subj, rel, obj = ["" if elem.startswith('?') else elem for elem in query]
+        return self.document.search_triples(subj, rel, obj)[1]
+
+    @staticmethod
+    def plan_joins(query_vars: List[Set[str]], counts: List[int]) -> List[int]:
+        """Orders triple patterns starting with the most selective one, every next pattern is the most selective
+        pattern among the patterns sharing a variable with the already joined ones."""
+        order = [min(range(len(counts)), key=counts.__getitem__)]
+        bound = set(query_vars[order[0]])
+        while len(order) < len(counts):
+            candidates = [n for n in range(len(counts)) if n not in order and query_vars[n] & bound]
+            order.append(min(candidates, key=counts.__getitem__))
+            bound |= query_vars[order[-1]]
+        return order
+
+    def join_planned(self, query_seq: List[List[str]], rel_types: List[str]) -> List[Dict[str, str]]:
+        """Joins triple patterns in the order made by :meth:`plan_joins` using HDT cardinality estimates.
+
+        A pattern is joined with the found combinations either by a single search with grouping of the found triples
+        by the value of the join variable (hash join) or by a search for every distinct value of the join variable.
+        The first pattern of the query is always searched once, as in :meth:`join_nested_loop`, so combinations could
+        be sorted back in the order of the nested loop join.
+        """
+        query_vars = [{elem for elem in query if elem.startswith('?')} for query in query_seq]
+        counts = [self.count_triples(query) for query in query_seq]
+        rows, bound = None, set()
+        for n in self.plan_joins(query_vars, counts):
+            query, rel_type = query_seq[n], rel_types[n]
+            unknown_elem_positions = [(pos, elem) for pos, elem in enumerate(query) if elem.startswith('?')]
+            if rows is None:
+                combs, _ = self.search(query, unknown_elem_positions, rel_type)
+                rows = [(comb, ((n, i),)) for i, comb in enumerate(combs)]
+            else:
+                join_vars = query_vars[n] & bound
+                # the variable used to fill the pattern by the nested loop join, if it is already bound
+                key_var = min(join_vars.intersection(set().union(*query_vars[:n])) or join_vars)
+                keys = list(dict.fromkeys(comb[key_var] for comb, _ in rows))
+                found = defaultdict(list)
+                if n == 0 or counts[n] < self.max_comb_num and counts[n] <= len(keys) * self.HASH_JOIN_RATIO:
+                    combs, _ = self.search(query, unknown_elem_positions, rel_type)
+                    for i, comb in enumerate(combs):
+                        found[comb[key_var]].append((i, comb))
+                else:
+                    for key in keys:
+                        combs, _ = self.search([key if elem == key_var else elem for elem in query],
+                                               unknown_elem_positions, rel_type)
+                        found[key] = list(enumerate(combs))
+                rows = [({**comb, **new_comb}, ranks + ((n, i),)) for comb, ranks in rows
+                        for i, new_comb in found.get(comb[key_var], [])
+                        if all(comb[var] == new_comb[var] for var in join_vars)]
+            bound |= query_vars[n]
+            if not rows:
+                return []
+        rows.sort(key=lambda row: sorted(row[1]))
+        return [comb for comb, _ in rows]
+
     @staticmethod
     def define_is_boolean(query_hdt_seq):
         return len(query_hdt_seq) == 1 and all([not query_hdt_seq[0][i].startswith("?") for i in [0, 2]])
@@ -358,7 +516,7 @@ class WikiParser:
         subj, rel, obj = query
         if self.file_format == "hdt":
             combs = []
-            triplets, cnt = self.document.search_triples(subj, rel, obj)
+            triplets, cnt = self.search_triples(subj, rel, obj)
             if cnt < self.max_comb_num:
                 triplets = list(triplets)
                 if rel == self.prefixes["description"] or rel == self.prefixes["label"]:
@@ -402,16 +560,9 @@ class WikiParser:
                 # "http://www.wikidata.org/entity/Q5513"
 
             if entity.startswith(self.prefixes["entity"]):
-                labels, c = self.document.search_triples(entity, self.prefixes["label"], "")
-                # labels = [["http://www.wikidata.org/entity/Q5513", "http://www.w3.org/2000/01/rdf-schema#label",
-                #                                                    '"Lake Baikal"@en'], ...]
-                for label in labels:
-                    if label[2].endswith(self.lang):
-                        found_label = label[2].strip(self.lang)
-                        for old_tok, new_tok in self.replace_tokens:
-                            found_label = found_label.replace(old_tok, new_tok)
-                        found_label = found_label.strip()
-                        return found_label
+                found_label = self.cached("labels", entity, lambda: self.find_entity_label(entity))
+                if found_label is not None:
+                    return found_label
 
             elif entity.endswith(self.lang):
                 # entity: '"Lake Baikal"@en'
@@ -441,20 +592,41 @@ class WikiParser:
                 entity = entity.replace('.', ',')
                 return entity
 
-        if self.file_format == "pickle":
+        if self.file_format != "hdt":
             if entity:
                 if entity.startswith("Q") or entity.startswith("P"):
-                    triplets = self.document.get(entity, {}).get("forw", [])
-                    triplets = self.uncompress(triplets)
-                    for triplet in triplets:
-                        if triplet[0] == "name_en":
-                            return triplet[1]
+                    found_label = self.cached("labels", entity, lambda: self.find_entity_label(entity))
+                    if found_label is not None:
+                        return found_label
                 else:
                     entity = self.format_date(entity, question)
                     return entity
 
         return "Not Found"
 
+    def find_entity_label(self, entity: str) -> Optional[str]:
+        """Returns label of the entity in :attr:`lang` language or ``None`` if the label is not found."""
+        if self.file_format == "hdt":
+            labels, c = self.search_triples(entity, self.prefixes["label"], "")
+            # labels = [["http://www.wikidata.org/entity/Q5513", "http://www.w3.org/2000/01/rdf-schema#label",
+            #                                                    '"Lake Baikal"@en'], ...]
+            for label in labels:
+                if label[2].endswith(self.lang):
+                    found_label = label[2].strip(self.lang)
+                    for old_tok, new_tok in self.replace_tokens:
+                        found_label = found_label.replace(old_tok, new_tok)
+                    found_label = found_label.strip()
+                    return found_label
+        elif self.file_format == "columnar":
+            return self.document.get_label(entity)
+        else:
+            triplets = self.document.get(entity, {}).get("forw", [])
+            triplets = self.uncompress(triplets)
+            for triplet in triplets:
+                if triplet[0] == "name_en":
+                    return triplet[1]
+        return None
+
     def format_date(self, entity, question):
         dates_dict = {"January": "января", "February": "февраля", "March": "марта", "April": "апреля", "May": "мая",
                       "June": "июня", "July": "июля", "August": "августа", "September": "сентября",
@@ -484,11 +656,15 @@ class WikiParser:
     def find_alias(self, entity: str) -> List[str]:
         aliases = []
         if entity.startswith(self.prefixes["entity"]):
-            labels, cardinality = self.document.search_triples(entity, self.prefixes["alias"], "")
+            labels, cardinality = self.search_triples(entity, self.prefixes["alias"], "")
             aliases = [label[2].strip(self.lang).strip('"') for label in labels if label[2].endswith(self.lang)]
         return aliases
 
     def find_rels(self, entity: str, direction: str, rel_type: str = "no_type") -> List[str]:
+        return list(self.cached("rels", (entity, direction, rel_type),
+                                lambda: self._find_rels(entity, direction, rel_type)))
+
+    def _find_rels(self, entity: str, direction: str, rel_type: str = "no_type") -> List[str]:
         rels = []
         if self.file_format == "hdt":
             if not rel_type:
@@ -497,7 +673,7 @@ class WikiParser:
                 query = [f"{self.prefixes['entity']}/{entity}", "", ""]
             else:
                 query = ["", "", f"{self.prefixes['entity']}/{entity}"]
-            triplets, c = self.document.search_triples(*query)
+            triplets, c = self.search_triples(*query)
             triplets = list(triplets)
             if isinstance(self.prefixes['rels'][rel_type], str):
                 start_str = f"{self.prefixes['rels'][rel_type]}/P"
@@ -514,19 +690,19 @@ class WikiParser:
         rels = []
         for entity_id in entity_ids:
             for rel_1hop in rels_1hop:
-                triplets, cnt = self.document.search_triples(f"{self.prefixes['entity']}/{entity_id}", rel_1hop, "")
+                triplets, cnt = self.search_triples(f"{self.prefixes['entity']}/{entity_id}", rel_1hop, "")
                 triplets = [triplet for triplet in triplets if triplet[2].startswith(self.prefixes['entity'])]
                 objects_1hop = [triplet[2].split("/")[-1] for triplet in triplets]
-                triplets, cnt = self.document.search_triples("", rel_1hop, f"{self.prefixes['entity']}/{entity_id}")
+                triplets, cnt = self.search_triples("", rel_1hop, f"{self.prefixes['entity']}/{entity_id}")
                 triplets = [triplet for triplet in triplets if triplet[0].startswith(self.prefixes['entity'])]
                 objects_1hop += [triplet[0].split("/")[-1] for triplet in triplets]
                 for object_1hop in objects_1hop[:5]:
-                    tr_2hop, cnt = self.document.search_triples(f"{self.prefixes['entity']}/{object_1hop}", "", "")
+                    tr_2hop, cnt = self.search_triples(f"{self.prefixes['entity']}/{object_1hop}", "", "")
                     rels_2hop = [elem[1] for elem in tr_2hop if elem[1] != rel_1hop]
                     if self.used_rels:
                         rels_2hop = [elem for elem in rels_2hop if elem.split("/")[-1] in self.used_rels]
                     rels += rels_2hop
-                    tr_2hop, cnt = self.document.search_triples("", "", f"{self.prefixes['entity']}/{object_1hop}")
+                    tr_2hop, cnt = self.search_triples("", "", f"{self.prefixes['entity']}/{object_1hop}")
                     rels_2hop = [elem[1] for elem in tr_2hop if elem[1] != rel_1hop]
                     if self.used_rels:
                         rels_2hop = [elem for elem in rels_2hop if elem.split("/")[-1] in self.used_rels]
@@ -542,11 +718,11 @@ class WikiParser:
             entity = f"{self.prefixes['entity']}/{entity.split('/')[-1]}"
             rel = f"{self.prefixes['rels']['direct']}/{rel}"
             if direction == "forw":
-                triplets, cnt = self.document.search_triples(entity, rel, "")
+                triplets, cnt = self.search_triples(entity, rel, "")
                 if cnt < self.max_comb_num:
                     objects.extend([triplet[2].split('/')[-1] for triplet in triplets])
             else:
-                triplets, cnt = self.document.search_triples("", rel, entity)
+                triplets, cnt = self.search_triples("", rel, entity)
                 objects.extend([triplet[0].split('/')[-1] for triplet in triplets])
         else:
             entity = entity.split('/')[-1]
@@ -563,7 +739,7 @@ class WikiParser:
             subj = f"{self.prefixes['entity']}/{subj}"
             rel = f"{self.prefixes['rels']['direct']}/{rel}"
             obj = f"{self.prefixes['entity']}/{obj}"
-            triplets, cnt = self.document.search_triples(subj, rel, obj)
+            triplets, cnt = self.search_triples(subj, rel, obj)
             if cnt > 0:
                 return True
             else:
@@ -582,17 +758,20 @@ class WikiParser:
             return False
 
     def find_types(self, entity: str):
+        return set(self.cached("types", entity, lambda: self._find_types(entity)))
+
+    def _find_types(self, entity: str):
         types = []
         if self.file_format == "hdt":
             if not entity.startswith("http"):
                 entity = f"{self.prefixes['entity']}/{entity}"
-            tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/P31", "")
+            tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/P31", "")
             types = [triplet[2].split('/')[-1] for triplet in tr]
             for rel in ["P106", "P21"]:
-                tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/{rel}", "")
+                tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/{rel}", "")
                 types += [triplet[2].split('/')[-1] for triplet in tr]
 
-        if self.file_format == "pickle":
+        if self.file_format != "hdt":
             entity = entity.split('/')[-1]
             triplets = self.document.get(entity, {}).get("forw", [])
             triplets = self.uncompress(triplets)
@@ -607,9 +786,9 @@ class WikiParser:
         if self.file_format == "hdt":
             if not entity.startswith("http"):
                 entity = f"{self.prefixes['entity']}/{entity}"
-            tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/P279", "")
+            tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/P279", "")
             types = [triplet[2].split('/')[-1] for triplet in tr]
-        if self.file_format == "pickle":
+        if self.file_format != "hdt":
             entity = entity.split('/')[-1]
             triplets = self.document.get(entity, {}).get("forw", [])
             triplets = self.uncompress(triplets)
@@ -620,10 +799,7 @@ class WikiParser:
         return types
 
     def uncompress(self, triplets: Union[str, List[List[str]]]) -> List[List[str]]:
-        if isinstance(triplets, str):
-            triplets = triplets.split('\t')
-            triplets = [triplet.strip().split("  ") for triplet in triplets]
-        return triplets
+        return uncompress_triplets(triplets)
 
     def parse_triplets(self, entity):
         triplets = self.document.get(entity, {})
@@ -12,18 +12,67 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List
+from typing import Dict, List
 
 import spacy
+from spacy.language import Language
 
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 
 
+class WordLemmatizer:
+    """Lemmatizes separate words with spaCy pipeline. Lemmas are cached by word surface form, words missing in the
+    cache are processed with a single :meth:`spacy.language.Language.pipe` call.
+
+    Args:
+        nlp: spaCy pipeline
+        cache_size: max number of cached lemmas, lemmas are not cached if 0
+        batch_size: batch size of spaCy pipeline
+
+    """
+
+    # components of spaCy pipelines which don't affect lemmas
+    unused_pipes = {"parser", "ner", "senter", "entity_linker", "textcat", "textcat_multilabel"}
+
+    def __init__(self, nlp: Language, cache_size: int = 100000, batch_size: int = 256) -> None:
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.cache = LRUCache(cache_size, name="spacy_lemmas") if cache_size > 0 else None
+        self.disabled_pipes = [name for name in nlp.pipe_names if name in self.unused_pipes]
+
+    def __call__(self, words: List[str]) -> List[str]:
+        lemmas: Dict[str, str] = {}
+        if self.cache is not None:
+            for word in words:
+                lemma = self.cache.get(word)
+                if lemma is not None:
+                    lemmas[word] = lemma
+        missing = list(dict.fromkeys(word for word in words if word not in lemmas))
+        if missing:
+            docs = self.nlp.pipe(missing, batch_size=self.batch_size, disable=self.disabled_pipes)
+            for word, doc in zip(missing, docs):
+                lemmas[word] = doc[0].lemma_
+                if self.cache is not None:
+                    self.cache.set(word, lemmas[word])
+        return [lemmas[word] for word in words]
+
+
 @register('spacy_lemmatizer')
 class SpacyLemmatizer(Component):
-    def __init__(self, model: str, **kwargs):
+    """Lemmatizes words with spaCy pipeline.
+
+    Args:
+        model: spaCy model name
+        cache_size: max number of cached lemmas, lemmas are not cached if 0
+
+    """
+
+    def __init__(self, model: str, cache_size: int = 100000, **kwargs):
         self.nlp = spacy.load(model)
+        self.lemmatizer = WordLemmatizer(self.nlp, cache_size)
 
     def __call__(self, words_batch: List[List[str]]):
-        return [[self.nlp(word)[0].lemma_ for word in words_list] for words_list in words_batch]
+        lemmas = iter(self.lemmatizer([word for words_list in words_batch for word in words_list]))
+        return [[next(lemmas) for _ in words_list] for words_list in words_batch]
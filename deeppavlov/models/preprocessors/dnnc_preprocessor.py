@@ -13,10 +13,12 @@
 # limitations under the License.
 
 from logging import getLogger
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
 
+from deeppavlov.core.common.cache import LRUCache
+from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 
@@ -27,29 +29,87 @@ log = getLogger(__name__)
 class PairGenerator(Component):
     """
     Generates all possible ordered pairs from 'texts_batch' and 'support_dataset'
-    
+
+    If ``embedder`` and ``top_k`` are set, a text is paired only with ``top_k`` support examples with the most similar
+    embeddings, so the cross-encoder scores ``top_k`` pairs per text instead of pairs with the whole support dataset.
+
     Args:
         bidirectional: adds pairs in reverse order
+        top_k: number of the most similar support examples to pair every text with, all support examples are used if
+            not set
+        embedder: bi-encoder which returns embeddings of a list of texts, e.g. a nested config of a sentence embedder
+        cache_size: max number of cached embeddings of support examples
     """
 
-    def __init__(self, bidirectional: bool = False, **kwargs) -> None:
+    def __init__(self, bidirectional: bool = False, top_k: Optional[int] = None,
+                 embedder: Optional[Callable[[List[str]], List[np.ndarray]]] = None, cache_size: int = 10000,
+                 **kwargs) -> None:
         self.bidirectional = bidirectional
+        self.top_k = top_k
+        self.embedder = embedder
+        self.support_embeddings = LRUCache(cache_size, name='dnnc_support_embeddings')
+        if self.top_k is not None and self.embedder is None:
+            raise ConfigError('embedder is required to select top_k support examples')
+
+    def embed_support(self, support_texts: List[str]) -> np.ndarray:
+        """Returns L2-normalized embeddings of support examples computing only the ones missing in the cache"""
+        embeddings = [self.support_embeddings.get(text) for text in support_texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(support_texts, embeddings) if embedding is None))
+        if missing:
+            computed = dict(zip(missing, self.embed(missing)))
+            for text, embedding in computed.items():
+                self.support_embeddings.set(text, embedding)
+            embeddings = [computed[text] if embedding is None else embedding
+                          for text, embedding in zip(support_texts, embeddings)]
+        return np.stack(embeddings)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.array(self.embedder(texts), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms != 0)
+
+    def select_support(self, texts: List[str], support_texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns indices of texts and support examples of pairs"""
+        if self.top_k is None or self.top_k >= len(support_texts):
+            support_ids, text_ids = np.divmod(np.arange(len(texts) * len(support_texts)), len(texts))
+            return text_ids, support_ids
+        similarities = self.embed(texts) @ self.embed_support(support_texts).T
+        support_ids = np.argpartition(-similarities, self.top_k - 1, axis=1)[:, :self.top_k]
+        return np.repeat(np.arange(len(texts)), self.top_k), support_ids.ravel()
 
     def __call__(self,
                  texts: List[str],
                  dataset: List[List[str]],
-                ) -> Tuple[List[str], List[str], List[str], List[str]]:
+                ) -> Tuple[List[str], List[str], List[str], List[str], List[int]]:
+        """
+        Args:
+            texts: texts to classify
+            dataset: support examples as pairs of text and label
+
+        Returns:
+            texts, hypotheses, premises, labels of hypotheses and indices of texts in ``texts`` of every pair,
+            ``-1`` for pairs of a text with the same support example as such pairs are not used for classification
+        """
+        support_texts = [hypotesis for hypotesis, _ in dataset]
+        text_ids, support_ids = self.select_support(texts, support_texts)
+
         hypotesis_batch = []
         premise_batch = []
         hypotesis_labels_batch = []
-        for [premise, [hypotesis, hypotesis_labels]] in zip(texts * len(dataset),
-                                                            np.repeat(dataset, len(texts), axis=0)):
+        pair_text_ids = []
+        for text_id, support_id in zip(text_ids.tolist(), support_ids.tolist()):
+            premise = texts[text_id]
+            hypotesis, hypotesis_labels = dataset[support_id]
+            if hypotesis == premise:
+                text_id = -1
             premise_batch.append(premise)
             hypotesis_batch.append(hypotesis)
             hypotesis_labels_batch.append(hypotesis_labels)
+            pair_text_ids.append(text_id)
 
             if self.bidirectional:
                 premise_batch.append(hypotesis)
                 hypotesis_batch.append(premise)
                 hypotesis_labels_batch.append(hypotesis_labels)
-        return texts, hypotesis_batch, premise_batch, hypotesis_labels_batch
+                pair_text_ids.append(text_id)
+        return texts, hypotesis_batch, premise_batch, hypotesis_labels_batch, pair_text_ids
@@ -44,6 +44,7 @@ class TorchTransformersMultiplechoicePreprocessor(Component):
         vocab_file: path to vocabulary
         do_lower_case: set True if lowercasing is needed
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
+        pad_to_multiple_of: if set, the batch is padded to the longest sequence rounded up to a multiple of this value
 
     Attributes:
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
@@ -55,8 +56,10 @@ class TorchTransformersMultiplechoicePreprocessor(Component):
                  vocab_file: str,
                  do_lower_case: bool = True,
                  max_seq_length: int = 512,
+                 pad_to_multiple_of: Optional[int] = None,
                  **kwargs) -> None:
         self.max_seq_length = max_seq_length
+        self.pad_to_multiple_of = pad_to_multiple_of
         if Path(vocab_file).is_file():
             vocab_file = str(expand_path(vocab_file))
             self.tokenizer = AutoTokenizer(vocab_file=vocab_file, do_lower_case=do_lower_case, **kwargs)
@@ -86,6 +89,7 @@ class TorchTransformersMultiplechoicePreprocessor(Component):
             examples,
             padding=True,
             max_length=self.max_seq_length,
+            pad_to_multiple_of=self.pad_to_multiple_of,
             return_tensors='pt',
         )
 
@@ -121,6 +125,8 @@ class TorchTransformersPreprocessor(Component):
             a path to a `directory` containing vocabulary files required by the tokenizer.
         do_lower_case: set True if lowercasing is needed
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
+        dynamic_padding: if True, the batch is padded to its longest sequence instead of ``max_seq_length``
+        pad_to_multiple_of: if set with ``dynamic_padding``, the padded length is rounded up to a multiple of this value
 
     Attributes:
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
@@ -132,10 +138,18 @@ class TorchTransformersPreprocessor(Component):
                  vocab_file: str,
                  do_lower_case: bool = True,
                  max_seq_length: int = 512,
+                 dynamic_padding: bool = False,
+                 pad_to_multiple_of: Optional[int] = None,
                  **kwargs) -> None:
         self.max_seq_length = max_seq_length
+        self.dynamic_padding = dynamic_padding
+        self.pad_to_multiple_of = pad_to_multiple_of if dynamic_padding else None
         self.tokenizer = AutoTokenizer.from_pretrained(vocab_file, do_lower_case=do_lower_case, **kwargs)
 
+    @property
+    def padding(self) -> str:
+        return 'longest' if self.dynamic_padding else 'max_length'
+
     def __call__(self, texts_a: List, texts_b: Optional[List[str]] = None) -> Union[List[InputFeatures],
                                                                                     Tuple[List[InputFeatures],
                                                                                     List[List[str]]]]:
@@ -163,7 +177,8 @@ class TorchTransformersPreprocessor(Component):
                                         text_pair=texts_b,
                                         add_special_tokens=True,
                                         max_length=self.max_seq_length,
-                                        padding='max_length',
+                                        padding=self.padding,
+                                        pad_to_multiple_of=self.pad_to_multiple_of,
                                         return_attention_mask=True,
                                         truncation=True,
                                         return_tensors='pt')
@@ -689,6 +704,9 @@ class TorchBertRankerPreprocessor(TorchTransformersPreprocessor):
         input_features = []
 
         for s in cont_resp_pairs:
+            if self.dynamic_padding:
+                input_features.append(self._encode_pairs_batch(*zip(*s)))
+                continue
             sub_list_features = []
             for context, response in s:
                 encoded_dict = self.tokenizer.encode_plus(
@@ -704,6 +722,21 @@ class TorchBertRankerPreprocessor(TorchTransformersPreprocessor):
 
         return input_features
 
+    def _encode_pairs_batch(self, contexts: Tuple[str, ...],
+                            responses: Tuple[Optional[str], ...]) -> List[InputFeatures]:
+        """Encodes context-response pairs padding them to the longest pair of the batch."""
+        if all(response is None for response in responses):
+            responses = None
+        encoded = self.tokenizer(text=list(contexts), text_pair=responses and list(responses),
+                                 add_special_tokens=True, max_length=self.max_seq_length, padding=self.padding,
+                                 pad_to_multiple_of=self.pad_to_multiple_of, truncation=True,
+                                 return_attention_mask=True, return_token_type_ids=True, return_tensors='pt')
+        return [InputFeatures(input_ids=encoded['input_ids'][i:i + 1],
+                              attention_mask=encoded['attention_mask'][i:i + 1],
+                              token_type_ids=encoded['token_type_ids'][i:i + 1],
+                              label=None)
+                for i in range(len(contexts))]
+
 
 @dataclass
 class RecordFlatExample:
@@ -25,6 +25,7 @@ from tqdm import tqdm
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Estimator
+from deeppavlov.models.spelling_correction.candidates_searcher import CandidatesSearcher
 from deeppavlov.vocabs.typos import StaticDictionary
 
 logger = getLogger(__name__)
@@ -39,6 +40,8 @@ class ErrorModel(Estimator):
         dictionary: a :class:`~deeppavlov.vocabs.typos.StaticDictionary` object
         window: maximum context window size
         candidates_count: maximum number of replacement candidates to return for every token in the input
+        cache_size: max number of words with cached candidates, candidates are not cached if 0
+        num_workers: a number of processes to search candidates of distinct words of a batch with
 
     Attributes:
         costs: logarithmic probabilities of character sequences replacements
@@ -47,8 +50,12 @@ class ErrorModel(Estimator):
         candidates_count: maximum number of replacement candidates to return for every token in the input
     """
 
-    def __init__(self, dictionary: StaticDictionary, window: int = 1, candidates_count: int = 1, *args, **kwargs):
+    def __init__(self, dictionary: StaticDictionary, window: int = 1, candidates_count: int = 1,
+                 cache_size: int = 100000, num_workers: int = 1, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.cache_size = cache_size
+        self.num_workers = num_workers
+        self.candidates_searcher = None
         self.costs = defaultdict(itertools.repeat(float('-inf')).__next__)
         self.dictionary = dictionary
         self.window = window
@@ -66,6 +73,20 @@ class ErrorModel(Estimator):
         self.load()
 
         self.candidates_count = candidates_count
+        if self.candidates_searcher is None:
+            self._reset_candidates_searcher()
+
+    def _reset_candidates_searcher(self) -> None:
+        """Creates a new candidates searcher, candidates found with previous costs are dropped."""
+        if self.candidates_searcher is not None:
+            self.candidates_searcher.destroy()
+        self.candidates_searcher = CandidatesSearcher(self._find_word_candidates, self.cache_size, self.num_workers,
+                                                      name='spelling_error_model_candidates')
+
+    def destroy(self) -> None:
+        if self.candidates_searcher is not None:
+            self.candidates_searcher.destroy()
+        super().destroy()
 
     def _find_candidates_window_0(self, word, prop_threshold=1e-6):
         threshold = log(prop_threshold)
@@ -131,18 +152,17 @@ class ErrorModel(Estimator):
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
+    def _find_word_candidates(self, incorrect: str) -> List[Tuple[float, str]]:
+        if any([c not in self.dictionary.alphabet for c in incorrect]):
+            return [(0, incorrect)]
+        res = self.find_candidates(incorrect, prop_threshold=1e-6)
+        if res:
+            return [(score, candidate) for candidate, score in res]
+        return [(0, incorrect)]
+
     def _infer_instance(self, instance: List[str]) -> List[List[Tuple[float, str]]]:
-        candidates = []
-        for incorrect in instance:
-            if any([c not in self.dictionary.alphabet for c in incorrect]):
-                candidates.append([(0, incorrect)])
-            else:
-                res = self.find_candidates(incorrect, prop_threshold=1e-6)
-                if res:
-                    candidates.append([(score, candidate) for candidate, score in res])
-                else:
-                    candidates.append([(0, incorrect)])
-        return candidates
+        candidates = self.candidates_searcher(instance)
+        return [list(candidates[incorrect]) for incorrect in instance]
 
     def __call__(self, data: Iterable[Iterable[str]], *args, **kwargs) -> List[List[List[Tuple[float, str]]]]:
         """Propose candidates for tokens in sentences
@@ -153,10 +173,9 @@ class ErrorModel(Estimator):
         Returns:
             batch of lists of probabilities and candidates for every token
         """
-        data = list(data)
-        if len(data) > 1:
-            data = tqdm(data, desc='Infering a batch with the error model', leave=False)
-        return [self._infer_instance(instance) for instance in data]
+        data = [list(instance) for instance in data]
+        candidates = self.candidates_searcher([incorrect for instance in data for incorrect in instance])
+        return [[list(candidates[incorrect]) for incorrect in instance] for instance in data]
 
     @staticmethod
     def _distance_edits(seq1, seq2):
@@ -215,6 +234,7 @@ class ErrorModel(Estimator):
             e = e_count[w] + incorrect_prior + correct_prior
             p = c / e
             self.costs[(w, s)] = log(p)
+        self._reset_candidates_searcher()
 
     def save(self):
         """Save replacements probabilities to a file
@@ -238,6 +258,7 @@ class ErrorModel(Estimator):
                     reader = csv.reader(tsv_file, delimiter='\t')
                     for w, s, p in reader:
                         self.costs[(w, s)] = log(float(p))
+                self._reset_candidates_searcher()
             elif not self.load_path.parent.is_dir():
                 raise ConfigError("Provided `load_path` for {} doesn't exist!".format(
                     self.__class__.__name__))
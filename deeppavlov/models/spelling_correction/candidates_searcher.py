@@ -0,0 +1,84 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing as mp
+from logging import getLogger
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from deeppavlov.core.common.cache import LRUCache
+
+logger = getLogger(__name__)
+
+Candidates = List[Tuple[float, str]]
+
+_worker_find_candidates = None
+
+
+def _init_search_worker(find_candidates: Callable[[str], Candidates]) -> None:
+    global _worker_find_candidates
+    _worker_find_candidates = find_candidates
+
+
+def _search_worker(word: str) -> Candidates:
+    return _worker_find_candidates(word)
+
+
+class CandidatesSearcher:
+    """Finds replacement candidates of distinct words with an LRU cache of candidates shared between calls and an
+    optional pool of processes.
+
+    Args:
+        find_candidates: a function that returns a list of scores and candidates for a word
+        cache_size: max number of words with cached candidates, candidates are not cached if 0
+        num_workers: a number of processes to search candidates of not cached words with, the search is run in the
+            current process if ``num_workers`` is less than 2
+        name: a name of the cache
+
+    """
+
+    def __init__(self, find_candidates: Callable[[str], Candidates], cache_size: int = 100000,
+                 num_workers: int = 1, name: Optional[str] = None) -> None:
+        self.find_candidates = find_candidates
+        self.cache = LRUCache(cache_size, name=name) if cache_size > 0 else None
+        self.num_workers = num_workers
+        self._pool = None
+
+    def __call__(self, words: Iterable[str]) -> Dict[str, Candidates]:
+        """Returns a dictionary of distinct words and their candidates."""
+        candidates, missing = {}, []
+        for word in dict.fromkeys(words):
+            word_candidates = self.cache.get(word) if self.cache is not None else None
+            if word_candidates is None:
+                missing.append(word)
+            else:
+                candidates[word] = word_candidates
+        if self.num_workers > 1 and len(missing) > 1:
+            if self._pool is None:
+                # workers are forked to inherit the search function instead of pickling it
+                self._pool = mp.get_context('fork').Pool(self.num_workers, initializer=_init_search_worker,
+                                                         initargs=(self.find_candidates,))
+            chunksize = max(1, len(missing) // (self.num_workers * 4))
+            found = self._pool.map(_search_worker, missing, chunksize=chunksize)
+        else:
+            found = [self.find_candidates(word) for word in missing]
+        for word, word_candidates in zip(missing, found):
+            candidates[word] = word_candidates
+            if self.cache is not None:
+                self.cache.set(word, word_candidates)
+        return candidates
+
+    def destroy(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
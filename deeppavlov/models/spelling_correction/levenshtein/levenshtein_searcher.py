@@ -14,11 +14,14 @@
 
 import copy
 import itertools
+import json
+from collections import defaultdict
+from pathlib import Path
 
 import numpy as np
 from sortedcontainers import SortedListWithKey
 
-from .tabled_trie import Trie, make_trie
+from .tabled_trie import Trie, load_numpied_trie, make_trie
 
 
 class LevenshteinSearcher:
@@ -29,7 +32,7 @@ class LevenshteinSearcher:
     """
 
     def __init__(self, alphabet, dictionary, operation_costs=None,
-                 allow_spaces=False, euristics='none'):
+                 allow_spaces=False, euristics='none', absense_costs=None):
         self.alphabet = alphabet
         self.allow_spaces = allow_spaces
         if isinstance(euristics, int):
@@ -50,9 +53,35 @@ class LevenshteinSearcher:
                                         allow_spaces=self.allow_spaces)
         self.transducer = SegmentTransducer(
             alphabet, operation_costs=operation_costs, allow_spaces=allow_spaces)
-        self._precompute_euristics()
+        self._precompute_euristics(absense_costs)
         self._define_h_function()
 
+    def save(self, save_path, **metadata):
+        """
+        Saves the numpied dictionary trie and precomputed euristics to the directory
+        """
+        save_path = Path(save_path)
+        self.dictionary.save_numpied(save_path)
+        if self.euristics is not None:
+            np.save(save_path / "absense_costs.npy", self._absense_costs_by_node)
+        with open(save_path / "searcher.json", "w", encoding="utf8") as fout:
+            json.dump({"alphabet": self.alphabet, "allow_spaces": self.allow_spaces,
+                       "euristics": self.euristics, **metadata}, fout, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, load_path, operation_costs=None):
+        """
+        Loads the searcher saved by ``save`` with memory-mapped dictionary trie and euristics
+        """
+        load_path = Path(load_path)
+        with open(load_path / "searcher.json", "r", encoding="utf8") as fin:
+            params = json.load(fin)
+        absense_costs = None
+        if params["euristics"] is not None:
+            absense_costs = np.load(load_path / "absense_costs.npy", mmap_mode="r")
+        return cls(params["alphabet"], load_numpied_trie(load_path), operation_costs=operation_costs,
+                   allow_spaces=params["allow_spaces"], euristics=params["euristics"], absense_costs=absense_costs)
+
     def __contains__(self, word):
         return word in self.dictionary
 
@@ -115,7 +144,7 @@ class LevenshteinSearcher:
                             new_index = Trie.NO_NODE
                     else:
                         new_index = trie.descend(index, curr_low)
-                    if new_index is Trie.NO_NODE:
+                    if new_index == Trie.NO_NODE:
                         continue
                     new_low = low + curr_low
                     new_h = self.h_func(word[new_pos:], new_index)
@@ -135,13 +164,23 @@ class LevenshteinSearcher:
         else:
             return [elem[0] for elem in answer]
 
-    def _precompute_euristics(self):
+    def _precompute_euristics(self, absense_costs=None):
         """
         Предвычисляет будущие символы и стоимости операций с ними
         для h-эвристики
         """
         if self.euristics is None:
             return
+        curr_alphabet = list(self.dictionary.alphabet)
+        if self.allow_spaces:
+            curr_alphabet += [' ']
+        self._absense_symbol_codes = {a: i for i, a in enumerate(curr_alphabet)}
+        # кэш эвристик по вершинам, заполняется при поиске
+        self._temporary_euristics = defaultdict(dict)
+        if absense_costs is not None:
+            # стоимости потери символа уже предвычислены
+            self._absense_costs_by_node = absense_costs
+            return
         # вычисление минимальной стоимости операции,
         # приводящей к появлению ('+') или исчезновению ('-') данного символа
         removal_costs = {a: np.inf for a in self.alphabet}
@@ -167,8 +206,6 @@ class LevenshteinSearcher:
         self._absense_costs_by_node = _precompute_absense_costs(
             self.dictionary, removal_costs, insertion_costs,
             self.euristics, self.allow_spaces)
-        # массив для сохранения эвристик
-        self._temporary_euristics = [dict() for i in range(len(self.dictionary))]
 
     def _define_h_function(self):
         if self.euristics in [None, 0]:
@@ -204,11 +241,10 @@ class LevenshteinSearcher:
             return cost
         # извлечение нужных данных из массивов
         absense_costs = self._absense_costs_by_node[index]
-        data = self.dictionary.data[index]
         costs = np.zeros(dtype=np.float64, shape=(self.euristics,))
         # costs[j] --- оценка штрафа при предпросмотре вперёд на j символов
         for i, a in enumerate(suffix):
-            costs[i:] += absense_costs[a][i:]
+            costs[i:] += absense_costs[self._absense_symbol_codes[a], i:]
         cost = max(costs)
         index_temporary_euristics[suffix] = cost
         return cost
@@ -248,16 +284,16 @@ def _precompute_absense_costs(dictionary, removal_costs, insertion_costs, n,
 
     Возвращает
     ---------------
-    answer : list of dicts, len(answer)=len(dictionary)
-        answer[i][a][j] равно минимальному штрафу за появление символа a
-        в j-ой позиции в вершине с номером i
+    answer : array, shape=(len(dictionary), размер алфавита, n)
+        answer[i][k][j] равно минимальному штрафу за появление k-го символа алфавита
+        (пробела при k = len(alphabet)) в j-ой позиции в вершине с номером i
     """
-    answer = [dict() for node in dictionary.data]
-    if n == 0:
-        return answer
     curr_alphabet = copy.copy(dictionary.alphabet)
     if allow_spaces:
         curr_alphabet += [' ']
+    answer = np.empty(dtype=np.float64, shape=(len(dictionary.data), len(curr_alphabet), n))
+    if n == 0:
+        return answer
     for l, (costs_in_node, node) in enumerate(zip(answer, dictionary.data)):
         # определение минимальной стоимости удаления символов
         curr_node_removal_costs = np.empty(dtype=np.float64, shape=(n,))
@@ -272,15 +308,14 @@ def _precompute_absense_costs(dictionary, removal_costs, insertion_costs, n,
         else:
             curr_node_removal_costs[:] = np.inf
         # определение минимальной стоимости вставки
-        for a in curr_alphabet:
-            curr_symbol_costs = np.empty(dtype=np.float64, shape=(n,))
+        for k, a in enumerate(curr_alphabet):
+            curr_symbol_costs = costs_in_node[k]
             curr_symbol_costs.fill(insertion_costs[a])
             for j, symbols in enumerate(node):
                 if a in symbols:
                     curr_symbol_costs[j:] = 0.0
                     break
                 curr_symbol_costs[j] = min(curr_symbol_costs[j], curr_node_removal_costs[j])
-            costs_in_node[a] = curr_symbol_costs
     return answer
 
 
@@ -11,13 +11,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import string
 from logging import getLogger
 from math import log10
 from typing import Iterable, List, Tuple, Optional
 
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.file import read_json
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
+from deeppavlov.models.spelling_correction.candidates_searcher import CandidatesSearcher
 from .levenshtein_searcher import LevenshteinSearcher
 
 logger = getLogger(__name__)
@@ -32,6 +36,10 @@ class LevenshteinSearcherComponent(Component):
         max_distance: maximum allowed Damerau-Levenshtein distance between source words and candidates
         error_probability: assigned probability for every edit
         vocab_penalty: assigned probability of an out of vocabulary token being the correct one without changes
+        trie_path: path to the directory with the dictionary trie and precomputed euristics, they are built from
+         ``words`` and saved to the directory if it doesn't contain the trie of the same words
+        cache_size: max number of words with cached candidates, candidates are not cached if 0
+        num_workers: a number of processes to search candidates of distinct words of a batch with
 
     Attributes:
         max_distance: maximum allowed Damerau-Levenshtein distance between source words and candidates
@@ -43,25 +51,39 @@ class LevenshteinSearcherComponent(Component):
     _punctuation = frozenset(string.punctuation)
 
     def __init__(self, words: Iterable[str], max_distance: int = 1, error_probability: float = 1e-4,
-                 vocab_penalty: Optional[float] = None, **kwargs):
+                 vocab_penalty: Optional[float] = None, trie_path: Optional[str] = None, cache_size: int = 100000,
+                 num_workers: int = 1, **kwargs):
         words = list({word.strip().lower().replace('ё', 'е') for word in words})
-        alphabet = sorted({letter for word in words for letter in word})
         self.max_distance = max_distance
         self.error_probability = log10(error_probability)
         self.vocab_penalty = self.error_probability if vocab_penalty is None else log10(vocab_penalty)
-        self.searcher = LevenshteinSearcher(alphabet, words, allow_spaces=True, euristics=2)
+        self.searcher = None
+        if trie_path is not None:
+            trie_path = expand_path(trie_path)
+            words_hash = hashlib.md5('\n'.join(sorted(words)).encode('utf8')).hexdigest()
+            if (trie_path / 'searcher.json').is_file() \
+                    and read_json(trie_path / 'searcher.json').get('words_hash') == words_hash:
+                logger.info(f'Loading dictionary trie from {trie_path}')
+                self.searcher = LevenshteinSearcher.load(trie_path)
+        if self.searcher is None:
+            alphabet = sorted({letter for word in words for letter in word})
+            self.searcher = LevenshteinSearcher(alphabet, words, allow_spaces=True, euristics=2)
+            if trie_path is not None:
+                logger.info(f'Saving dictionary trie to {trie_path}')
+                self.searcher.save(trie_path, words_hash=words_hash)
+        self.candidates_searcher = CandidatesSearcher(self._find_candidates, cache_size, num_workers,
+                                                      name='spelling_levenshtein_candidates')
+
+    def _find_candidates(self, word: str) -> List[Tuple[float, str]]:
+        if word in self._punctuation:
+            return [(0, word)]
+        c = {candidate: self.error_probability * distance
+             for candidate, distance in self.searcher.search(word, d=self.max_distance)}
+        c[word] = c.get(word, self.vocab_penalty)
+        return [(score, candidate) for candidate, score in c.items()]
 
     def _infer_instance(self, tokens: Iterable[str]) -> List[List[Tuple[float, str]]]:
-        candidates = []
-        for word in tokens:
-            if word in self._punctuation:
-                candidates.append([(0, word)])
-            else:
-                c = {candidate: self.error_probability * distance
-                     for candidate, distance in self.searcher.search(word, d=self.max_distance)}
-                c[word] = c.get(word, self.vocab_penalty)
-                candidates.append([(score, candidate) for candidate, score in c.items()])
-        return candidates
+        return self([tokens])[0]
 
     def __call__(self, batch: Iterable[Iterable[str]], *args, **kwargs) -> List[List[List[Tuple[float, str]]]]:
         """Propose candidates for tokens in sentences
@@ -72,4 +94,10 @@ class LevenshteinSearcherComponent(Component):
         Returns:
             batch of lists of probabilities and candidates for every token
         """
-        return [self._infer_instance(tokens) for tokens in batch]
+        batch = [list(tokens) for tokens in batch]
+        candidates = self.candidates_searcher([word for tokens in batch for word in tokens])
+        return [[list(candidates[word]) for word in tokens] for tokens in batch]
+
+    def destroy(self) -> None:
+        self.candidates_searcher.destroy()
+        super().destroy()
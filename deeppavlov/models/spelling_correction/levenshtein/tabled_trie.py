@@ -13,7 +13,9 @@
 # limitations under the License.
 
 import copy
+import json
 from collections import defaultdict
+from pathlib import Path
 
 import numpy as np
 
@@ -95,11 +97,29 @@ class Trie:
                         map(str, symbols)) for symbols in elem) + "\n")
         return
 
+    def save_numpied(self, save_path):
+        """
+        Сохраняет матрицу потомков и массив финальных вершин в формате .npy,
+        чтобы загружать их через отображение файлов в память (см. load_numpied_trie)
+        """
+        if self.dict_storage:
+            raise TypeError("Impossible to save trie with dict storage as numpy arrays")
+        save_path = Path(save_path)
+        save_path.mkdir(parents=True, exist_ok=True)
+        graph = np.asarray(self.graph)
+        dtype = np.int32 if self.nodes_number < np.iinfo(np.int32).max else np.int64
+        np.save(save_path / "trie_graph.npy", graph.astype(dtype))
+        np.save(save_path / "trie_final.npy", np.asarray(self.final, dtype=bool))
+        with open(save_path / "trie.json", "w", encoding="utf8") as fout:
+            json.dump({"alphabet": self.alphabet, "root": int(self.root),
+                       "to_make_cashed": self.to_make_cashed, "allow_spaces": self.allow_spaces,
+                       "precompute_symbols": self.precompute_symbols}, fout, ensure_ascii=False)
+
     def make_cashed(self):
         """
         Включает кэширование запросов к descend
         """
-        self._descendance_cash = [dict() for _ in self.graph]
+        self._descendance_cash = defaultdict(dict)
         self.descend = self._descend_cashed
 
     def make_numpied(self):
@@ -461,6 +481,28 @@ def load_trie(infile):
         return trie
 
 
+def load_numpied_trie(load_path, mmap_mode="r"):
+    """
+    Загружает бор, сохранённый с помощью Trie.save_numpied,
+    массивы отображаются в память, если mmap_mode не равен None.
+    Данные в вершинах (будущие символы) не сохраняются и не загружаются
+    """
+    load_path = Path(load_path)
+    with open(load_path / "trie.json", "r", encoding="utf8") as fin:
+        params = json.load(fin)
+    trie = Trie(params["alphabet"], is_numpied=True, to_make_cashed=params["to_make_cashed"],
+                precompute_symbols=params["precompute_symbols"], allow_spaces=params["allow_spaces"])
+    trie.graph = np.load(load_path / "trie_graph.npy", mmap_mode=mmap_mode)
+    trie.final = np.load(load_path / "trie_final.npy", mmap_mode=mmap_mode)
+    trie.root = params["root"]
+    trie.nodes_number = len(trie.final)
+    trie.data = [None] * trie.nodes_number
+    trie.is_terminated = True
+    if trie.to_make_cashed:
+        trie.make_cashed()
+    return trie
+
+
 def make_trie(alphabet, words, compressed=True, is_numpied=False,
               make_cashed=False, precompute_symbols=False,
               allow_spaces=False, dict_storage=False):
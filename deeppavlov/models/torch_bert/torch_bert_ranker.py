@@ -41,15 +41,18 @@ class TorchBertRankerModel(TorchModel):
         bert_config_file: path to Bert configuration file (not used if pretrained_bert is key title)
         n_classes: number of classes
         return_probas: set True if class probabilities are returned instead of the most probable label
+        bucket_size: if set, items of a batch are sorted by length and inferred in sub-batches of this size
     """
 
     def __init__(self, pretrained_bert: str = None,
                  bert_config_file: Optional[str] = None,
                  n_classes: int = 2,
                  return_probas: bool = True,
+                 bucket_size: Optional[int] = None,
                  **kwargs) -> None:
 
         self.return_probas = return_probas
+        self.bucket_size = bucket_size
 
         if self.return_probas and n_classes == 1:
             raise RuntimeError('Set return_probas to False for regression task!')
@@ -140,25 +143,9 @@ class TorchBertRankerModel(TorchModel):
         predictions = []
         for features in features_li:
 
-            input_ids = [f.input_ids for f in features]
-            input_masks = [f.attention_mask for f in features]
-
-            b_input_ids = torch.cat(input_ids, dim=0).to(self.device)
-            b_input_masks = torch.cat(input_masks, dim=0).to(self.device)
-
-            with torch.no_grad():
-                # Forward pass, calculate logit predictions
-                logits = self.model(b_input_ids, token_type_ids=None, attention_mask=b_input_masks)
-                logits = logits[0]
-
-            if self.return_probas:
-                pred = torch.nn.functional.softmax(logits, dim=-1)[:, 1]
-                pred = pred.detach().cpu().numpy()
-            else:
-                logits = logits.detach().cpu().numpy()
-                pred = np.argmax(logits, axis=1)
-
-            predictions.append(pred)
+            batch = {'input_ids': torch.cat([f.input_ids for f in features], dim=0),
+                     'attention_mask': torch.cat([f.attention_mask for f in features], dim=0)}
+            predictions.append(self._infer_by_length_buckets(batch, self._infer, self.bucket_size))
 
         if len(features_li) == 1:
             predictions = predictions[0]
@@ -166,3 +153,20 @@ class TorchBertRankerModel(TorchModel):
             predictions = np.hstack([np.expand_dims(el, 1) for el in predictions])
 
         return predictions
+
+    def _infer(self, features: Dict[str, torch.Tensor]) -> np.ndarray:
+        b_input_ids = features['input_ids'].to(self.device)
+        b_input_masks = features['attention_mask'].to(self.device)
+
+        with torch.no_grad():
+            # Forward pass, calculate logit predictions
+            logits = self.model(b_input_ids, token_type_ids=None, attention_mask=b_input_masks)
+            logits = logits[0]
+
+        if self.return_probas:
+            pred = torch.nn.functional.softmax(logits, dim=-1)[:, 1]
+            pred = pred.detach().cpu().numpy()
+        else:
+            logits = logits.detach().cpu().numpy()
+            pred = np.argmax(logits, axis=1)
+        return pred
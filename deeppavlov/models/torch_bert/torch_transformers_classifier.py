@@ -46,6 +46,7 @@ class TorchTransformersClassifierModel(TorchModel):
         bert_config_file: path to Bert configuration file (not used if pretrained_bert is key title)
         is_binary: whether classification task is binary or multi-class
         num_special_tokens: number of special tokens used by classification model
+        bucket_size: if set, items of a batch are sorted by length and inferred in sub-batches of this size
     """
 
     def __init__(self, n_classes,
@@ -57,9 +58,11 @@ class TorchTransformersClassifierModel(TorchModel):
                  bert_config_file: Optional[str] = None,
                  is_binary: Optional[bool] = False,
                  num_special_tokens: int = None,
+                 bucket_size: Optional[int] = None,
                  **kwargs) -> None:
 
         self.return_probas = return_probas
+        self.bucket_size = bucket_size
         self.multilabel = multilabel
         self.n_classes = n_classes
         self.is_binary = is_binary
@@ -163,7 +166,9 @@ class TorchTransformersClassifierModel(TorchModel):
             predicted classes or probabilities of each class
 
         """
+        return self._infer_by_length_buckets(features, self._infer, self.bucket_size)
 
+    def _infer(self, features: Dict[str, torch.tensor]) -> np.ndarray:
         _input = {key: value.to(self.device) for key, value in features.items()}
 
         with torch.no_grad():
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sqlite3
 from logging import getLogger
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple, Union, Any
@@ -23,8 +24,11 @@ import torch.nn.functional as F
 from torch import Tensor
 from transformers import AutoConfig, AutoTokenizer, AutoModel
 
-from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.commands.utils import expand_path, parse_config
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.core.common.id_table import DocIdTable
+from deeppavlov.core.common.params import from_params
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.torch_model import TorchModel
 from deeppavlov.models.preprocessors.torch_transformers_preprocessor import TorchTransformersEntityRankerPreprocessor
@@ -320,6 +324,11 @@ class TorchTransformersEntityRankerInfer:
         emb_size: entity embedding size
         block_size: size of block in bilinear layer
         device: `cpu` or `gpu` device to use
+        descr_embeddings_path: path to the directory with precomputed embeddings of entity descriptions made by
+            :func:`build_descr_embeddings`
+        descr_cache_size: max number of cached embeddings of descriptions of entities which are not in precomputed
+            embeddings, embeddings are not cached if 0
+        descr_batch_size: batch size when encoding entity descriptions
     """
 
     def __init__(self, pretrained_bert,
@@ -330,7 +339,10 @@ class TorchTransformersEntityRankerInfer:
                  batch_size: int = 5,
                  emb_size: int = 300,
                  block_size: int = 8,
-                 device: str = "gpu", **kwargs):
+                 device: str = "gpu",
+                 descr_embeddings_path: str = None,
+                 descr_cache_size: int = 100000,
+                 descr_batch_size: int = 64, **kwargs):
         self.device = torch.device("cuda" if torch.cuda.is_available() and device == "gpu" else "cpu")
         self.pretrained_bert = pretrained_bert
         self.preprocessor = TorchTransformersEntityRankerPreprocessor(vocab_file=self.pretrained_bert,
@@ -350,55 +362,138 @@ class TorchTransformersEntityRankerInfer:
         bilinear_checkpoint = torch.load(self.bilinear_weights_path, map_location=self.device)
         self.bilinear_ranking.load_state_dict(bilinear_checkpoint["model_state_dict"])
         self.bilinear_ranking.to(self.device)
+        self.encoder.eval()
+        self.bilinear_ranking.eval()
         self.special_token_id = special_token_id
         self.batch_size = batch_size
+        self.descr_batch_size = descr_batch_size
+        self.descr_table, self.descr_embeddings = None, None
+        if descr_embeddings_path:
+            descr_embeddings_path = expand_path(descr_embeddings_path)
+            log.debug(f"Loading entity descriptions embeddings from {descr_embeddings_path}")
+            self.descr_table = DocIdTable(descr_embeddings_path)
+            self.descr_embeddings = np.load(descr_embeddings_path / 'descr_embeddings.npy', mmap_mode='r')
+        self.descr_cache = LRUCache(descr_cache_size, name='entity_descr_embeddings') if descr_cache_size > 0 else None
+
+    def encode_descriptions(self, descriptions: List[str]) -> np.ndarray:
+        """Returns embeddings of [CLS] tokens of entity descriptions."""
+        embeddings = []
+        for i in range(0, len(descriptions), self.descr_batch_size):
+            descr_features = self.preprocessor(descriptions[i:i + self.descr_batch_size])
+            with torch.no_grad():
+                descr_emb = self.encoder(input_ids=descr_features["input_ids"].to(self.device),
+                                         attention_mask=descr_features["attention_mask"].to(self.device))
+            embeddings.append(descr_emb.cpu().numpy())
+        return np.concatenate(embeddings)
+
+    def get_descr_embeddings(self, entity_ids: List[str], descriptions: List[str]) -> np.ndarray:
+        """Returns embeddings of entity descriptions.
+
+        Embeddings are taken from precomputed embeddings or from the cache, descriptions of the rest of entities are
+        encoded in batches of ``descr_batch_size``.
+        """
+        embeddings = [None] * len(entity_ids)
+        missing = {}
+        for n, (entity_id, descr) in enumerate(zip(entity_ids, descriptions)):
+            if self.descr_table is not None:
+                try:
+                    embeddings[n] = self.descr_embeddings[self.descr_table.find_title(entity_id)]
+                    continue
+                except KeyError:
+                    pass
+            if self.descr_cache is not None:
+                embeddings[n] = self.descr_cache.get(entity_id)
+            if embeddings[n] is None:
+                missing.setdefault(entity_id, descr)
+        if missing:
+            found = dict(zip(missing, self.encode_descriptions(list(missing.values()))))
+            if self.descr_cache is not None:
+                for entity_id, descr_emb in found.items():
+                    self.descr_cache.set(entity_id, descr_emb)
+            embeddings = [found[entity_id] if descr_emb is None else descr_emb
+                          for entity_id, descr_emb in zip(entity_ids, embeddings)]
+        return np.stack(embeddings).astype(np.float32)
 
     def __call__(self, contexts_batch: List[str],
                  candidate_entities_batch: List[List[str]],
                  candidate_entities_descr_batch: List[List[str]]):
-        entity_emb_batch = []
+        # only contexts with candidate entities are encoded
+        nums = [n for n, candidate_entities_list in enumerate(candidate_entities_batch) if candidate_entities_list]
+        scores_batch = [[] for _ in candidate_entities_batch]
+        if not nums:
+            return scores_batch
+        contexts_list = [contexts_batch[n] for n in nums]
 
-        num_batches = len(contexts_batch) // self.batch_size + int(len(contexts_batch) % self.batch_size > 0)
-        for ii in range(num_batches):
-            contexts_list = contexts_batch[ii * self.batch_size:(ii + 1) * self.batch_size]
-            context_features = self.preprocessor(contexts_list)
+        entity_emb_batch = []
+        for i in range(0, len(contexts_list), self.batch_size):
+            context_features = self.preprocessor(contexts_list[i:i + self.batch_size])
             context_input_ids = context_features["input_ids"].to(self.device)
             context_attention_mask = context_features["attention_mask"].to(self.device)
-            special_tokens_pos = []
-            for input_ids_list in context_input_ids:
-                found_n = -1
-                for n, input_id in enumerate(input_ids_list):
-                    if input_id == self.special_token_id:
-                        found_n = n
-                        break
-                if found_n == -1:
-                    found_n = 0
-                special_tokens_pos.append(found_n)
-
-            cur_entity_emb_batch = self.encoder(input_ids=context_input_ids,
-                                                attention_mask=context_attention_mask,
-                                                entity_tokens_pos=special_tokens_pos)
-
-            entity_emb_batch += cur_entity_emb_batch.detach().cpu().numpy().tolist()
-
-        scores_batch = []
-        for entity_emb, candidate_entities_list, candidate_entities_descr_list in \
-                zip(entity_emb_batch, candidate_entities_batch, candidate_entities_descr_batch):
-            if candidate_entities_list:
-                entity_emb = [entity_emb for _ in candidate_entities_list]
-                entity_emb = torch.Tensor(entity_emb).to(self.device)
-                descr_features = self.preprocessor(candidate_entities_descr_list)
-                descr_input_ids = descr_features["input_ids"].to(self.device)
-                descr_attention_mask = descr_features["attention_mask"].to(self.device)
-                candidate_entities_emb = self.encoder(input_ids=descr_input_ids,
-                                                      attention_mask=descr_attention_mask)
-                scores_list, _ = self.bilinear_ranking(entity_emb, candidate_entities_emb)
-                scores_list = scores_list.detach().cpu().numpy()
-                scores_list = [score[1] for score in scores_list]
-                entities_with_scores = [(entity, score) for entity, score in zip(candidate_entities_list, scores_list)]
-                entities_with_scores = sorted(entities_with_scores, key=lambda x: x[1], reverse=True)
-                scores_batch.append(entities_with_scores)
-            else:
-                scores_batch.append([])
+            # position of the first special token, 0 if the context has no special token
+            special_tokens_pos = (context_input_ids == self.special_token_id).int().argmax(dim=1).tolist()
+            with torch.no_grad():
+                entity_emb_batch.append(self.encoder(input_ids=context_input_ids,
+                                                     attention_mask=context_attention_mask,
+                                                     entity_tokens_pos=special_tokens_pos))
+
+        candidates_nums = torch.tensor([len(candidate_entities_batch[n]) for n in nums], device=self.device)
+        entity_emb = torch.cat(entity_emb_batch).repeat_interleave(candidates_nums, dim=0)
+        candidate_entities_emb = self.get_descr_embeddings(
+            [entity for n in nums for entity in candidate_entities_batch[n]],
+            [descr for n in nums for descr in candidate_entities_descr_batch[n]])
+        with torch.no_grad():
+            scores, _ = self.bilinear_ranking(entity_emb, torch.from_numpy(candidate_entities_emb).to(self.device))
+        scores = scores.cpu().numpy()[:, 1]
+
+        start = 0
+        for n in nums:
+            candidate_entities_list = candidate_entities_batch[n]
+            scores_list = scores[start:start + len(candidate_entities_list)]
+            start += len(candidate_entities_list)
+            entities_with_scores = [(entity, score) for entity, score in zip(candidate_entities_list, scores_list)]
+            scores_batch[n] = sorted(entities_with_scores, key=lambda x: x[1], reverse=True)
 
         return scores_batch
+
+
+def build_descr_embeddings(config: Union[str, Path, dict], save_path: Union[str, Path]) -> None:
+    """Encode descriptions of all entities of the entity linking database for
+    :class:`TorchTransformersEntityRankerInfer`.
+
+    Run from the command line as ``python -m deeppavlov.utils.mmap_indexes.mmap_indexes descriptions <config_path>
+    <save_path>``.
+
+    Args:
+        config: entity linking config with ``torch_transformers_entity_ranker_infer`` and ``entity_linker`` components
+        save_path: a directory to save the description embeddings to
+
+    """
+    pipe = parse_config(config)["chainer"]["pipe"]
+    ranker_params = next(params for params in pipe
+                         if params.get("class_name") == "torch_transformers_entity_ranker_infer")
+    linker_params = next(params for params in pipe if params.get("class_name") == "entity_linker")
+    ranker = from_params({**ranker_params, "descr_embeddings_path": None, "descr_cache_size": 0})
+
+    conn = sqlite3.connect(str(expand_path(linker_params["load_path"]) / linker_params["entities_database_filename"]))
+    descriptions = {}
+    for entity_id, descr in conn.execute("SELECT entity_id, descr FROM inverted_index;"):
+        descriptions.setdefault(entity_id, descr)
+    conn.close()
+    log.info(f"Encoding descriptions of {len(descriptions)} entities")
+
+    save_path = expand_path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+    entity_ids, descriptions = list(descriptions), list(descriptions.values())
+    embeddings = None
+    chunk_size = ranker.descr_batch_size * 100
+    for i in range(0, len(descriptions), chunk_size):
+        chunk_embeddings = ranker.encode_descriptions(descriptions[i:i + chunk_size])
+        if embeddings is None:
+            embeddings = np.lib.format.open_memmap(save_path / 'descr_embeddings.npy', mode='w+', dtype=np.float16,
+                                                   shape=(len(descriptions), chunk_embeddings.shape[1]))
+        embeddings[i:i + chunk_size] = chunk_embeddings
+        log.info(f"Encoded descriptions of {i + len(chunk_embeddings)} entities")
+    if embeddings is not None:
+        embeddings.flush()
+    DocIdTable.save({entity_id: i for i, entity_id in enumerate(entity_ids)}, save_path)
+
@@ -42,6 +42,7 @@ class TorchTransformersMultiplechoiceModel(TorchModel):
         attention_probs_keep_prob: keep_prob for Bert self-attention layers
         hidden_keep_prob: keep_prob for Bert hidden layers
         bert_config_file: path to Bert configuration file (not used if pretrained_bert is key title)
+        bucket_size: if set, items of a batch are sorted by length and inferred in sub-batches of this size
     """
 
     def __init__(self, n_classes,
@@ -51,9 +52,11 @@ class TorchTransformersMultiplechoiceModel(TorchModel):
                  attention_probs_keep_prob: Optional[float] = None,
                  hidden_keep_prob: Optional[float] = None,
                  bert_config_file: Optional[str] = None,
+                 bucket_size: Optional[int] = None,
                  **kwargs) -> None:
 
         self.return_probas = return_probas
+        self.bucket_size = bucket_size
         self.multilabel = multilabel
         self.n_classes = n_classes
 
@@ -117,7 +120,9 @@ class TorchTransformersMultiplechoiceModel(TorchModel):
             predicted classes or probabilities of each class
 
         """
+        return self._infer_by_length_buckets(features, self._infer, self.bucket_size)
 
+    def _infer(self, features: Dict[str, torch.tensor]) -> np.ndarray:
         _input = {key: value.to(self.device) for key, value in features.items()}
 
         with torch.no_grad():
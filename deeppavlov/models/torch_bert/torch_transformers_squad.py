@@ -35,6 +35,56 @@ def softmax_mask(val, mask):
     return -inf * (1 - mask.to(torch.float32)) + val
 
 
+def window_max(values: torch.Tensor, window: int, reverse: bool = False) -> torch.Tensor:
+    """Computes max over sliding windows along the last dimension in O(log(window)) vectorized steps.
+
+    Args:
+        values: tensor of values
+        window: window size
+        reverse: if ``False``, the window of position ``i`` is ``values[..., i:i + window]``,
+            otherwise ``values[..., i - window + 1:i + 1]``
+
+    Returns:
+        tensor of the same shape as ``values`` with window maximums
+    """
+    if reverse:
+        return window_max(values.flip(-1), window).flip(-1)
+    seq_len = values.size(-1)
+    result, span = values, 1
+    while span < window and span < seq_len:
+        shift = min(span, window - span)
+        shifted = torch.nn.functional.pad(result[..., shift:], (0, shift), value=-float('inf'))
+        result = torch.maximum(result, shifted)
+        span += shift
+    return result
+
+
+def decode_spans(start_probs: torch.Tensor, end_probs: torch.Tensor, logits_st: torch.Tensor,
+                 logits_end: torch.Tensor, window: int) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Finds the best answer spans among spans with ``0 <= end - start < window``.
+
+    Span scores are products of start and end scores, so the best end for every start (and vice versa) is a sliding
+    window maximum, and ``seq_len x seq_len`` matrix of span scores is not built.
+
+    Args:
+        start_probs: answer start probabilities, shape ``(batch_size, seq_len)``
+        end_probs: answer end probabilities, shape ``(batch_size, seq_len)``
+        logits_st: answer start logits, shape ``(batch_size, seq_len)``
+        logits_end: answer end logits, shape ``(batch_size, seq_len)``
+        window: max answer length in tokens (exclusive)
+
+    Returns:
+        answer start positions, answer end positions and exponents of the best span logits
+    """
+    if window <= 0:
+        zeros = torch.zeros(start_probs.size(0), dtype=torch.int64, device=start_probs.device)
+        return zeros, zeros.clone(), torch.zeros_like(start_probs[:, 0])
+    start_pred = torch.argmax(start_probs * window_max(end_probs, window), dim=1)
+    end_pred = torch.argmax(end_probs * window_max(start_probs, window, reverse=True), dim=1)
+    logits = torch.exp(torch.max(logits_st + window_max(logits_end, window), dim=1)[0])
+    return start_pred, end_pred, logits
+
+
 class PassageReaderClassifier(torch.nn.Module):
     """The model with a Transformer encoder and two linear layers: the first for prediction of answer start and end
     positions, the second defines the probability of the paragraph to contain the answer.
@@ -228,22 +278,13 @@ class TorchTransformersSquad(TorchModel):
                 else:
                     scores = torch.tensor(1) - start_probs[:, 0] * end_probs[:, 0]
 
-                outer = torch.matmul(start_probs.view(*start_probs.size(), 1),
-                                     end_probs.view(end_probs.size()[0], 1, end_probs.size()[1]))
-                outer_logits = torch.exp(logits_st.view(*logits_st.size(), 1) + logits_end.view(
-                    logits_end.size()[0], 1, logits_end.size()[1]))
-
                 context_max_len = torch.max(torch.sum(b_input_type_ids, dim=1)).to(torch.int64)
 
                 max_ans_length = torch.min(torch.tensor(20).to(self.device), context_max_len).to(torch.int64).item()
 
-                outer = torch.triu(outer, diagonal=0) - torch.triu(outer, diagonal=outer.size()[1] - max_ans_length)
-                outer_logits = torch.triu(outer_logits, diagonal=0) - torch.triu(
-                    outer_logits, diagonal=outer_logits.size()[1] - max_ans_length)
-
-                start_pred = torch.argmax(torch.max(outer, dim=2)[0], dim=1)
-                end_pred = torch.argmax(torch.max(outer, dim=1)[0], dim=1)
-                logits = torch.max(torch.max(outer_logits, dim=2)[0], dim=1)[0]
+                # the answer span (start, end) is valid if 0 <= end - start < seq_len - max_ans_length
+                start_pred, end_pred, logits = decode_spans(start_probs, end_probs, logits_st, logits_end,
+                                                            window=seq_len - max_ans_length)
 
             # Move logits and labels to CPU and to numpy arrays
             start_pred = start_pred.detach().cpu().numpy()
@@ -12,15 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import Counter
+import json
+import multiprocessing as mp
+from collections.abc import Mapping
+from itertools import chain
 from logging import getLogger
-from typing import List, Any, Generator, Tuple, KeysView, ValuesView, Dict, Optional
+from pathlib import Path
+from typing import List, Any, Tuple, Dict, Optional, Iterator, Union
 
 import numpy as np
 import scipy as sp
 from scipy import sparse
 from sklearn.utils import murmurhash3_32
 
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.id_table import DocIdTable
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.estimator import Estimator
@@ -43,6 +49,96 @@ def hash_(token: str, hash_size: int) -> int:
     return murmurhash3_32(token, positive=True) % hash_size
 
 
+def hash_batch(batch_ngrams: List[List[str]], hash_size: int) -> np.ndarray:
+    """Convert ngrams of a batch of documents to hashes, every distinct ngram is hashed once.
+
+    Args:
+        batch_ngrams: lists of ngrams of documents
+        hash_size: hash size
+
+    Returns:
+        a flat array of ngram hashes of all documents
+
+    """
+    ngram_codes = {}
+    codes = np.fromiter((ngram_codes.setdefault(ngram, len(ngram_codes)) for ngram in chain(*batch_ngrams)),
+                        dtype=np.int64)
+    unique_hashes = np.fromiter((murmurhash3_32(ngram, positive=True) for ngram in ngram_codes),
+                                dtype=np.int64, count=len(ngram_codes))
+    return (unique_hashes % hash_size)[codes]
+
+
+_fit_tokenizer = None
+
+
+def _init_fit_worker(tokenizer: Component) -> None:
+    global _fit_tokenizer
+    _fit_tokenizer = tokenizer
+
+
+def count_hashes(docs: List[str], doc_nums: List[int], hash_size: int,
+                 tokenizer: Optional[Component] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tokenize a batch of documents and count their ngram hashes.
+
+    Args:
+        docs: a list of input documents
+        doc_nums: a list of document columns in tfidf matrix
+        hash_size: hash size
+        tokenizer: a tokenizer, a tokenizer of the fitting worker process is used if not given
+
+    Returns:
+        a tuple of hashes, columns and counts arrays of the count matrix
+
+    """
+    tokenizer = tokenizer or _fit_tokenizer
+    batch_ngrams = list(tokenizer(docs))
+    hashes = hash_batch(batch_ngrams, hash_size)
+    cols = np.repeat(np.asarray(doc_nums, dtype=np.int64), [len(ngrams) for ngrams in batch_ngrams])
+    keys, counts = np.unique(cols * hash_size + hashes, return_counts=True)
+    return (keys % hash_size).astype(np.int32), keys // hash_size, counts.astype(np.int32)
+
+
+class MmapDocIndex(Mapping):
+    """Read-only mapping of document ids to their column ids backed by :class:`DocIdTable`.
+
+    Args:
+        table: a table of document ids
+        id_type: type of document ids, ``str`` or ``int``
+    """
+
+    def __init__(self, table: DocIdTable, id_type: type = str) -> None:
+        self.table = table
+        self.id_type = id_type
+
+    def __getitem__(self, title: Union[str, int]) -> int:
+        if not isinstance(title, self.id_type):
+            raise KeyError(title)
+        return int(self.table.columns[self.table.find_title(str(title))])
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __iter__(self) -> Iterator[Union[str, int]]:
+        return (self.id_type(self.table.title(i)) for i in range(len(self.table)))
+
+
+class MmapIndex2Doc(Mapping):
+    """Read-only mapping of column ids to document ids backed by :class:`DocIdTable`."""
+
+    def __init__(self, table: DocIdTable, id_type: type = str) -> None:
+        self.table = table
+        self.id_type = id_type
+
+    def __getitem__(self, column: int) -> Union[str, int]:
+        return self.id_type(self.table.title(self.table.find_column(column)))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(column) for column in self.table.columns)
+
+
 @register('hashing_tfidf_vectorizer')
 class HashingTfIdfVectorizer(Estimator):
     """Create a tfidf matrix from collection of documents of size [n_documents X n_features(hash_size)].
@@ -51,30 +147,34 @@ class HashingTfIdfVectorizer(Estimator):
         tokenizer: a tokenizer class
         hash_size: a hash size, power of two
         doc_index: a dictionary of document ids and their titles
-        save_path: a path to **.npz** file where tfidf matrix is saved
-        load_path: a path to **.npz** file where tfidf matrix is loaded from
+        save_path: a path to **.npz** file or to a directory where tfidf matrix is saved
+        load_path: a path to **.npz** file or to a directory where tfidf matrix is loaded from, a directory index
+            is memory-mapped
+        num_workers: a number of processes to tokenize and count documents with during fitting
 
     Attributes:
         hash_size: a hash size
         tokenizer: instance of a tokenizer class
         term_freqs: a dictionary with tfidf terms and their frequences
         doc_index: provided by a user ids or generated automatically ids
-        rows: tfidf matrix rows corresponding to terms
-        cols: tfidf matrix cols corresponding to docs
-        data: tfidf matrix data corresponding to tfidf values
+        rows: chunks of count matrix rows corresponding to terms
+        cols: chunks of count matrix cols corresponding to docs
+        data: chunks of count matrix data corresponding to term counts
 
     """
 
     def __init__(self, tokenizer: Component, hash_size=2 ** 24, doc_index: Optional[dict] = None,
-                 save_path: Optional[str] = None, load_path: Optional[str] = None, **kwargs):
+                 save_path: Optional[str] = None, load_path: Optional[str] = None, num_workers: int = 1, **kwargs):
 
         super().__init__(save_path=save_path, load_path=load_path, mode=kwargs.get('mode', 'infer'))
 
         self.hash_size = hash_size
         self.tokenizer = tokenizer
-        self.rows = []
-        self.cols = []
-        self.data = []
+        self.num_workers = num_workers
+        self._pool = None
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.data: List[np.ndarray] = []
 
         if kwargs.get('mode', 'infer') == 'infer':
             self.tfidf_matrix, opts = self.load()
@@ -82,7 +182,10 @@ class HashingTfIdfVectorizer(Estimator):
             self.hash_size = opts['hash_size']
             self.term_freqs = opts['term_freqs'].squeeze()
             self.doc_index = opts['doc_index']
-            self.index2doc = self.get_index2doc()
+            if isinstance(self.doc_index, MmapDocIndex):
+                self.index2doc = MmapIndex2Doc(self.doc_index.table, self.doc_index.id_type)
+            else:
+                self.index2doc = self.get_index2doc()
         else:
             self.term_freqs = None
             self.doc_index = doc_index or {}
@@ -135,36 +238,6 @@ class HashingTfIdfVectorizer(Estimator):
         """
         return dict(zip(self.doc_index.values(), self.doc_index.keys()))
 
-    def get_counts(self, docs: List[str], doc_ids: List[Any]) \
-            -> Generator[Tuple[KeysView, ValuesView, List[int]], Any, None]:
-        """Get term counts for a list of documents.
-
-        Args:
-            docs: a list of input documents
-            doc_ids: a list of document ids corresponding to input documents
-
-        Yields:
-            a tuple of term hashes, count values and column ids
-
-        Returns:
-            None
-
-        """
-        logger.debug("Tokenizing batch...")
-        batch_ngrams = list(self.tokenizer(docs))
-        logger.debug("Counting hash...")
-        doc_id = iter(doc_ids)
-        for ngrams in batch_ngrams:
-            counts = Counter([hash_(gram, self.hash_size) for gram in ngrams])
-            hashes = counts.keys()
-            values = counts.values()
-            _id = self.doc_index[next(doc_id)]
-            if values:
-                col_id = [_id] * len(values)
-            else:
-                col_id = []
-            yield hashes, values, col_id
-
     def get_count_matrix(self, row: List[int], col: List[int], data: List[int], size: int) \
             -> Sparse:
         """Get count matrix.
@@ -205,15 +278,18 @@ class HashingTfIdfVectorizer(Estimator):
         return tfidfs, term_freqs
 
     def save(self) -> None:
-        """Save tfidf matrix into **.npz** format.
+        """Save tfidf matrix into **.npz** format or into a memory-mapped directory index if :attr:`save_path`
+        doesn't have the **.npz** suffix.
 
         Returns:
             None
 
         """
         logger.info("Saving tfidf matrix to {}".format(self.save_path))
-        count_matrix = self.get_count_matrix(self.rows, self.cols, self.data,
-                                             size=len(self.doc_index))
+        self.close_pool()
+        rows, cols, data = (np.concatenate(chunks) if chunks else np.array([], dtype=np.int32)
+                            for chunks in (self.rows, self.cols, self.data))
+        count_matrix = self.get_count_matrix(rows, cols, data, size=len(self.doc_index))
         tfidf_matrix, term_freqs = self.get_tfidf_matrix(count_matrix)
         self.term_freqs = term_freqs
 
@@ -222,18 +298,32 @@ class HashingTfIdfVectorizer(Estimator):
                 'doc_index': self.doc_index,
                 'term_freqs': self.term_freqs}
 
-        data = {
-            'data': tfidf_matrix.data,
-            'indices': tfidf_matrix.indices,
-            'indptr': tfidf_matrix.indptr,
-            'shape': tfidf_matrix.shape,
-            'opts': opts
-        }
-        np.savez(self.save_path, **data)
+        if self.save_path.suffix == '.npz':
+            data = {
+                'data': tfidf_matrix.data,
+                'indices': tfidf_matrix.indices,
+                'indptr': tfidf_matrix.indptr,
+                'shape': tfidf_matrix.shape,
+                'opts': opts
+            }
+            np.savez(self.save_path, **data)
+        else:
+            save_mmap_index(self.save_path, tfidf_matrix, opts)
 
         # release memory
         self.reset()
 
+    def close_pool(self) -> None:
+        """Stop worker processes of :meth:`partial_fit` if they are running."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def destroy(self) -> None:
+        self.close_pool()
+        super().destroy()
+
     def reset(self) -> None:
         """Clear :attr:`rows`, :attr:`cols` and :attr:`data`
 
@@ -262,6 +352,8 @@ class HashingTfIdfVectorizer(Estimator):
             raise FileNotFoundError("HashingTfIdfVectorizer path doesn't exist!")
 
         logger.debug("Loading tfidf matrix from {}".format(self.load_path))
+        if self.load_path.is_dir():
+            return load_mmap_index(self.load_path)
         loader = np.load(self.load_path, allow_pickle=True)
         matrix = Sparse((loader['data'], loader['indices'],
                          loader['indptr']), shape=loader['shape'])
@@ -281,11 +373,24 @@ class HashingTfIdfVectorizer(Estimator):
         """
         for doc_id, i in zip(doc_ids, doc_nums):
             self.doc_index[doc_id] = i
+        doc_cols = [self.doc_index[doc_id] for doc_id in doc_ids]
+
+        if self.num_workers > 1:
+            if self._pool is None:
+                # workers are forked to inherit the tokenizer instead of pickling it
+                self._pool = mp.get_context('fork').Pool(self.num_workers, initializer=_init_fit_worker,
+                                                         initargs=(self.tokenizer,))
+            shard_size = -(-len(docs) // self.num_workers)
+            shards = [(docs[i:i + shard_size], doc_cols[i:i + shard_size], self.hash_size)
+                      for i in range(0, len(docs), shard_size)]
+            counts = self._pool.starmap(count_hashes, shards)
+        else:
+            counts = [count_hashes(docs, doc_cols, self.hash_size, self.tokenizer)]
 
-        for batch_rows, batch_data, batch_cols in self.get_counts(docs, doc_ids):
-            self.rows.extend(batch_rows)
-            self.cols.extend(batch_cols)
-            self.data.extend(batch_data)
+        for batch_rows, batch_cols, batch_data in counts:
+            self.rows.append(batch_rows)
+            self.cols.append(batch_cols)
+            self.data.append(batch_data)
 
     def fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
         """Fit the vectorizer.
@@ -303,4 +408,82 @@ class HashingTfIdfVectorizer(Estimator):
         self.rows = []
         self.cols = []
         self.data = []
-        return self.partial_fit(docs, doc_ids, doc_nums)
+        self.partial_fit(docs, doc_ids, doc_nums)
+        self.close_pool()
+
+
+def save_mmap_index(save_path: Union[str, Path], tfidf_matrix: Sparse, opts: Dict) -> None:
+    """Save tfidf matrix and its options as a directory of raw **.npy** arrays that could be memory-mapped.
+
+    Args:
+        save_path: a directory to save the index to
+        tfidf_matrix: a tfidf matrix
+        opts: a dictionary with ``hash_size``, ``ngram_range``, ``doc_index`` and ``term_freqs`` keys
+
+    Raises:
+        TypeError: if document ids are neither all ``str`` nor all ``int``
+
+    """
+    doc_index = opts['doc_index']
+    id_types = {type(doc_id) for doc_id in doc_index}
+    if id_types - {str} and id_types - {int}:
+        raise TypeError(f'Memory-mapped index supports either str or int document ids, got '
+                        f'{", ".join(sorted(id_type.__name__ for id_type in id_types))} ids, use .npz format instead')
+    id_type = 'int' if id_types == {int} else 'str'
+    save_path = Path(save_path)
+    save_path.mkdir(parents=True, exist_ok=True)
+    # indices and indptr share dtype, so scipy doesn't copy them to unify index dtypes on loading
+    index_dtype = np.int32 if max(tfidf_matrix.nnz, *tfidf_matrix.shape) < np.iinfo(np.int32).max else np.int64
+    np.save(save_path / 'data.npy', tfidf_matrix.data)
+    np.save(save_path / 'indices.npy', tfidf_matrix.indices.astype(index_dtype, copy=False))
+    np.save(save_path / 'indptr.npy', tfidf_matrix.indptr.astype(index_dtype, copy=False))
+    np.save(save_path / 'term_freqs.npy', np.asarray(opts['term_freqs']))
+    DocIdTable.save({str(doc_id): column for doc_id, column in doc_index.items()}, save_path)
+    meta = {
+        'shape': list(tfidf_matrix.shape),
+        'hash_size': opts['hash_size'],
+        'ngram_range': list(opts['ngram_range']),
+        'doc_id_type': id_type
+    }
+    with open(save_path / 'meta.json', 'w') as fout:
+        json.dump(meta, fout)
+
+
+def load_mmap_index(load_path: Union[str, Path]) -> Tuple[Sparse, Dict]:
+    """Load memory-mapped tfidf matrix and its options saved by :func:`save_mmap_index`.
+
+    Returns:
+        a tuple of tfidf matrix and a dictionary with matrix options
+
+    """
+    load_path = Path(load_path)
+    with open(load_path / 'meta.json') as fin:
+        meta = json.load(fin)
+    data = np.load(load_path / 'data.npy', mmap_mode='r')
+    indices = np.load(load_path / 'indices.npy', mmap_mode='r')
+    indptr = np.load(load_path / 'indptr.npy', mmap_mode='r')
+    # arrays are assigned directly to skip csr_matrix format checks that read every page of the index
+    matrix = Sparse(tuple(meta['shape']), dtype=data.dtype)
+    matrix.data, matrix.indices, matrix.indptr = data, indices, indptr
+    opts = {
+        'hash_size': meta['hash_size'],
+        'ngram_range': meta['ngram_range'],
+        'doc_index': MmapDocIndex(DocIdTable(load_path), {'str': str, 'int': int}[meta.get('doc_id_type', 'str')]),
+        'term_freqs': np.load(load_path / 'term_freqs.npy', mmap_mode='r')
+    }
+    return matrix, opts
+
+
+def convert_npz_to_mmap(npz_path: Union[str, Path], save_path: Union[str, Path]) -> None:
+    """Convert **.npz** tfidf matrix saved by :class:`HashingTfIdfVectorizer` to a memory-mapped directory index.
+
+    Run from the command line as ``python -m deeppavlov.utils.mmap_indexes.mmap_indexes tfidf <npz_path> <save_path>``.
+
+    Args:
+        npz_path: a path to **.npz** file
+        save_path: a directory to save the index to
+
+    """
+    loader = np.load(expand_path(npz_path), allow_pickle=True)
+    matrix = Sparse((loader['data'], loader['indices'], loader['indptr']), shape=loader['shape'])
+    save_mmap_index(expand_path(save_path), matrix, loader['opts'].item(0))
@@ -0,0 +1,72 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+
+parser = argparse.ArgumentParser(description='Build memory-mapped indexes of models from their original files')
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+tfidf_parser = subparsers.add_parser('tfidf', help='convert .npz tfidf matrix to memory-mapped directory index')
+tfidf_parser.add_argument('npz_path', help='path to .npz tfidf matrix')
+tfidf_parser.add_argument('save_path', help='path to the index directory')
+
+pop_parser = subparsers.add_parser('popularity', help='convert json popularity dictionary to memory-mapped table')
+pop_parser.add_argument('pop_dict_path', help='path to json file with article title to article popularity map')
+pop_parser.add_argument('save_path', help='path to the table directory')
+
+kb_parser = subparsers.add_parser('kb', help='convert pickled knowledge base to memory-mapped columnar format')
+kb_parser.add_argument('pickle_path', help='path to the pickled knowledge base')
+kb_parser.add_argument('save_path', help='path to the knowledge base directory')
+kb_parser.add_argument('--label-rel', default='name_en', help='relation of entities with their labels')
+
+conn_parser = subparsers.add_parser('connections', help='build memory-mapped index of connections between entities')
+conn_parser.add_argument('kb_filename', help='path to the knowledge base in HDT format')
+conn_parser.add_argument('entities_database_filename', help='path to the database with the inverted index')
+conn_parser.add_argument('save_path', help='path to the index directory')
+conn_parser.add_argument('--entity-prefixes', nargs='+', default=['http://we'], help='prefixes of entities')
+conn_parser.add_argument('--no-type-prefix', default='http://wp', help='prefix of relations to statements')
+conn_parser.add_argument('--statement-prefix', default='http://wps', help='prefix of statement relations')
+conn_parser.add_argument('--qualifier-prefix', default='http://wpq', help='prefix of qualifier relations')
+
+descr_parser = subparsers.add_parser('descriptions', help='encode descriptions of entities of the entity linking '
+                                                          'database')
+descr_parser.add_argument('config_path', help='path to the entity linking config')
+descr_parser.add_argument('save_path', help='path to the description embeddings directory')
+
+
+def main():
+    args = parser.parse_args()
+    if args.command == 'tfidf':
+        from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import convert_npz_to_mmap
+        convert_npz_to_mmap(args.npz_path, args.save_path)
+    elif args.command == 'popularity':
+        from deeppavlov.models.doc_retrieval.pop_ranker import convert_pop_dict
+        convert_pop_dict(args.pop_dict_path, args.save_path)
+    elif args.command == 'kb':
+        from deeppavlov.models.kbqa.columnar_kb import convert_pickle_kb
+        convert_pickle_kb(args.pickle_path, args.save_path, args.label_rel)
+    elif args.command == 'connections':
+        from deeppavlov.models.entity_extraction.connections_index import build_connections_index
+        build_connections_index(args.kb_filename, args.entities_database_filename, args.save_path,
+                                {"entity": args.entity_prefixes,
+                                 "rels": {"no_type": args.no_type_prefix,
+                                          "statement": args.statement_prefix,
+                                          "qualifier": args.qualifier_prefix}})
+    elif args.command == 'descriptions':
+        from deeppavlov.models.torch_bert.torch_transformers_el_ranker import build_descr_embeddings
+        build_descr_embeddings(args.config_path, args.save_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# Copyright 2022 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from logging import getLogger
+from typing import Any, List, NamedTuple, Optional
+
+from deeppavlov.core.common.chainer import Chainer
+
+log = getLogger(__name__)
+
+
+class _PendingRequest(NamedTuple):
+    model_args: List[list]
+    batch_size: int
+    future: asyncio.Future
+
+
+class RequestBatcher:
+    """Coalesces concurrent model requests into a single batch.
+
+    Incoming requests are queued and merged into one batch until either ``max_batch_size`` samples are collected or
+    ``max_wait_ms`` milliseconds have passed since the first request of the batch arrived. The model is called once
+    for the whole batch and the prediction is split back between waiting requests. Batches are inferred one at a time,
+    so requests arriving while the model is busy are collected into the next batch. If the batch inference fails,
+    requests of the batch are inferred one by one, so every request gets its own result or error.
+
+    Args:
+        model: Model to infer.
+        max_batch_size: Maximum number of samples in a merged batch. A single request larger than ``max_batch_size``
+            is inferred as a separate batch.
+        max_wait_ms: Maximum time in milliseconds to wait for additional requests before the batch inference.
+
+    """
+
+    def __init__(self, model: Chainer, max_batch_size: int, max_wait_ms: float = 5) -> None:
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def __call__(self, model_args: List[list]) -> Any:
+        """Adds request to the queue and waits for its prediction.
+
+        Args:
+            model_args: Model arguments of the request. All arguments must have the same length.
+
+        Returns:
+            The request prediction in the same format as returned by ``model(*model_args)``.
+
+        """
+        loop = asyncio.get_event_loop()
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._batching_loop())
+        future = loop.create_future()
+        await self._queue.put(_PendingRequest(model_args, len(model_args[0]), future))
+        return await future
+
+    async def _batching_loop(self) -> None:
+        loop = asyncio.get_event_loop()
+        carried_over: Optional[_PendingRequest] = None
+        while True:
+            batch = [carried_over or await self._queue.get()]
+            carried_over = None
+            batch_size = batch[0].batch_size
+            deadline = loop.time() + self.max_wait
+            while batch_size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if batch_size + request.batch_size > self.max_batch_size:
+                    carried_over = request
+                    break
+                batch.append(request)
+                batch_size += request.batch_size
+
+            batch = [request for request in batch if not request.future.cancelled()]
+            if not batch:
+                continue
+            try:
+                predictions = await loop.run_in_executor(None, self._infer, batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    log.exception('Request inference failed')
+                    self._set_exception(batch[0], e)
+                    continue
+                # a single malformed request should not fail other requests of the batch
+                log.exception(f'Inference of a batch of {len(batch)} requests failed, inferring them one by one')
+                for request in batch:
+                    try:
+                        prediction, = await loop.run_in_executor(None, self._infer, [request])
+                    except Exception as request_error:
+                        log.exception('Request inference failed')
+                        self._set_exception(request, request_error)
+                    else:
+                        self._set_result(request, prediction)
+                continue
+            for request, prediction in zip(batch, predictions):
+                self._set_result(request, prediction)
+
+    @staticmethod
+    def _set_result(request: _PendingRequest, prediction: Any) -> None:
+        if not request.future.done():
+            request.future.set_result(prediction)
+
+    @staticmethod
+    def _set_exception(request: _PendingRequest, error: Exception) -> None:
+        if not request.future.done():
+            request.future.set_exception(error)
+
+    def _infer(self, batch: List[_PendingRequest]) -> List[Any]:
+        merged_args = [[] for _ in batch[0].model_args]
+        for request in batch:
+            for merged_arg, arg in zip(merged_args, request.model_args):
+                merged_arg.extend(arg)
+
+        log.debug(f'Inferring {len(batch)} requests as a batch of {len(merged_args[0])} samples')
+        prediction = self.model(*merged_args)
+        single_output = len(self.model.out_params) == 1
+        if single_output:
+            prediction = [prediction]
+
+        results = []
+        start = 0
+        for request in batch:
+            end = start + request.batch_size
+            result = [output[start:end] for output in prediction]
+            results.append(result[0] if single_output else result)
+            start = end
+        return results
@@ -13,20 +13,39 @@
 # limitations under the License.
 
 import time
-from typing import Tuple
+from typing import Iterator, Tuple
 
 from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
 from starlette.responses import Response
 from starlette.types import ASGIApp
 
+from deeppavlov.core.common.cache import iter_caches
+
 REQUESTS_COUNT = Counter('http_requests_count', 'Number of processed requests', ['endpoint', 'status_code'])
 REQUESTS_LATENCY = Histogram('http_requests_latency_seconds', 'Request latency histogram', ['endpoint'])
 REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Number of requests currently being processed', ['endpoint'])
 
 
+class CacheCollector:
+    """Collects hit and miss counters of the component caches."""
+
+    def collect(self) -> Iterator[CounterMetricFamily]:
+        hits = CounterMetricFamily('component_cache_hits', 'Number of component cache hits', labels=['cache'])
+        misses = CounterMetricFamily('component_cache_misses', 'Number of component cache misses', labels=['cache'])
+        for cache in iter_caches():
+            hits.add_metric([cache.name], cache.hits)
+            misses.add_metric([cache.name], cache.misses)
+        yield hits
+        yield misses
+
+
+REGISTRY.register(CacheCollector())
+
+
 def metrics(request: Request) -> Response:
     return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
 
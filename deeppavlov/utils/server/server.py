@@ -18,7 +18,7 @@ from collections import namedtuple
 from logging import getLogger
 from pathlib import Path
 from ssl import PROTOCOL_TLSv1_2
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 import uvicorn
 from fastapi import Body, FastAPI, HTTPException
@@ -37,6 +37,7 @@ from deeppavlov.core.common.log import log_config
 from deeppavlov.core.common.paths import get_settings_path
 from deeppavlov.core.data.utils import check_nested_dict_keys, jsonify_data
 from deeppavlov.utils.connector import DialogLogger
+from deeppavlov.utils.server.batching import RequestBatcher
 from deeppavlov.utils.server.metrics import metrics, PrometheusMiddleware
 
 SERVER_CONFIG_PATH = get_settings_path() / 'server_config.json'
@@ -131,7 +132,7 @@ def redirect_root_to_docs(fast_app: FastAPI, func_name: str, endpoint: str, meth
         return response
 
 
-def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
+def parse_payload(payload: Dict[str, Optional[List]]) -> List[List]:
     model_args = payload.values()
     dialog_logger.log_in(payload)
     error_msg = None
@@ -149,10 +150,10 @@ def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
         raise HTTPException(status_code=400, detail=error_msg)
 
     batch_size = next(iter(lengths))
-    model_args = [arg or [None] * batch_size for arg in model_args]
+    return [arg or [None] * batch_size for arg in model_args]
 
-    prediction = model(*model_args)
 
+def format_prediction(model: Chainer, prediction: Any) -> List:
     # TODO: remove in 1.2.0
     if COMPATIBILITY_MODE is not False:
         if len(model.out_params) == 1:
@@ -164,6 +165,12 @@ def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
     return result
 
 
+def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
+    model_args = parse_payload(payload)
+    prediction = model(*model_args)
+    return format_prediction(model, prediction)
+
+
 def test_interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List[str]:
     model_args = [arg or ["Test string."] for arg in payload.values()]
     try:
@@ -190,6 +197,11 @@ def start_model_server(model_config: Path,
 
     model = build_model(model_config)
 
+    batching_params = server_params.get('batching') or {}
+    batcher = None
+    if batching_params.get('max_batch_size'):
+        batcher = RequestBatcher(model, batching_params['max_batch_size'], batching_params.get('max_wait_ms', 5))
+
     def batch_decorator(cls: ModelMetaclass) -> ModelMetaclass:
         cls.__annotations__ = {arg_name: list for arg_name in model_args_names}
         cls.__fields__ = {arg_name: ModelField(name=arg_name, type_=list, class_validators=None,
@@ -207,6 +219,9 @@ def start_model_server(model_config: Path,
 
     @app.post(model_endpoint, summary='A model endpoint')
     async def answer(item: Batch = Body(..., example=model_endpoint_post_example)) -> List:
+        if batcher is not None:
+            prediction = await batcher(parse_payload(item.dict()))
+            return format_prediction(model, prediction)
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, interact, model, item.dict())
 
@@ -30,14 +30,19 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
         load_path: a path to local DB file
         join_docs: whether to join extracted docs with ' ' or not
         shuffle: whether to shuffle data or not
+        mmap_size: max number of bytes of the DB file to access using memory-mapped I/O
+        cache_size: SQLite page cache size of a connection in KiB
+        docs_cache_size: a number of documents to keep in LRU cache, documents aren't cached if 0
 
     Attributes:
         join_docs: whether to join extracted docs with ' ' or not
 
     """
 
-    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, **kwargs) -> None:
-        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle)
+    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, mmap_size: int = 2 ** 30,
+                 cache_size: int = 65536, docs_cache_size: int = 0, **kwargs) -> None:
+        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle, mmap_size=mmap_size,
+                                    cache_size=cache_size, docs_cache_size=docs_cache_size)
         self.join_docs = join_docs
 
     def __call__(self, doc_ids: Optional[List[List[Any]]] = None, *args, **kwargs) -> List[Union[str, List[str]]]:
@@ -54,8 +59,9 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
             logger.warning('No doc_ids are provided in WikiSqliteVocab, return all docs')
             doc_ids = [self.get_doc_ids()]
 
+        flat_contents = iter(self.get_docs_content([doc_id for ids in doc_ids for doc_id in ids]))
         for ids in doc_ids:
-            contents = [self.get_doc_content(doc_id) for doc_id in ids]
+            contents = [next(flat_contents) for _ in ids]
             if self.join_docs:
                 contents = ' '.join(contents)
             all_contents.append(contents)
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from deeppavlov.core.common import cache
+from deeppavlov.core.common.cache import CachedComponent, LRUCache, SQLiteCache, WeightedLRUCache, get_cache
+from deeppavlov.core.common.errors import ConfigError
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(cache, 'time', fake_time)
+    return fake_time
+
+
+def test_lru_eviction():
+    lru = LRUCache(size=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+    assert len(lru) == 2
+    assert lru.get('b') is None
+    assert (lru.get('a'), lru.get('c')) == (1, 3)
+    assert (lru.hits, lru.misses) == (3, 1)
+
+
+def test_lru_ttl(clock):
+    lru = LRUCache(ttl=10)
+    lru.set('a', 1)
+    clock.now += 5
+    lru.set('b', 2)
+    clock.now += 6
+    assert lru.get('a', 'expired') == 'expired'
+    assert lru.get('b') == 2
+    assert len(lru) == 1
+
+
+def test_sqlite_eviction(tmp_path, clock):
+    sqlite_cache = SQLiteCache(tmp_path / 'cache.db', size=2)
+    for i, key in enumerate('abc'):
+        clock.now += 1
+        sqlite_cache.set(key, [i])
+    assert len(sqlite_cache) == 2
+    assert sqlite_cache.get('a') is None
+    assert sqlite_cache.get('c') == [2]
+
+    reopened = SQLiteCache(tmp_path / 'cache.db', size=2)
+    assert (reopened.get('b'), reopened.get('c')) == ([1], [2])
+
+
+def test_sqlite_ttl(tmp_path, clock):
+    sqlite_cache = SQLiteCache(tmp_path / 'cache.db', ttl=10)
+    sqlite_cache.set('a', 1)
+    clock.now += 5
+    sqlite_cache.set('b', 2)
+    clock.now += 6
+    assert sqlite_cache.get('a', 'expired') == 'expired'
+    assert sqlite_cache.get('b') == 2
+    clock.now += 5
+    sqlite_cache.set('c', 3)
+    assert len(sqlite_cache) == 1
+
+
+def test_get_cache():
+    assert isinstance(get_cache({'type': 'lru', 'size': 10}), LRUCache)
+    with pytest.raises(ConfigError):
+        get_cache({'type': 'redis'})
+
+
+def test_cached_component():
+    calls = []
+
+    def component(texts, lengths):
+        calls.append(list(texts))
+        return [text.upper() for text in texts], np.array(lengths) * 2
+
+    cached = CachedComponent(component, n_outputs=2, cache=LRUCache())
+    texts, lengths = cached(['a', 'b'], [1, 2])
+    assert texts == ['A', 'B'] and lengths.tolist() == [2, 4]
+
+    texts, lengths = cached(['b', 'c', 'a'], [2, 3, 1])
+    assert calls == [['a', 'b'], ['c']]
+    assert texts == ['B', 'C', 'A'] and lengths.tolist() == [4, 6, 2]
+
+    texts, lengths = cached(['c'], [3])
+    assert len(calls) == 2
+    assert isinstance(lengths, np.ndarray)
+
+    with pytest.raises(ConfigError):
+        cached(['a', 'b'], [1])
+
+
+def test_weighted_lru_eviction():
+    lru = WeightedLRUCache(max_weight=5)
+    lru.set('a', [1, 2])
+    lru.set('b', [3, 4])
+    assert lru.get('a') == [1, 2]
+    lru.set('c', [5, 6])
+    assert lru.get('b') is None
+    assert lru.weight == 4
+    lru.set('a', [1])
+    assert lru.weight == 3
+    lru.set('d', list(range(6)))
+    assert lru.get('d') is None
+    assert (lru.get('a'), lru.get('c'), lru.weight) == ([1], [5, 6], 3)
+
+
+def test_weighted_lru_ttl(clock):
+    lru = WeightedLRUCache(max_weight=5, ttl=10)
+    lru.set('a', [1, 2])
+    clock.now += 11
+    assert lru.get('a') is None
+    assert lru.weight == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from deeppavlov.core.common.file import save_pickle
+from deeppavlov.models.kbqa.columnar_kb import ColumnarKB, convert_pickle_kb, uncompress_triplets
+from deeppavlov.models.kbqa.wiki_parser import WikiParser
+
+DOCUMENT = {
+    "Q1": {"forw": [["P31", "Q5"], ["P31", "Q6"], ["name_en", "Moscow"], ["P17", "Q2"], ["P31", "Q7"]],
+           "backw": [["P36", "Q2"]]},
+    "Q2": {"forw": "P36  Q1\tname_en  Russia  Россия\tP31  Q6"},
+    "Q3": {"backw": [["P17", "Q1", "Q4"], ["P17", "Q5"]]},
+    "Q4": {"forw": [["name_en", "Moscow"]]},
+}
+
+
+@pytest.fixture
+def kbs(tmp_path):
+    save_pickle(DOCUMENT, tmp_path / "kb.pickle")
+    convert_pickle_kb(tmp_path / "kb.pickle", tmp_path / "kb")
+    return tmp_path / "kb.pickle", tmp_path / "kb"
+
+
+def pairs(triplets):
+    return [(rel, obj) for rel, *objects in uncompress_triplets(triplets) for obj in objects]
+
+
+def test_triplets_match_pickle(kbs):
+    kb = ColumnarKB(kbs[1])
+    assert set(kb) == set(DOCUMENT) and len(kb) == len(DOCUMENT)
+    for entity, entity_triplets in DOCUMENT.items():
+        assert kb[entity].keys() == entity_triplets.keys()
+        for direction, triplets in entity_triplets.items():
+            assert pairs(kb[entity][direction]) == pairs(triplets)
+    assert "Q5" not in kb and "Moscow" not in kb and kb.get("Q8") is None
+
+
+def test_consecutive_rows_are_merged(kbs):
+    kb = ColumnarKB(kbs[1])
+    assert kb["Q1"]["forw"] == [["P31", "Q5", "Q6"], ["name_en", "Moscow"], ["P17", "Q2"], ["P31", "Q7"]]
+    assert kb["Q3"]["backw"] == [["P17", "Q1", "Q4", "Q5"]]
+    assert kb["Q2"]["forw"] == [["P36", "Q1"], ["name_en", "Russia", "Россия"], ["P31", "Q6"]]
+
+
+def test_labels_match_pickle(kbs):
+    pickle_parser = WikiParser(wiki_filename=str(kbs[0]), file_format="pickle", cache_size=0)
+    columnar_parser = WikiParser(wiki_filename=str(kbs[1]), file_format="columnar", cache_size=0)
+    for entity in ["Q1", "Q2", "Q3", "Q4", "Q5", "Q8", "Moscow"]:
+        assert columnar_parser.find_entity_label(entity) == pickle_parser.find_entity_label(entity)
+    assert columnar_parser.find_entity_label("Q2") == "Russia"
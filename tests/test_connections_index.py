@@ -0,0 +1,75 @@
+import sqlite3
+from itertools import combinations
+from types import SimpleNamespace
+
+import pytest
+
+from deeppavlov.models.entity_extraction import connections_index
+from deeppavlov.models.entity_extraction.connections_index import (ConnectionsIndex, build_connections_index,
+                                                                    find_connected_entities)
+
+ENT = "http://we"
+PREFIXES = {"entity": [ENT], "rels": {"no_type": "http://wp", "statement": "http://wps", "qualifier": "http://wpq"}}
+TRIPLES = [
+    (f"{ENT}/Q1", "http://wpd/P17", f"{ENT}/Q2"),
+    (f"{ENT}/Q1", "http://wpd/P31", f"{ENT}/Q3"),
+    (f"{ENT}/Q1", "http://wp/P39", "http://ws/S1"),
+    ("http://ws/S1", "http://wps/P39", f"{ENT}/Q4"),
+    ("http://ws/S1", "http://wpq/P580", f"{ENT}/Q5"),
+    ("http://ws/S1", "http://wpd/P1", f"{ENT}/Q6"),
+    (f"{ENT}/Q2", "http://wpd/P36", f"{ENT}/Q1"),
+    (f"{ENT}/Q5", "http://wpd/P279", f"{ENT}/Q1"),
+    (f"{ENT}/Q6", "http://wpd/P17", f"{ENT}/Q2"),
+    (f"{ENT}/Q6", "http://wpd/P1", '"Q7"@en'),
+    (f"{ENT}/Q7", "http://wpd/P361", f"{ENT}/Q6"),
+]
+LINKED_ENTITIES = ["Q1", "Q2", "Q3", "Q5", "Q6", "Q7"]
+
+
+class StubDocument:
+    """HDT document stub which searches triples in a list."""
+
+    def __init__(self, triples):
+        self.triples = triples
+
+    def search_triples(self, subj, rel, obj):
+        found = [triple for triple in self.triples
+                 if all(not elem or elem == triple_elem for elem, triple_elem in zip((subj, rel, obj), triple))]
+        return iter(found), len(found)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(connections_index, "HDTDocument", lambda filename: StubDocument(TRIPLES))
+    conn = sqlite3.connect(str(tmp_path / "entities.db"))
+    conn.execute("CREATE TABLE inverted_index(title text, entity_id text);")
+    conn.executemany("INSERT INTO inverted_index VALUES (?, ?);", [(entity_id.lower(), entity_id)
+                                                                   for entity_id in LINKED_ENTITIES * 2])
+    conn.commit()
+    conn.close()
+    build_connections_index("wikidata.hdt", tmp_path / "entities.db", tmp_path / "index", PREFIXES)
+    return ConnectionsIndex(tmp_path / "index")
+
+
+def kb_pairs(entity_ids):
+    kb = StubDocument(TRIPLES)
+    return [(entity_id1, entity_id2) for entity_id2 in entity_ids
+            for entity_id1 in find_connected_entities(kb, entity_id2, PREFIXES) if entity_id1 in entity_ids]
+
+
+def test_find_connected_pairs_matches_kb(index):
+    assert sorted(index.find_connected_pairs(["Q1", "Q4", "Q5", "Q6"])) == [("Q4", "Q1"), ("Q5", "Q1")]
+    for n in range(len(LINKED_ENTITIES) + 1):
+        for entity_ids in combinations(LINKED_ENTITIES + ["Q4", "Q8"], n):
+            pairs = index.find_connected_pairs(list(entity_ids))
+            assert sorted(pairs) == sorted(kb_pairs(entity_ids))
+
+
+def test_rank_by_connections_matches_kb(index):
+    EntityLinker = pytest.importorskip("deeppavlov.models.entity_extraction.entity_linking").EntityLinker
+    ids_list = [["Q1", "Q8"], ["Q2", "Q6"], ["Q7", "Q5", "Q3"], ["Q4"]]
+    for num_entities in (1, 2, 3):
+        linkers = [SimpleNamespace(connections_index=connections, kb=StubDocument(TRIPLES), prefixes=PREFIXES,
+                                   num_entities_for_conn_ranking=num_entities) for connections in (index, None)]
+        scores = [EntityLinker.rank_by_connections(linker, ids_list) for linker in linkers]
+        assert scores[0] == scores[1]
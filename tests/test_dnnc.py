@@ -0,0 +1,62 @@
+import numpy as np
+
+from deeppavlov.models.classifiers.dnnc_proba2labels import Proba2Labels
+from deeppavlov.models.preprocessors.dnnc_preprocessor import PairGenerator
+
+EMBEDDINGS = {
+    'cat': [1.0, 0.0], 'tabby': [0.95, 0.05], 'kitten': [0.9, 0.1], 'dog': [0.0, 1.0], 'puppy': [0.1, 0.9], 'fish': [0.7, 0.7]
+}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [EMBEDDINGS[text] for text in texts]
+
+
+DATASET = [['kitten', 'feline'], ['puppy', 'canine'], ['fish', 'other'], ['cat', 'feline']]
+
+
+def test_top_k_support_selection():
+    embedder = CountingEmbedder()
+    generator = PairGenerator(top_k=1, embedder=embedder)
+    texts, hypotheses, premises, labels, pair_text_ids = generator(['cat', 'dog'], DATASET)
+    assert premises == ['cat', 'dog']
+    assert hypotheses == ['cat', 'puppy']
+    assert labels == ['feline', 'canine']
+    # the support example equal to the classified text is not used for classification
+    assert pair_text_ids == [-1, 1]
+
+    generator(['dog'], DATASET)
+    support_calls = [call for call in embedder.calls if call == [text for text, _ in DATASET]]
+    assert len(support_calls) == 1
+
+
+def test_pair_text_ids_match_text_comparison():
+    texts = ['tabby', 'dog']
+    for top_k, embedder in ((None, None), (2, CountingEmbedder())):
+        generator = PairGenerator(bidirectional=True, top_k=top_k, embedder=embedder)
+        texts, hypotheses, premises, labels, pair_text_ids = generator(texts, DATASET)
+        scores = np.random.RandomState(0).rand(len(hypotheses)).tolist()
+        proba2labels = Proba2Labels()
+        found_ids, _ = proba2labels.find_pair_text_ids(texts, premises, hypotheses)
+        assert pair_text_ids == found_ids.tolist()
+        assert proba2labels(scores, texts, premises, hypotheses, labels, pair_text_ids) == \
+            proba2labels(scores, texts, premises, hypotheses, labels)
+
+
+def test_prediction_does_not_depend_on_other_texts():
+    dataset = [['b', 'L1'], ['c', 'L2']]
+    generator, proba2labels = PairGenerator(), Proba2Labels()
+    predictions = []
+    for texts in (['a'], ['a', 'b'], ['b', 'a']):
+        texts, hypotheses, premises, labels, pair_text_ids = generator(texts, dataset)
+        scores = [1.0 if hypothesis == 'b' else 0.5 for hypothesis in hypotheses]
+        y_pred = proba2labels(scores, texts, premises, hypotheses, labels, pair_text_ids)
+        assert y_pred == proba2labels(scores, texts, premises, hypotheses, labels)
+        predictions.append(dict(zip(texts, y_pred)))
+    assert [prediction['a'] for prediction in predictions] == ['L1', 'L1', 'L1']
+    assert predictions[1]['b'] == predictions[2]['b'] == 'L2'
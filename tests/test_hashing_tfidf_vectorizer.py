@@ -0,0 +1,83 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer, hash_
+
+DOCS = ['the cat sat on the mat', 'the dog ate the cat', '', 'a bird sat on the dog', 'cat cat cat',
+        'mat and dog and bird']
+
+
+class StubTokenizer:
+    ngram_range = [1, 2]
+
+    def __call__(self, docs):
+        for doc in docs:
+            tokens = doc.split()
+            yield tokens + [' '.join(bigram) for bigram in zip(tokens, tokens[1:])]
+
+
+def fit_vectorizer(path, doc_ids, num_workers=1):
+    vectorizer = HashingTfIdfVectorizer(StubTokenizer(), hash_size=2 ** 10, save_path=str(path),
+                                        load_path=str(path), mode='train', num_workers=num_workers)
+    vectorizer.fit(DOCS, doc_ids, list(range(len(DOCS))))
+    vectorizer.save()
+    return HashingTfIdfVectorizer(StubTokenizer(), load_path=str(path))
+
+
+@pytest.mark.parametrize('doc_ids', [[f'doc {i}' for i in range(len(DOCS))], [10 * i for i in range(len(DOCS))]])
+def test_mmap_index_matches_npz(tmp_path, doc_ids):
+    npz_vectorizer = fit_vectorizer(tmp_path / 'tfidf.npz', doc_ids)
+    mmap_vectorizer = fit_vectorizer(tmp_path / 'tfidf', doc_ids)
+
+    assert (npz_vectorizer.tfidf_matrix != mmap_vectorizer.tfidf_matrix).nnz == 0
+    assert np.array_equal(npz_vectorizer.term_freqs, mmap_vectorizer.term_freqs)
+    assert (mmap_vectorizer.ngram_range, mmap_vectorizer.hash_size) == (npz_vectorizer.ngram_range, 2 ** 10)
+    assert dict(mmap_vectorizer.doc_index) == npz_vectorizer.doc_index
+    assert dict(mmap_vectorizer.index2doc) == npz_vectorizer.index2doc
+    assert [mmap_vectorizer.index2doc[i] for i in range(len(DOCS))] == doc_ids
+    missing_id = '10' if isinstance(doc_ids[0], int) else 10
+    assert missing_id not in mmap_vectorizer.doc_index
+    queries = ['cat on the mat', 'unknown words', '']
+    assert (npz_vectorizer(queries) != mmap_vectorizer(queries)).nnz == 0
+
+
+def test_mmap_index_rejects_mixed_ids(tmp_path):
+    with pytest.raises(TypeError):
+        fit_vectorizer(tmp_path / 'tfidf', ['doc'] + list(range(1, len(DOCS))))
+
+
+def count_matrix_per_document(tokenizer, hash_size):
+    """Count matrix made by counting hashes of every document separately, as it was done before count_hashes."""
+    rows, cols, data = [], [], []
+    for col, ngrams in enumerate(tokenizer(DOCS)):
+        counts = Counter(hash_(ngram, hash_size) for ngram in ngrams)
+        rows += counts.keys()
+        data += counts.values()
+        cols += [col] * len(counts)
+    return csr_matrix((data, (rows, cols)), shape=(hash_size, len(DOCS)))
+
+
+@pytest.mark.parametrize('num_workers', [1, 2, 4])
+def test_fit_matches_per_document_counting(tmp_path, num_workers):
+    vectorizer = fit_vectorizer(tmp_path / 'tfidf.npz', [f'doc {i}' for i in range(len(DOCS))], num_workers)
+    tfidf_matrix, term_freqs = HashingTfIdfVectorizer.get_tfidf_matrix(
+        count_matrix_per_document(StubTokenizer(), 2 ** 10))
+    assert (vectorizer.tfidf_matrix != tfidf_matrix).nnz == 0
+    assert np.array_equal(vectorizer.term_freqs, term_freqs)
+
+
+def test_partial_fit_with_workers(tmp_path):
+    tfidf_matrices = []
+    for num_workers in (1, 3):
+        path = tmp_path / f'tfidf_{num_workers}.npz'
+        vectorizer = HashingTfIdfVectorizer(StubTokenizer(), hash_size=2 ** 10, save_path=str(path),
+                                            load_path=str(path), mode='train', num_workers=num_workers)
+        for start in range(0, len(DOCS), 4):
+            nums = list(range(start, min(start + 4, len(DOCS))))
+            vectorizer.partial_fit(DOCS[start:start + 4], [f'doc {i}' for i in nums], nums)
+        vectorizer.save()
+        tfidf_matrices.append(HashingTfIdfVectorizer(StubTokenizer(), load_path=str(path)).tfidf_matrix)
+    assert (tfidf_matrices[0] != tfidf_matrices[1]).nnz == 0
@@ -0,0 +1,75 @@
+import re
+import threading
+
+import pytest
+
+from deeppavlov.models.entity_extraction.ner_chunker import NerChunkModel
+
+
+class StubNer:
+    """Tags every word matching the regular expression."""
+
+    def __init__(self, pattern, tag):
+        self.pattern = re.compile(pattern)
+        self.tag = tag
+        self.threads = set()
+
+    def __call__(self, text_batch):
+        self.threads.add(threading.get_ident())
+        tokens_batch, offsets_batch, tags_batch = [], [], []
+        for text in text_batch:
+            matches = list(re.finditer(r'\w+', text))
+            tokens_batch.append([match.group() for match in matches])
+            offsets_batch.append([match.span() for match in matches])
+            tags_batch.append([self.tag if self.pattern.fullmatch(match.group()) else 'O' for match in matches])
+        return tokens_batch, offsets_batch, tags_batch, [[1.0] * len(tags) for tags in tags_batch]
+
+
+def stub_parser(tokens_batch, tags_batch, probas_batch):
+    substr_batch, positions_batch, entity_probas_batch = [], [], []
+    for tokens, tags in zip(tokens_batch, tags_batch):
+        substr, positions, probas = {}, {}, {}
+        for i, (token, tag) in enumerate(zip(tokens, tags)):
+            if tag != 'O':
+                substr.setdefault(tag, []).append(token)
+                positions.setdefault(tag, []).append([i])
+                probas.setdefault(tag, []).append(1.0)
+        substr_batch.append(substr)
+        positions_batch.append(positions)
+        entity_probas_batch.append(probas)
+    return substr_batch, positions_batch, entity_probas_batch
+
+
+CHUNKS = [['Ivan lives in Moscow.', 'Anna went to rostow.'], ['Then Petr came.']]
+NUMS = [[0, 1], [1]]
+SENTENCES_OFFSETS = [[[(0, 21)], [(0, 20)]], [[(0, 15)]]]
+SENTENCES = [[[chunk] for chunk in chunks] for chunks in CHUNKS]
+
+
+def make_model(**kwargs):
+    return NerChunkModel(ner=StubNer(r'[A-Z]\w+', 'PER'), ner_parser=stub_parser,
+                         ner2=StubNer(r'\w+ow', 'LOC'), ner_parser2=stub_parser, **kwargs)
+
+
+@pytest.mark.parametrize('parallel_ensemble', [False, True])
+@pytest.mark.parametrize('batch_size', [None, 1, 2, 5])
+def test_ensemble_modes_give_same_outputs(parallel_ensemble, batch_size):
+    model = make_model(parallel_ensemble=parallel_ensemble, batch_size=batch_size)
+    ner, ner2 = model.ner, model.ner2
+    outputs = model(CHUNKS, NUMS, SENTENCES_OFFSETS, SENTENCES)
+    model.destroy()
+    entity_substr, entity_offsets, _, tags, sentences_offsets, sentences, _ = outputs
+    assert entity_substr == [['ivan', 'moscow'], ['anna', 'rostow', 'then', 'petr']]
+    assert tags == [['PER', 'PER'], ['PER', 'LOC', 'PER', 'PER']]
+    assert entity_offsets == [[(0, 4), (14, 20)], [(0, 4), (13, 19), (21, 25), (26, 30)]]
+    assert sentences_offsets == [[(0, 21)], [(0, 20), (21, 36)]]
+    assert sentences == [['Ivan lives in Moscow.'], ['Anna went to rostow.', 'Then Petr came.']]
+    assert outputs == make_model()(CHUNKS, NUMS, SENTENCES_OFFSETS, SENTENCES)
+    assert (ner2.threads != ner.threads) == parallel_ensemble
+
+
+def test_empty_input():
+    outputs = make_model()([[]], [[]], [[]], [[]])
+    assert outputs == ([[]],) * 7
+    outputs[0][0].append('entity')
+    assert outputs[1] == [[]]
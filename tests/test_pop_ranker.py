@@ -0,0 +1,48 @@
+import json
+
+import joblib
+import pytest
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import LogisticRegression
+
+from deeppavlov.models.doc_retrieval.pop_ranker import PopRanker, convert_pop_dict
+
+
+@pytest.fixture
+def rankers(tmp_path):
+    pop_dict = {'Moscow': 10.0, 'Москва': 4.0, 'Paris': 7.0, '42': 1.0}
+    with open(tmp_path / 'pop_dict.json', 'w') as fl:
+        json.dump(pop_dict, fl)
+    convert_pop_dict(tmp_path / 'pop_dict.json', tmp_path / 'pop_table')
+    clf = LogisticRegression().fit([[0, 0, 0], [1, 1, 1], [1, 10, 10], [0, 1, 0]], [0, 1, 1, 0])
+    joblib.dump(clf, tmp_path / 'clf.joblib')
+    return [PopRanker(pop_dict_path=str(tmp_path / path), load_path=str(tmp_path / 'clf.joblib'))
+            for path in ('pop_dict.json', 'pop_table')]
+
+
+def test_table_matches_dict(rankers):
+    dict_ranker, table_ranker = rankers
+    ids = ['Moscow', 'Москва', 'Paris', '42', 'Berlin', 42, None]
+    assert [table_ranker.get_popularity(idx) for idx in ids] == [dict_ranker.get_popularity(idx) for idx in ids]
+    assert table_ranker.get_popularity(42) == table_ranker.mean_pop
+
+    doc_ids, doc_scores = [['Paris', 'Berlin', 'Moscow'], [], [42]], [[0.5, 0.9, 0.5], [], [0.1]]
+    assert table_ranker(doc_ids, doc_scores) == dict_ranker(doc_ids, doc_scores)
+
+
+class StubVectorizer:
+    def __init__(self, doc_ids):
+        self.tfidf_matrix = csr_matrix((1, len(doc_ids) + 1))
+        self.index2doc = dict(enumerate(doc_ids))
+
+
+def test_doc_indices_match_doc_ids(rankers):
+    doc_ids = ['Berlin', 'Paris', 'Москва', 42, 'Moscow']
+    batch_indices = [[4, 1, 0], [], [3, 2]]
+    batch_doc_ids = [[doc_ids[i] for i in indices] for indices in batch_indices]
+    batch_scores = [[0.5, 0.9, 0.5], [], [0.1, 0.3]]
+    for ranker in rankers:
+        expected = ranker(batch_doc_ids, batch_scores)
+        ranker.vectorizer = StubVectorizer(doc_ids)
+        assert ranker(batch_doc_ids, batch_scores, batch_indices) == expected
+        assert ranker.doc_popularities.tolist() == [ranker.get_popularity(idx) for idx in doc_ids + [None]]
@@ -123,6 +123,9 @@ PARAMS = {
         ("classifiers/topics_distilbert_base_uncased.json", "classifiers", ('TI',)): [ONE_ARGUMENT_INFER_CHECK],
         ("classifiers/few_shot_roberta.json", "classifiers", ('IP',)): [
             ('Dummy text', ['Dummy text Dummy text', 'Dummy class'], ('Dummy class',))
+        ],
+        ("classifiers/few_shot_roberta_top_k.json", "classifiers", ('IP',)): [
+            ('Dummy text', [f'Dummy text {i} Dummy text', 'Dummy class'], ('Dummy class',)) for i in range(12)
         ]
     },
     "distil": {
@@ -584,6 +587,29 @@ def test_crossvalidation():
     shutil.rmtree(str(download_path), ignore_errors=True)
 
 
+def test_ner_chunk_model_ensemble_modes():
+    config = json.loads((src_dir / 'kbqa' / 'kbqa_cq_ru.json').read_text(encoding='utf-8'))
+    ner_components = {'question_sign_checker', 'ner_chunker', 'entity_detection_parser', 'ner_chunk_model'}
+    config['chainer']['pipe'] = [component for component in config['chainer']['pipe']
+                                 if component.get('class_name') in ner_components]
+    config['chainer'].pop('in_y')
+    config['chainer']['out'] = config['chainer']['pipe'][-1]['out']
+    ner_paths = {config['metadata']['variables']['NER_PATH'], config['metadata']['variables']['NER_PATH2']}
+    config['metadata']['download'] = [resource for resource in config['metadata']['download']
+                                      if resource['subdir'] in ner_paths]
+    deep_download(config)
+
+    texts = ['Кто написал «Евгений Онегин»?', 'Кто такой Оксимирон?', '',
+             'Александр Сергеевич Пушкин родился в Москве. ' * 40]
+    outputs = []
+    for parallel_ensemble, batch_size in [(False, None), (True, None), (False, 3), (True, 3)]:
+        config['chainer']['pipe'][-1].update({'parallel_ensemble': parallel_ensemble, 'batch_size': batch_size})
+        model = build_model(config)
+        outputs.append(model(texts))
+        model.destroy()
+    assert all(output == outputs[0] for output in outputs[1:])
+
+
 def test_hashes_existence():
     all_configs = list(src_dir.glob('**/*.json')) + list(test_src_dir.glob('**/*.json'))
     url_root = 'http://files.deeppavlov.ai/'
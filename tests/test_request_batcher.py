@@ -0,0 +1,40 @@
+import asyncio
+
+from deeppavlov.utils.server.batching import RequestBatcher
+
+
+class StubModel:
+    def __init__(self, out_params):
+        self.out_params = out_params
+        self.batches = []
+
+    def __call__(self, texts, numbers):
+        self.batches.append(list(texts))
+        if 'bad' in texts:
+            raise ValueError('bad request')
+        upper = [text.upper() for text in texts]
+        return (upper, [number * 2 for number in numbers]) if len(self.out_params) == 2 else upper
+
+
+async def infer(batcher, requests):
+    return await asyncio.gather(*(batcher(request) for request in requests), return_exceptions=True)
+
+
+def test_requests_are_batched():
+    model = StubModel(['upper', 'doubled'])
+    batcher = RequestBatcher(model, max_batch_size=3, max_wait_ms=100)
+    requests = [[['a'], [1]], [['b', 'c'], [2, 3]], [['d'], [4]]]
+    results = asyncio.run(infer(batcher, requests))
+    assert results == [[['A'], [2]], [['B', 'C'], [4, 6]], [['D'], [8]]]
+    assert model.batches == [['a', 'b', 'c'], ['d']]
+
+
+def test_failed_batch_is_inferred_by_requests():
+    model = StubModel(['upper'])
+    batcher = RequestBatcher(model, max_batch_size=10, max_wait_ms=100)
+    requests = [[['a'], [1]], [['bad'], [2]], [['c', 'd'], [3, 4]]]
+    results = asyncio.run(infer(batcher, requests))
+    assert results[0] == ['A']
+    assert isinstance(results[1], ValueError)
+    assert results[2] == ['C', 'D']
+    assert model.batches == [['a', 'bad', 'c', 'd'], ['a'], ['bad'], ['c', 'd']]
@@ -0,0 +1,39 @@
+import pytest
+import torch
+
+from deeppavlov.models.torch_bert.torch_transformers_squad import decode_spans, window_max
+
+
+def decode_spans_outer(start_probs, end_probs, logits_st, logits_end, window):
+    """Span decoding with the seq_len x seq_len outer product, as it was done before decode_spans."""
+    seq_len = start_probs.size(1)
+    outer = torch.matmul(start_probs.view(*start_probs.size(), 1), end_probs.view(end_probs.size(0), 1, seq_len))
+    outer_logits = torch.exp(logits_st.view(*logits_st.size(), 1) + logits_end.view(logits_end.size(0), 1, seq_len))
+    outer = torch.triu(outer, diagonal=0) - torch.triu(outer, diagonal=window)
+    outer_logits = torch.triu(outer_logits, diagonal=0) - torch.triu(outer_logits, diagonal=window)
+    start_pred = torch.argmax(torch.max(outer, dim=2)[0], dim=1)
+    end_pred = torch.argmax(torch.max(outer, dim=1)[0], dim=1)
+    logits = torch.max(torch.max(outer_logits, dim=2)[0], dim=1)[0]
+    return start_pred, end_pred, logits
+
+
+@pytest.mark.parametrize('seq_len,window', [(1, 1), (7, 1), (7, 3), (7, 7), (32, 5), (32, 13), (64, 44), (64, 0)])
+def test_decode_spans_matches_outer_product(seq_len, window):
+    generator = torch.Generator().manual_seed(seq_len * 100 + window)
+    logits_st = torch.randn(8, seq_len, generator=generator, dtype=torch.float64)
+    logits_end = torch.randn(8, seq_len, generator=generator, dtype=torch.float64)
+    start_probs, end_probs = torch.softmax(logits_st, dim=1), torch.softmax(logits_end, dim=1)
+    expected = decode_spans_outer(start_probs, end_probs, logits_st, logits_end, window)
+    start_pred, end_pred, logits = decode_spans(start_probs, end_probs, logits_st, logits_end, window)
+    assert torch.equal(start_pred, expected[0])
+    assert torch.equal(end_pred, expected[1])
+    assert torch.allclose(logits, expected[2])
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 5, 8, 10])
+def test_window_max(window):
+    values = torch.randn(3, 10, generator=torch.Generator().manual_seed(window))
+    forward = torch.stack([values[:, i:i + window].max(dim=1)[0] for i in range(10)], dim=1)
+    backward = torch.stack([values[:, max(i - window + 1, 0):i + 1].max(dim=1)[0] for i in range(10)], dim=1)
+    assert torch.equal(window_max(values, window), forward)
+    assert torch.equal(window_max(values, window, reverse=True), backward)
@@ -0,0 +1,52 @@
+import json
+import re
+
+import pytest
+
+from deeppavlov.models.kbqa.template_matcher import TemplateMatcher, find_required_literals
+
+
+@pytest.mark.parametrize("pattern,literals", [
+    (r"who is (.*) of (.*)\?", ["who is ", " of ", "?"]),
+    ("what|which", ["wh"]),
+    ("how|why", []),
+    ("(foo|bar) baz", [" baz"]),
+    ("x(abc)?y", ["x", "y"]),
+    ("ab*c", ["a", "c"]),
+    ("ab{0,2}c", ["a", "c"]),
+    ("(ab)+c", ["ab", "c"]),
+    ("(?i)abc", []),
+    ("x(?i:ab)", ["x"]),
+])
+def test_find_required_literals(pattern, literals):
+    assert find_required_literals(pattern) == literals
+
+
+@pytest.mark.parametrize("pattern,strings", [
+    ("(foo|bar) baz", ["foo baz", "bar baz"]),
+    ("x(abc)?y", ["xy", "xabcy"]),
+    ("ab*c", ["ac", "abbc"]),
+    ("(?:what|which) country", ["what country", "which country"]),
+    ("where (?!not)is", ["where is"]),
+])
+def test_required_literals_are_in_matches(pattern, strings):
+    for string in strings:
+        assert re.search(pattern, string)
+        assert all(literal in string for literal in find_required_literals(pattern))
+
+
+def test_match_batch(tmp_path):
+    templates = [
+        {"template": "who is xxx of yyy?", "template_regexp": "who is (.*) of (.*)\\?",
+         "positions_entity_tokens": [1], "positions_type_tokens": [], "positions_unuseful_tokens": [0],
+         "template_len": 12, "relations": [["P1"]], "rel_dirs": ["forw"], "template_type": "2"},
+        {"template": "xxx or yyy", "template_regexp": "(.*) (?:or|and) (.*)",
+         "positions_entity_tokens": [0, 1], "positions_type_tokens": [], "positions_unuseful_tokens": [],
+         "template_len": 4, "relations": [["P2"]], "rel_dirs": ["forw"], "template_type": "3"},
+    ]
+    with open(tmp_path / "templates.json", 'w') as fl:
+        json.dump(templates, fl)
+    matcher = TemplateMatcher(load_path=str(tmp_path), templates_filename="templates.json")
+    questions = ["who is president of russia?", "tea or coffee", "who is president of russia?"]
+    entities = [["russia"], ["tea", "coffee"], ["russia"]]
+    assert matcher.match_batch(questions, entities) == [matcher(q, e) for q, e in zip(questions, entities)]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from deeppavlov.models.doc_retrieval.tfidf_ranker import TfidfRanker, csr_top_k
+
+
+@pytest.mark.parametrize('k', [1, 3, 5, 20])
+def test_csr_top_k_matches_dense(k):
+    random = np.random.RandomState(k)
+    dense = random.permutation(8 * 12).reshape(8, 12).astype(np.float64) + 1
+    dense[random.rand(8, 12) < 0.6] = 0
+    dense[0] = 0
+    indices, scores = csr_top_k(csr_matrix(dense), k)
+    for row, row_indices, row_scores in zip(dense, indices, scores):
+        n_nonzero = min(k, np.count_nonzero(row))
+        expected = np.argsort(-row, kind='stable')[:n_nonzero]
+        assert row_indices[:n_nonzero].tolist() == expected.tolist()
+        assert row_scores.tolist() == row[row_indices].tolist()
+        assert len(row_indices) == min(k, dense.shape[1]) == len(set(row_indices.tolist()))
+        padding = row_indices[n_nonzero:]
+        assert padding.tolist() == sorted(set(range(dense.shape[1])) - set(expected.tolist()))[:len(padding)]
+
+
+def test_csr_top_k_breaks_ties_by_column():
+    data, columns = [2., 1., 2., 1., 2., 3.], [7, 5, 1, 0, 4, 9]
+    shuffled = csr_matrix((data, columns, [0, len(data)]), shape=(1, 10))
+    for k in (1, 2, 3, 4, 6):
+        indices, scores = csr_top_k(shuffled, k)
+        assert indices[0].tolist() == [9, 1, 4, 7, 0, 5][:k]
+        assert scores[0].tolist() == [3., 2., 2., 2., 1., 1.][:k]
+
+
+class StubVectorizer:
+    def __init__(self, tfidf_matrix):
+        self.tfidf_matrix = tfidf_matrix
+        self.index2doc = {i: f'doc {i}' for i in range(tfidf_matrix.shape[1])}
+        self.doc_index = {doc: i for i, doc in self.index2doc.items()}
+
+    def __call__(self, questions):
+        return csr_matrix([[float(char in question) for char in 'abcdefgh'] for question in questions])
+
+
+@pytest.mark.parametrize('active', [True, False])
+def test_ranker_does_not_depend_on_num_workers(active):
+    random = np.random.RandomState(0)
+    tfidf_matrix = csr_matrix(random.randint(0, 3, size=(8, 30)) * (random.rand(8, 30) < 0.3) / 4)
+    questions = ['abc', 'h', 'adefgh', 'xyz']
+    outputs = []
+    for num_workers in (1, 3, 8):
+        ranker = TfidfRanker(StubVectorizer(tfidf_matrix), top_n=6, active=active, num_workers=num_workers,
+                             return_doc_indices=True)
+        doc_ids, scores, indices = ranker(questions)
+        executor = ranker._executor
+        ranker.destroy()
+        assert executor is None or executor._shutdown
+        assert doc_ids == [[f'doc {i}' for i in row_indices] for row_indices in indices]
+        outputs.append((doc_ids, [row_scores.tolist() for row_scores in scores]))
+    assert outputs[0] == outputs[1] == outputs[2]
@@ -0,0 +1,84 @@
+import pytest
+
+from deeppavlov.models.kbqa import wiki_parser
+from deeppavlov.models.kbqa.wiki_parser import WikiParser
+
+ENT, REL = "http://we", "http://wpd"
+
+
+class StubDocument:
+    """HDT document stub which searches triples in a list."""
+
+    def __init__(self, triples):
+        self.triples = triples
+        self.calls = 0
+
+    def search_triples(self, subj, rel, obj):
+        self.calls += 1
+        found = [triple for triple in self.triples
+                 if all(not elem or elem == triple_elem for elem, triple_elem in zip((subj, rel, obj), triple))]
+        return iter(found), len(found)
+
+
+def make_triples(n_entities, n_in_country):
+    triples = []
+    for i in range(n_entities):
+        triples.append((f"{ENT}/Q{i}", f"{REL}/P31", f"{ENT}/T{i % 2}"))
+        triples += [(f"{ENT}/Q{i}", f"{REL}/P1", f"{ENT}/V{i * j}") for j in range(i % 3)]
+        if i < n_in_country:
+            triples.append((f"{ENT}/Q{i}", f"{REL}/P17", f"{ENT}/C"))
+    triples += [(f"{ENT}/V{i}", f"{REL}/P31", f"{ENT}/T{i % 3}") for i in range(0, 2 * n_entities, 2)]
+    return triples
+
+
+def make_parser(monkeypatch, triples, **kwargs):
+    monkeypatch.setattr(wiki_parser, "HDTDocument", lambda filename: StubDocument(triples))
+    return WikiParser(wiki_filename="wikidata.hdt", **kwargs)
+
+
+QUERIES = [
+    [["?ent", f"{REL}/P17", f"{ENT}/C"], ["?ent", f"{REL}/P31", f"{ENT}/T0"], ["?ent", f"{REL}/P1", "?obj"]],
+    [["?ent", f"{REL}/P31", f"{ENT}/T1"], ["?ent", f"{REL}/P1", "?obj"], ["?obj", f"{REL}/P31", f"{ENT}/T0"]],
+    [["?ent", f"{REL}/P1", "?obj"], ["?obj", f"{REL}/P31", f"{ENT}/T2"], ["?ent", f"{REL}/P17", f"{ENT}/C"]],
+    [["?ent", f"{REL}/P17", f"{ENT}/C"], ["?ent", f"{REL}/P31", f"{ENT}/T5"], ["?ent", f"{REL}/P1", "?obj"]],
+    [["?ent", f"{REL}/P31", f"{ENT}/T0"], ["?ent", f"{REL}/P17", f"{ENT}/C"]],
+]
+
+
+@pytest.mark.parametrize("hash_join_ratio", [0, 1, 10, 1000])
+@pytest.mark.parametrize("n_in_country", [0, 2, 30])
+@pytest.mark.parametrize("query_seq", QUERIES)
+def test_join_planned_matches_nested_loop(monkeypatch, hash_join_ratio, n_in_country, query_seq):
+    monkeypatch.setattr(WikiParser, "HASH_JOIN_RATIO", hash_join_ratio)
+    parser = make_parser(monkeypatch, make_triples(40, n_in_country))
+    rel_types = ["direct"] * len(query_seq)
+    assert parser.is_plain_join(query_seq)
+    combs, _ = parser.join_nested_loop(query_seq, rel_types)
+    assert parser.join_planned(query_seq, rel_types) == combs
+
+
+def test_execute_with_planning(monkeypatch):
+    triples = make_triples(40, 30)
+    planned, nested = make_parser(monkeypatch, triples), make_parser(monkeypatch, triples, plan_queries=False)
+    for query_seq in QUERIES:
+        args = (["?ent", "?obj"], [], query_seq, [], None, [], ["direct"] * len(query_seq))
+        assert planned.execute(*args) == nested.execute(*args)
+
+
+def test_triplets_cache_is_bounded(monkeypatch):
+    triples = make_triples(40, 30)
+    uncached = make_parser(monkeypatch, triples)
+    cached = make_parser(monkeypatch, triples, cache_size=100, max_cached_triplets=5, max_cached_total_triplets=12)
+    patterns = [(f"{ENT}/Q{i}", "", "") for i in range(40)] + [("", f"{REL}/P17", ""), ("", "", f"{ENT}/T9")]
+    for _ in range(2):
+        for pattern in patterns:
+            triplets, cnt = cached.search_triples(*pattern)
+            expected, expected_cnt = uncached.search_triples(*pattern)
+            assert (list(triplets), cnt) == (list(expected), expected_cnt)
+            cache = cached.caches["triplets"]
+            assert cache.weight <= 12
+            assert sum(len(found) + 1 for (found, _), _ in cache._data.values()) == cache.weight
+
+    calls = cached.document.calls
+    cached.search_triples(*patterns[-1])
+    assert cached.document.calls == calls